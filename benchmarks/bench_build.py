@@ -0,0 +1,71 @@
+"""
+Measures programmatic workflow construction through ``Workflow.add_step``
+and ``Workflow.add_connection`` (or ``add_steps``/``add_connections`` with
+``--bulk``).
+
+Every step exposes its inputs and outputs as workflow ports (the default for
+``add_step``) and is chained to the previous step.
+
+Usage::
+
+    python benchmarks/bench_build.py [--steps 2000] [--bulk]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+
+
+def make_tool(i, n_inputs=3):
+    t = cwl.CommandLineTool(id='tool_{}'.format(i))
+    for k in range(n_inputs):
+        t.add_input(cwl.String(), id='in_{}'.format(k))
+    t.add_output(cwl.File(glob='out.txt'), id='out')
+    return t
+
+
+def build(n_steps):
+    wf = cwl.Workflow(id='synthetic')
+    for i in range(n_steps):
+        wf.add_step(make_tool(i), id='step_{}'.format(i))
+        if i > 0:
+            wf.add_connection(
+                'step_{}.out'.format(i - 1), 'step_{}.in_0'.format(i)
+            )
+    return wf
+
+
+def build_bulk(n_steps):
+    wf = cwl.Workflow(id='synthetic')
+    wf.add_steps(
+        dict(step=make_tool(i), id='step_{}'.format(i))
+        for i in range(n_steps)
+    )
+    wf.add_connections(
+        ('step_{}.out'.format(i - 1), 'step_{}.in_0'.format(i))
+        for i in range(1, n_steps)
+    )
+    return wf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--bulk', action='store_true')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    wf = build_bulk(args.steps) if args.bulk else build(args.steps)
+    elapsed = time.perf_counter() - start
+    print('build{}: {} steps in {:.3f}s ({:.0f} steps/s), hash {}'.format(
+        ' (bulk)' if args.bulk else '', args.steps, elapsed,
+        args.steps / elapsed, wf.calc_hash()[:16]
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares bundle size and pack/unpack time of compression codecs on a
+representative module tree (the ``sbg`` package by default).
+
+Usage::
+
+    python benchmarks/bench_codec.py [--path sbg] [--repeat 3]
+"""
+import os
+import sys
+import time
+import base64
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sbg.cwl.v1_0.util import archive, Codec  # noqa: E402
+from sbg.cwl.serialize import deploy  # noqa: E402
+
+
+def available(codec):
+    if codec != Codec.ZSTD:
+        return True
+    try:
+        archive([], codec=codec)
+    except ValueError:
+        return False
+    return True
+
+
+def best_of(repeat, f):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--path', default=os.path.join(ROOT, 'sbg'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    names = [os.path.abspath(args.path)]
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = len(base64.b64decode(archive(
+            names, encode=True, codec=Codec.NONE
+        )))
+        print('{:<6} {:>10} {:>7} {:>9} {:>9}'.format(
+            'codec', 'bytes(b64)', 'ratio', 'pack(s)', 'unpack(s)'
+        ))
+        for codec in sorted(Codec.UNTAR):
+            if not available(codec):
+                print('{:<6} unavailable'.format(codec))
+                continue
+            entry = archive(names, encode=True, codec=codec)
+            pack = best_of(args.repeat, lambda: archive(
+                names, encode=True, codec=codec
+            ))
+            bundle = os.path.join(tmp, Codec.bundle_name('bundle', codec))
+            with open(bundle, 'w') as f:
+                f.write(entry)
+
+            def unpack():
+                cwd = os.getcwd()
+                os.chdir(tmp)
+                try:
+                    deploy.b64untar(os.path.basename(bundle))
+                finally:
+                    os.chdir(cwd)
+
+            unpack_time = best_of(args.repeat, unpack)
+            raw = len(base64.b64decode(entry))
+            print('{:<6} {:>10} {:>7.3f} {:>9.3f} {:>9.3f}'.format(
+                codec, len(entry), raw / plain, pack, unpack_time
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures rendering of command lines of many jobs of one tool: a new
+``CommandLine`` per job (binding plan compiled every time) against one
+``CommandLine`` rendering all jobs with ``render_all``.
+
+The tool has ``--inputs`` optional string inputs, a file array and a record,
+every job sets about half of the string inputs.
+
+Usage::
+
+    python benchmarks/bench_command_line.py [--jobs 10000] [--inputs 50]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from synthetic import tool_dict  # noqa: E402
+
+
+def document(n_inputs):
+    doc = tool_dict('tool', n_inputs=n_inputs)
+    doc['inputs'].extend([
+        {'id': 'files', 'type': 'File[]',
+         'inputBinding': {'prefix': '--files', 'itemSeparator': ','}},
+        {'id': 'options', 'inputBinding': {'position': n_inputs},
+         'type': {'type': 'record', 'fields': [
+             {'name': 'threads', 'type': 'int',
+              'inputBinding': {'prefix': '-t'}},
+             {'name': 'verbose', 'type': 'boolean',
+              'inputBinding': {'prefix': '-v'}}
+         ]}}
+    ])
+    return doc
+
+
+def jobs(n_jobs, n_inputs):
+    for j in range(n_jobs):
+        job = {
+            'in_{}'.format(i): 'value-{}-{}'.format(j, i)
+            for i in range(j % 2, n_inputs, 2)
+        }
+        job['files'] = [
+            {'class': 'File', 'path': '/data/{}/{}.bam'.format(j, k)}
+            for k in range(3)
+        ]
+        job['options'] = {'threads': j % 8 + 1, 'verbose': j % 3 == 0}
+        yield job
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=10000)
+    parser.add_argument('--inputs', type=int, default=50)
+    args = parser.parse_args()
+
+    tool = cwl.load(document(args.inputs))
+
+    start = time.perf_counter()
+    each = [cwl.CommandLine(tool).render(job)
+            for job in jobs(args.jobs, args.inputs)]
+    compiled_each = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = list(cwl.CommandLine(tool).render_all(
+        jobs(args.jobs, args.inputs)
+    ))
+    compiled_once = time.perf_counter() - start
+
+    assert each == batch
+    print('{} jobs, {} inputs: compiled per job {:.3f}s, compiled once '
+          '{:.3f}s ({:.1f} us/job), speedup {:.1f}x'.format(
+              args.jobs, args.inputs, compiled_each, compiled_once,
+              compiled_once / args.jobs * 1e6, compiled_each / compiled_once
+          ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures ``load_file`` of YAML files of synthetic workflows without on-disk
+cache, with empty cache (parse and store) and with filled cache.
+
+Usage::
+
+    python benchmarks/bench_disk_cache.py [--steps 100,1000,5000]
+"""
+import os
+import sys
+import time
+import yaml
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg.cwl.v1_0.util import load_file, set_disk_cache  # noqa: E402
+from synthetic import workflow_dict  # noqa: E402
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', default='100,1000,5000')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        for steps in map(int, args.steps.split(',')):
+            path = os.path.join(root, 'wf.cwl')
+            with open(path, 'w') as fp:
+                yaml.dump(workflow_dict(steps), fp, Dumper=getattr(
+                    yaml, 'CSafeDumper', yaml.SafeDumper
+                ), default_flow_style=False)
+
+            set_disk_cache(None)
+            parse, (expected, _) = timed(load_file, path)
+            cache = set_disk_cache(os.path.join(root, 'cache'))
+            cache.clear()
+            cold, _ = timed(load_file, path)
+            warm, (result, backend) = timed(load_file, path)
+            set_disk_cache(None)
+            print('{} steps, {:.1f} MB: parse {:.3f}s, empty cache {:.3f}s, '
+                  'cached {:.3f}s ({:.0f}x, entry {:.1f} MB, same: {})'.format(
+                      steps, os.path.getsize(path) / 2 ** 20, parse, cold,
+                      warm, parse / warm, cache.size() / 2 ** 20,
+                      backend == 'pickle' and result == expected
+                  ))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Runs a workflow of independent steps sleeping ``--sleep`` seconds followed
+by a step joining their outputs with ``LocalExecutor`` under growing core
+budgets, every step requires one core.
+
+Usage::
+
+    python benchmarks/bench_executor.py [--steps 16] [--sleep 0.5]
+                                        [--cores 1,2,4,8]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+
+
+def workflow(steps, sleep):
+    work = {
+        'class': 'CommandLineTool', 'id': 'work',
+        'baseCommand': ['sh', '-c', 'sleep {}; echo $0'.format(sleep)],
+        'inputs': [{'id': 'name', 'type': 'string',
+                    'inputBinding': {'position': 1}}],
+        'outputs': [{'id': 'out', 'type': 'stdout'}],
+        'stdout': 'out.txt',
+        'requirements': [{'class': 'ResourceRequirement', 'coresMin': 1,
+                          'ramMin': 64}]
+    }
+    join = {
+        'class': 'CommandLineTool', 'id': 'join', 'baseCommand': ['cat'],
+        'inputs': [{'id': 'files', 'type': 'File[]',
+                    'inputBinding': {'position': 1}}],
+        'outputs': [{'id': 'out', 'type': 'stdout'}],
+        'stdout': 'joined.txt'
+    }
+    ids = ['step_{}'.format(i) for i in range(steps)]
+    return cwl.load({
+        'class': 'Workflow', 'id': 'wf',
+        'requirements': [{'class': 'MultipleInputFeatureRequirement'}],
+        'inputs': [],
+        'outputs': [{'id': 'out', 'type': 'File',
+                     'outputSource': 'join/out'}],
+        'steps': [
+            {'id': id, 'run': work, 'out': ['out'],
+             'in': [{'id': 'name', 'default': id}]}
+            for id in ids
+        ] + [{
+            'id': 'join', 'run': join, 'out': ['out'],
+            'in': [{'id': 'files', 'linkMerge': 'merge_flattened',
+                    'source': ['{}/out'.format(id) for id in ids]}]
+        }]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=16)
+    parser.add_argument('--sleep', type=float, default=0.5)
+    parser.add_argument('--cores', default='1,2,4,8')
+    args = parser.parse_args()
+
+    wf = workflow(args.steps, args.sleep)
+    root = tempfile.mkdtemp()
+    try:
+        for cores in map(int, args.cores.split(',')):
+            executor = cwl.LocalExecutor(basedir=root, cores=cores)
+            start = time.perf_counter()
+            out = executor.run(wf)['out']
+            elapsed = time.perf_counter() - start
+            with open(out['path']) as fp:
+                lines = len(fp.readlines())
+            ideal = -(-args.steps // cores) * args.sleep
+            print('{} cores: {:.2f}s (ideal {:.2f}s), {} outputs '
+                  'joined'.format(cores, elapsed, ideal, lines))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
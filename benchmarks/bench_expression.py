@@ -0,0 +1,107 @@
+"""
+Measures evaluation of parameter references (``$(inputs.reads.path)``),
+which are resolved in Python, against the same expressions evaluated by
+JavaScript engines: ``NodeEngine`` (one ``node`` process per expression)
+and ``NodePool`` (persistent workers, one expression per message and
+batches of ``--batch`` expressions with ``expression_lib.js`` preloaded).
+
+Usage::
+
+    python benchmarks/bench_expression.py [--expressions 10000]
+                                          [--node-expressions 20]
+                                          [--batch 100]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg.cwl.consts import EXPRESSION_LIB  # noqa: E402
+from sbg.cwl.v1_0.expression import (  # noqa: E402
+    evaluate, compile_expression, split, to_js, NodeEngine, NodePool, LITERAL
+)
+
+EXPRESSIONS = [
+    '$(inputs.reads.path)',
+    '$(inputs.reads.basename).bam',
+    '-t $(runtime.cores) -m $(runtime.ram)',
+    "$(inputs['sample names'][0])",
+    '$(self[0].contents)',
+]
+
+CONTEXT = {
+    'inputs': {
+        'reads': {'class': 'File', 'path': '/data/r.fq', 'basename': 'r.fq'},
+        'sample names': ['a', 'b']
+    },
+    'self': [{'contents': '1'}],
+    'runtime': {'cores': 4, 'ram': 4096}
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--expressions', type=int, default=10000)
+    parser.add_argument('--node-expressions', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=100)
+    args = parser.parse_args()
+
+    n = args.expressions
+    start = time.perf_counter()
+    for i in range(n):
+        evaluate(EXPRESSIONS[i % len(EXPRESSIONS)], CONTEXT)
+    python = (time.perf_counter() - start) / n
+    print('python: {:.2f} us/expression ({} expressions, {} compiled)'.format(
+        python * 1e6, n, compile_expression.cache_info().currsize
+    ))
+
+    if not shutil.which('node'):
+        print('node: not installed')
+        return
+    # every reference evaluated as JavaScript
+    code = [
+        to_js(kind, c) for e in EXPRESSIONS for kind, c in split(e)
+        if kind is not LITERAL
+    ]
+    with open(EXPRESSION_LIB) as fp:
+        lib = [fp.read()]
+
+    engine = NodeEngine()
+    n = args.node_expressions
+    start = time.perf_counter()
+    for i in range(n):
+        engine.evaluate(code[i % len(code)], CONTEXT, lib)
+    node = (time.perf_counter() - start) / n
+    print('node process: {:.2f} ms/expression'.format(node * 1e3))
+
+    with NodePool(processes=1) as pool:
+        start = time.perf_counter()
+        pool.evaluate('1', {}, lib)  # starts the worker, loads the library
+        print('pool startup: {:.2f} ms'.format(
+            (time.perf_counter() - start) * 1e3
+        ))
+        n = args.expressions
+        start = time.perf_counter()
+        for i in range(n):
+            pool.evaluate(code[i % len(code)], CONTEXT, lib)
+        single = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        for i in range(0, n, args.batch):
+            pool.evaluate_many([
+                (code[j % len(code)], CONTEXT)
+                for j in range(i, min(n, i + args.batch))
+            ], lib)
+        batched = (time.perf_counter() - start) / n
+    print('pool: {:.1f} us/expression, batched {:.1f} us/expression '
+          '({:.0f}x and {:.0f}x faster than a process per expression), '
+          'python is {:.0f}x faster than batched'.format(
+              single * 1e6, batched * 1e6, node / single, node / batched,
+              batched / python
+          ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures ``from_file`` (used by ``cwl.load``) on JSON and YAML files of
+synthetic workflows of different sizes, compared with the former pure
+python ``yaml.SafeLoader`` parse.
+
+Usage::
+
+    python benchmarks/bench_from_file.py [--steps 100,1000,5000]
+"""
+import os
+import sys
+import json
+import time
+import yaml
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg.cwl.v1_0.util import load_file  # noqa: E402
+from synthetic import workflow_dict  # noqa: E402
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - start, result
+
+
+def safe_loader(path):
+    with open(path, 'r') as fp:
+        return yaml.load(fp, Loader=yaml.SafeLoader)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', default='100,1000,5000')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        for steps in map(int, args.steps.split(',')):
+            doc = workflow_dict(steps)
+            paths = {
+                'json': os.path.join(root, 'wf.json'),
+                'yaml': os.path.join(root, 'wf.cwl')
+            }
+            with open(paths['json'], 'w') as fp:
+                json.dump(doc, fp, indent=2)
+            with open(paths['yaml'], 'w') as fp:
+                yaml.dump(doc, fp, Dumper=getattr(
+                    yaml, 'CSafeDumper', yaml.SafeDumper
+                ), default_flow_style=False)
+
+            for fmt, path in sorted(paths.items()):
+                base, expected = timed(safe_loader, path)
+                elapsed, (result, backend) = timed(load_file, path)
+                print('{} steps, {} {:.1f} MB: SafeLoader {:.3f}s, {} '
+                      '{:.3f}s ({:.1f}x, same: {})'.format(
+                          steps, fmt, os.path.getsize(path) / 2 ** 20, base,
+                          backend, elapsed, base / elapsed,
+                          result == expected
+                      ))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures building of the step dependency ``Graph`` and its analysis
+(topological order, levels, critical path) of large workflows: a chain, a
+random DAG and a nested workflow with steps of subworkflows expanded.
+
+Usage::
+
+    python benchmarks/bench_graph.py [--steps 10000]
+"""
+import os
+import gc
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from synthetic import (  # noqa: E402
+    workflow_dict, dag_workflow_dict, nested_workflow_dict
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=10000)
+    args = parser.parse_args()
+
+    # three levels of subworkflows with ~``steps`` tools in total
+    width = round(args.steps ** (1 / 3))
+    documents = [
+        ('chain', lambda: workflow_dict(args.steps, n_inputs=1)),
+        ('dag', lambda: dag_workflow_dict(args.steps)),
+        ('nested', lambda: nested_workflow_dict(
+            depth=3, width=width, n_inputs=1
+        )),
+    ]
+    for name, generate in documents:
+        wf = cwl.load(generate(), trusted=True)
+        gc.collect()
+        start = time.perf_counter()
+        g = wf.graph()
+        built = time.perf_counter()
+        levels = g.levels()
+        length, path = g.critical_path()
+        done = time.perf_counter()
+        print('{:<7} {:>6} steps: graph {:.3f}s, analysis {:.3f}s, '
+              '{} levels, max concurrency {}, critical path {}'.format(
+                  name, len(g.steps), built - start, done - built,
+                  len(levels), max(map(len, levels)), length
+              ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Measures ``calc_hash`` of a synthetic workflow: the first (cold) hash, hash
+of an unchanged workflow and re-hash after one field of a single step tool
+is edited, compared with hashing the whole JSON document (the format used
+before Merkle digests).
+
+Usage::
+
+    python benchmarks/bench_hash.py [--steps 5000] [--edits 20]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from sbg.cwl.v1_0.util import legacy_digest  # noqa: E402
+from synthetic import workflow_dict  # noqa: E402
+
+
+def timed(f):
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=5000)
+    parser.add_argument('--edits', type=int, default=20)
+    args = parser.parse_args()
+
+    wf = cwl.load(workflow_dict(args.steps))
+    print('legacy (whole JSON): {:.4f}s'.format(
+        timed(lambda: legacy_digest(wf))
+    ))
+    print('first:               {:.4f}s'.format(timed(wf.calc_hash)))
+    print('unchanged:           {:.6f}s'.format(timed(wf.calc_hash)))
+
+    total = 0
+    for i in range(args.edits):
+        step = wf.steps[i * len(wf.steps) // args.edits]
+        step.run.inputs[0].label = 'edit {}'.format(i)
+        total += timed(wf.calc_hash)
+    print('after one edit:      {:.4f}s (mean of {})'.format(
+        total / args.edits, args.edits
+    ))
+
+
+if __name__ == '__main__':
+    main()
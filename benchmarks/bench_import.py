@@ -0,0 +1,68 @@
+"""
+Measures ``import sbg.cwl`` time in fresh interpreters using
+``python -X importtime`` and lists the slowest imported modules.
+
+Exits with status 1 when the median exceeds ``--max-ms`` or any module from
+``--forbid`` is imported (platform client and serializers must stay lazy).
+
+Usage::
+
+    python benchmarks/bench_import.py [--runs 10] [--max-ms 0]
+                                      [--forbid sevenbridges,dill,requests]
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """Returns ``{module: cumulative_us}`` for one fresh import."""
+
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        cwd=ROOT, stderr=subprocess.PIPE, universal_newlines=True, check=True
+    ).stderr
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default='sbg.cwl')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=0)
+    parser.add_argument('--forbid', default='sevenbridges,dill,requests')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    median = statistics.median(r[args.module] for r in runs) / 1000
+    print('import {}: median {:.1f} ms over {} runs'.format(
+        args.module, median, args.runs
+    ))
+    for name, us in sorted(runs[-1].items(), key=lambda x: -x[1])[
+            1:args.top + 1]:
+        print('  {:>8.1f} ms  {}'.format(us / 1000, name))
+
+    failed = False
+    forbidden = [m for m in args.forbid.split(',') if m and m in runs[-1]]
+    if forbidden:
+        print('imported eagerly: {}'.format(', '.join(forbidden)))
+        failed = True
+    if args.max_ms and median > args.max_ms:
+        print('slower than {} ms'.format(args.max_ms))
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
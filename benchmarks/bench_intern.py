@@ -0,0 +1,69 @@
+"""
+Measures memory held by many loaded apps (as in a long-running service)
+without and with interning of short strings (``load(intern=True)``, always
+used for YAML files), and time spent interning.
+
+Usage::
+
+    python benchmarks/bench_intern.py [--apps 100] [--steps 200]
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from sbg.cwl.v1_0.util import intern_strings  # noqa: E402
+from synthetic import workflow_dict  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--apps', type=int, default=100)
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args()
+
+    texts = []
+    for i in range(args.apps):
+        doc = workflow_dict(args.steps)
+        doc['id'] = 'app_{}'.format(i)
+        texts.append(json.dumps(doc))
+
+    held = {}
+    for intern in (False, True):
+        gc.collect()
+        tracemalloc.start()
+        apps = [
+            cwl.load(json.loads(text), trusted=True, intern=intern)
+            for text in texts
+        ]
+        gc.collect()
+        held[intern] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del apps
+
+    docs = [json.loads(text) for text in texts]
+    start = time.perf_counter()
+    for doc in docs:
+        intern_strings(doc)
+    elapsed = time.perf_counter() - start
+
+    print('{} apps of {} steps ({:.1f} MB JSON)'.format(
+        args.apps, args.steps, sum(map(len, texts)) / 2 ** 20
+    ))
+    print('held: {:.1f} MB, interned {:.1f} MB ({:.1f}% saved)'.format(
+        held[False] / 2 ** 20, held[True] / 2 ** 20,
+        100 * (1 - held[True] / held[False])
+    ))
+    print('interning: {:.3f}s ({:.1f} ms per app)'.format(
+        elapsed, 1000 * elapsed / args.apps
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares eager and lazy (``load(lazy=True)``) loading of a packed workflow
+with nested subworkflows: load time, memory held by the loaded workflow,
+time of listing steps with their hints and time of serializing the whole
+workflow (which converts all lazily kept ``run`` documents).
+
+Usage::
+
+    python benchmarks/bench_lazy_load.py [--depth 3] [--width 10]
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from synthetic import nested_workflow_dict  # noqa: E402
+
+
+def measure(text, lazy):
+    gc.collect()
+    tracemalloc.start()
+    wf = cwl.load(json.loads(text), lazy=lazy)
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del wf
+
+    # parsing is not measured, it is the same for both modes
+    doc = json.loads(text)
+    start = time.perf_counter()
+    wf = cwl.load(doc, lazy=lazy)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for step in wf.steps:
+        step.id, step.hints, [i.source for i in step.in_]
+    list_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    serialized = wf.to_json()
+    dump_time = time.perf_counter() - start
+    return load_time, memory, list_time, dump_time, serialized
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--width', type=int, default=10)
+    args = parser.parse_args()
+
+    text = json.dumps(nested_workflow_dict(args.depth, args.width))
+    print('document: {:.2f} MB JSON, {} tools'.format(
+        len(text) / 2 ** 20, args.width ** args.depth
+    ))
+    print('{:<6} {:>8} {:>11} {:>9} {:>9}'.format(
+        'mode', 'load(s)', 'memory(MB)', 'list(s)', 'dump(s)'
+    ))
+    outputs = []
+    for lazy in (False, True):
+        load_time, memory, list_time, dump_time, serialized = measure(
+            text, lazy
+        )
+        outputs.append(serialized)
+        print('{:<6} {:>8.3f} {:>11.1f} {:>9.4f} {:>9.3f}'.format(
+            'lazy' if lazy else 'eager', load_time, memory / 2 ** 20,
+            list_time, dump_time
+        ))
+    assert outputs[0] == outputs[1], 'serialized output differs'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Measures ``cwl.load`` throughput on a synthetic workflow, with value checks
+(default) and in trusted mode (``load(trusted=True)``).
+
+Usage::
+
+    python benchmarks/bench_load.py [--steps 5000] [--repeat 3]
+"""
+import os
+import sys
+import copy
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from synthetic import workflow_dict  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    doc = workflow_dict(args.steps)
+    for trusted in (False, True):
+        best = None
+        for _ in range(args.repeat):
+            # load may mutate nested dicts, always start from a fresh copy
+            d = copy.deepcopy(doc)
+            start = time.perf_counter()
+            cwl.load(d, trusted=trusted)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        print('load{}: {} steps in {:.3f}s ({:.0f} steps/s)'.format(
+            ' (trusted)' if trusted else '', args.steps, best,
+            args.steps / best
+        ))
+
+
+if __name__ == '__main__':
+    main()
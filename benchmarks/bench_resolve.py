@@ -0,0 +1,67 @@
+"""
+Measures resolution of ``$import`` directives in a library of tools which
+all import the same shared schema file, with and without shared
+``DocumentCache``.
+
+Usage::
+
+    python benchmarks/bench_resolve.py [--tools 500] [--schema-types 200]
+"""
+import os
+import sys
+import time
+import yaml
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+
+
+def library(schema, n):
+    tools = []
+    for i in range(n):
+        t = cwl.CommandLineTool(id='tool_{}'.format(i))
+        t['sbg:schema'] = {'$import': schema}
+        tools.append(cwl.load(t))
+    return tools
+
+
+def resolve_all(tools, cache_factory):
+    start = time.perf_counter()
+    for t in tools:
+        t.resolve(cache=cache_factory())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tools', type=int, default=500)
+    parser.add_argument('--schema-types', type=int, default=200)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        schema = os.path.join(root, 'schema.yaml')
+        with open(schema, 'w') as fp:
+            # YAML, like hand written schemas
+            yaml.safe_dump({'types': [
+                dict(type='enum', name='enum_{}'.format(i),
+                     symbols=['a_{}'.format(i), 'b_{}'.format(i)])
+                for i in range(args.schema_types)
+            ]}, fp)
+
+        base = resolve_all(library(schema, args.tools), cwl.DocumentCache)
+        print('per tool cache: {} tools in {:.3f}s'.format(args.tools, base))
+        shared = cwl.DocumentCache(max_size=16)
+        elapsed = resolve_all(library(schema, args.tools), lambda: shared)
+        print('shared cache: {} tools in {:.3f}s ({:.1f}x, {} parses)'
+              .format(args.tools, elapsed, base / elapsed, shared.misses))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Measures expansion of scattered steps into jobs: counting jobs, iterating
+a crossproduct of three inputs (``--size`` items each) and gathering outputs
+of all jobs into nested arrays. Peak memory of iteration is traced for
+an increasing number of jobs to show that it does not grow.
+
+Usage::
+
+    python benchmarks/bench_scatter.py [--size 100]
+"""
+import os
+import sys
+import time
+import argparse
+import itertools
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=100)
+    args = parser.parse_args()
+
+    inputs = {k: list(range(args.size)) for k in ('a', 'b', 'c')}
+    inputs['reference'] = {'class': 'File', 'path': '/data/ref.fa'}
+    for method in (cwl.ScatterMethod.FLAT_CROSSPRODUCT,
+                   cwl.ScatterMethod.NESTED_CROSSPRODUCT):
+        start = time.perf_counter()
+        scatter = cwl.Scatter(inputs, ['a', 'b', 'c'], method)
+        count = len(scatter)
+        counted = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in scatter:
+            pass
+        iterated = time.perf_counter() - start
+
+        start = time.perf_counter()
+        gathered = scatter.gather(
+            ({'out': i} for i in range(count)), ['out']
+        )
+        done = time.perf_counter() - start
+        del gathered
+
+        peaks = []
+        for n in (count // 100, count // 10):
+            tracemalloc.start()
+            for _ in itertools.islice(scatter, n):
+                pass
+            peaks.append((n, tracemalloc.get_traced_memory()[1]))
+            tracemalloc.stop()
+        print('{:<19} {} jobs: count {:.1f}us, iterate {:.2f}s '
+              '({:.2f}us/job), gather {:.2f}s, peak memory {}'.format(
+                  method, count, counted * 1e6, iterated,
+                  iterated / count * 1e6, done, ', '.join(
+                      '{:.1f} KiB of {} jobs'.format(peak / 1024, n)
+                      for n, peak in peaks
+                  )
+              ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures YAML (``str``/``dump``) and JSON (``to_json``) serialization of a
+synthetic workflow, compared with the former JSON -> YAML round trip.
+
+Usage::
+
+    python benchmarks/bench_serialize.py [--steps 2000] [--repeat 3]
+"""
+import os
+import sys
+import json
+import time
+import yaml
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from synthetic import workflow_dict  # noqa: E402
+
+
+def roundtrip(obj):
+    return yaml.dump(
+        yaml.load(json.dumps(obj, indent=2), Loader=yaml.SafeLoader),
+        default_flow_style=False
+    )
+
+
+def best_of(repeat, f):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    wf = cwl.load(workflow_dict(args.steps))
+    base, expected = best_of(1, lambda: roundtrip(wf))
+    print('yaml roundtrip: {:.3f}s'.format(base))
+    elapsed, result = best_of(args.repeat, lambda: str(wf))
+    print('yaml str: {:.3f}s ({:.1f}x, identical: {})'.format(
+        elapsed, base / elapsed, result == expected
+    ))
+
+    # any multi-line text with indentation needs python emitter
+    wf.doc = 'Workflow\n  with indented doc'
+    base, expected = best_of(1, lambda: roundtrip(wf))
+    elapsed, result = best_of(args.repeat, lambda: str(wf))
+    print('yaml str (python emitter): {:.3f}s ({:.1f}x, identical: {})'
+          .format(elapsed, base / elapsed, result == expected))
+
+    base, expected = best_of(args.repeat, wf.to_json)
+    print('json: {:.3f}s'.format(base))
+    try:
+        cwl.set_json_backend('orjson')
+    except ValueError as e:
+        print(e)
+        return
+    elapsed, result = best_of(args.repeat, wf.to_json)
+    cwl.set_json_backend(None)
+    print('orjson: {:.3f}s ({:.1f}x, identical: {})'.format(
+        elapsed, base / elapsed, result == expected
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures serialized size of a workflow made of ``@cwl.to_tool`` steps before
+and after ``Workflow.share_files``.
+
+Uses the same throwaway project as ``bench_to_tool.py``.
+
+Usage::
+
+    python benchmarks/bench_share_files.py [--tools 50] [--helper-modules 20]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from bench_to_tool import create_project, decorated  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tools', type=int, default=50)
+    parser.add_argument('--helper-modules', type=int, default=20)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    root = tempfile.mkdtemp()
+    try:
+        module_name = create_project(root, args.tools, args.helper_modules)
+        os.chdir(root)
+        sys.path.insert(0, root)
+        module = importlib.import_module(module_name)
+
+        wf = cwl.Workflow(id='shared')
+        wf.add_steps([f() for f in decorated(module)], expose=['x', 'out'])
+        before = len(wf.to_json())
+
+        start = time.perf_counter()
+        added = wf.share_files()
+        elapsed = time.perf_counter() - start
+        after = len(wf.to_json())
+
+        print('share_files: {} steps in {:.3f}s, {} shared inputs'.format(
+            args.tools, elapsed, len(added)
+        ))
+        print('json: {:.2f} MB -> {:.2f} MB ({:.1f}x smaller)'.format(
+            before / 2 ** 20, after / 2 ** 20, before / after
+        ))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Compares peak memory and time of writing a workflow with large embedded
+base64 ``Dirent`` bundles as one serialized string (former ``dump`` and
+``json_dump``), with streaming writers and with bundles kept in files
+(``FileText``).
+
+Usage::
+
+    python benchmarks/bench_stream.py [--tools 20] [--bundle-mb 2]
+"""
+import os
+import gc
+import sys
+import time
+import base64
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from sbg.cwl.v1_0.util import to_json, to_yaml  # noqa: E402
+
+
+def workflow(root, tools, bundle_mb, file_text):
+    wf = cwl.Workflow(id='wf')
+    for i in range(tools):
+        entry = base64.b64encode(os.urandom(bundle_mb * 3 * 2 ** 18)).decode()
+        if file_text:
+            path = os.path.join(root, 'bundle_{}.b64'.format(i))
+            with open(path, 'w') as fp:
+                fp.write(entry)
+            entry = cwl.FileText(path)
+        t = cwl.CommandLineTool(id='tool_{}'.format(i))
+        t.add_in_workdir(cwl.Dirent(entry=entry, entryname='bundle.b64'))
+        wf.add_step(t, expose=[])
+    return wf
+
+
+def measure(f):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    f()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tools', type=int, default=20)
+    parser.add_argument('--bundle-mb', type=int, default=2)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        out = os.path.join(root, 'out')
+        wf = workflow(root, args.tools, args.bundle_mb, False)
+        files = workflow(root, args.tools, args.bundle_mb, True)
+
+        def whole_json():
+            with open(out, 'w') as fp:
+                fp.write(to_json(wf, indent=2))
+
+        def whole_yaml():
+            with open(out, 'w') as fp:
+                fp.write(to_yaml(wf))
+
+        cases = [
+            ('json string', whole_json),
+            ('json stream', lambda: wf.json_dump(out)),
+            ('json FileText', lambda: files.json_dump(out)),
+            ('yaml string', whole_yaml),
+            ('yaml stream', lambda: wf.dump(out)),
+            ('yaml FileText', lambda: files.dump(out)),
+        ]
+        print('document: {} bundles of {} MB'.format(
+            args.tools, args.bundle_mb
+        ))
+        for name, f in cases:
+            elapsed, peak = measure(f)
+            print('{:<14} {:>7.3f}s  peak {:>7.1f} MB  file {:.1f} MB'.format(
+                name, elapsed, peak / 2 ** 20, os.path.getsize(out) / 2 ** 20
+            ))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Measures generation of ``CommandLineTool`` objects from ``@cwl.to_tool``
+decorated functions.
+
+A throwaway project with a local helper package and a module with ``--tools``
+decorated functions is written into a temporary directory, which becomes the
+working directory (so the helper package is bundled into every tool).
+
+Tools are generated serially, with ``cwl.to_tools`` for every number of
+worker processes in ``--processes`` and with the artifact cache.
+
+Usage::
+
+    python benchmarks/bench_to_tool.py [--tools 300] [--helper-modules 20]
+                                       [--processes 1,2,4]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sbg import cwl  # noqa: E402
+from sbg.cwl import serialize  # noqa: E402
+
+HELPER = '''\
+def scale(x, factor):
+    return x * factor
+'''
+
+# filler module, ~10 KiB of source
+FILLER = ''.join(
+    'def f_{0}(x):\n    return x + {0}\n\n\n'.format(i) for i in range(300)
+)
+
+HEADER = '''\
+from sbg import cwl
+from helpers import util
+
+FACTORS = {factors!r}
+'''
+
+TOOL = '''
+
+@cwl.to_tool(
+    inputs=dict(x=cwl.Int()),
+    outputs=dict(out=cwl.Int()),
+    docker='python:3'
+)
+def tool_{i}(x):
+    """Scales x by factor {i}."""
+    return dict(out=util.scale(x, FACTORS[{i}]))
+'''
+
+
+def create_project(root, n_tools, n_helper_modules=20):
+    """Writes helper package and tools module, returns module name."""
+
+    os.makedirs(os.path.join(root, 'helpers'))
+    modules = [('__init__.py', ''), ('util.py', HELPER)] + [
+        ('filler_{}.py'.format(i), FILLER) for i in range(n_helper_modules)
+    ]
+    for name, content in modules:
+        with open(os.path.join(root, 'helpers', name), 'w') as fp:
+            fp.write(content)
+    with open(os.path.join(root, 'bench_tools.py'), 'w') as fp:
+        fp.write(HEADER.format(factors=list(range(n_tools))))
+        for i in range(n_tools):
+            fp.write(TOOL.format(i=i))
+    return 'bench_tools'
+
+
+def decorated(module):
+    """Returns all ``to_tool`` wrappers from ``module`` in definition order."""
+
+    return [
+        getattr(module, 'tool_{}'.format(i))
+        for i in range(len(module.FACTORS))
+    ]
+
+
+def generate(functions):
+    start = time.perf_counter()
+    tools = [f() for f in functions]
+    return tools, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tools', type=int, default=300)
+    parser.add_argument('--helper-modules', type=int, default=20)
+    parser.add_argument('--processes', default='1,2,4')
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    root = tempfile.mkdtemp()
+    try:
+        module_name = create_project(
+            root, args.tools, args.helper_modules
+        )
+        os.chdir(root)
+        sys.path.insert(0, root)
+        module = importlib.import_module(module_name)
+        functions = decorated(module)
+
+        _, elapsed = generate(functions)
+        print('to_tool: {} tools in {:.3f}s (no cache)'.format(
+            args.tools, elapsed
+        ))
+
+        print('cpus: {}'.format(os.cpu_count()))
+        base = None
+        for processes in map(int, args.processes.split(',')):
+            start = time.perf_counter()
+            cwl.to_tools(module, processes=processes)
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print('to_tools: {} tools in {:.3f}s ({} processes, {:.2f}x)'
+                  .format(args.tools, elapsed, processes, base / elapsed))
+
+        serialize.set_cache_dir(os.path.join(root, '.cache'))
+        for run in ('cold', 'warm'):
+            _, elapsed = generate(functions)
+            print('to_tool: {} tools in {:.3f}s ({} cache)'.format(
+                args.tools, elapsed, run
+            ))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark suite of the object model. Measures time and peak memory of
+``load``, construction with ``add_step``/``add_connection``, ``to_json``,
+``__str__``, ``calc_hash`` and ``to_tool`` on synthetic documents: a wide
+tool (1000 inputs), a chain workflow, a deep nested workflow and a wide
+scatter workflow.
+
+Every case is run at least ``--repeat`` times and for at least 0.5s (best
+time is reported) and once more traced with ``tracemalloc`` (peak of memory
+allocated by the operation).
+Results are compared with a baseline stored by ``--save``, cases slower or
+using more memory than the tolerance allow are reported and the exit status
+is 1. Baselines are machine specific and not versioned.
+
+Usage::
+
+    python benchmarks/suite.py --save        # store baseline
+    python benchmarks/suite.py [--filter load] [--repeat 3]
+                               [--baseline benchmarks/baseline.json]
+                               [--time-tolerance 0.25]
+                               [--memory-tolerance 0.1]
+"""
+import os
+import gc
+import sys
+import copy
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from sbg import cwl  # noqa: E402
+from bench_build import build  # noqa: E402
+from bench_to_tool import create_project, decorated  # noqa: E402
+from synthetic import (  # noqa: E402
+    tool_dict, workflow_dict, nested_workflow_dict, scatter_workflow_dict
+)
+
+DOCUMENTS = [
+    ('wide_tool', lambda: tool_dict('wide', n_inputs=1000)),
+    ('chain_wf', lambda: workflow_dict(1000)),
+    ('nested_wf', lambda: nested_workflow_dict(depth=3, width=6)),
+    ('scatter_wf', lambda: scatter_workflow_dict(1000)),
+]
+
+
+def cases(root):
+    """
+    Returns list of ``(name, setup, run)``, ``run(setup())`` is measured.
+    """
+
+    result = []
+    for name, generate in DOCUMENTS:
+        doc = generate()
+        loaded = cwl.load(copy.deepcopy(doc))
+        result += [
+            ('load/' + name, lambda doc=doc: copy.deepcopy(doc), cwl.load),
+            ('to_json/' + name, lambda app=loaded: app,
+             lambda app: app.to_json()),
+            ('str/' + name, lambda app=loaded: app, str),
+            # cold hash, every run hashes a newly loaded app
+            ('calc_hash/' + name,
+             lambda doc=doc: cwl.load(copy.deepcopy(doc)),
+             lambda app: app.calc_hash()),
+        ]
+    result.append(('build/add_step', lambda: 500, build))
+
+    module_name = create_project(root, n_tools=20, n_helper_modules=5)
+    sys.path.insert(0, root)
+    functions = decorated(importlib.import_module(module_name))
+
+    def to_tools(functions):
+        cwd = os.getcwd()
+        # local modules are bundled from working directory
+        os.chdir(root)
+        try:
+            return [f().to_json() for f in functions]
+        finally:
+            os.chdir(cwd)
+
+    result.append(('to_tool/20_tools', lambda: functions, to_tools))
+    return result
+
+
+def measure(setup, run, repeat, min_time=0.5):
+    best = None
+    runs = total = 0
+    # short operations are repeated more, their best time is less noisy
+    while runs < repeat or (total < min_time and runs < 100):
+        arg = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        runs += 1
+        total += elapsed
+
+    arg = setup()
+    gc.collect()
+    tracemalloc.start()
+    run(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def change(value, base):
+    return '{:+.0f}%'.format(100 * (value / base - 1)) if base else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filter', default='')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline',
+                        default=os.path.join(HERE, 'baseline.json'))
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+
+    root = tempfile.mkdtemp()
+    results = {}
+    regressions = []
+    try:
+        print('{:<22} {:>9} {:>7} {:>10} {:>7}'.format(
+            'case', 'time(s)', 'change', 'peak(MB)', 'change'
+        ))
+        for name, setup, run in cases(root):
+            if args.filter not in name:
+                continue
+            elapsed, peak = measure(setup, run, args.repeat)
+            results[name] = {'time': elapsed, 'peak': peak}
+            base = baseline.get(name, {})
+            flags = []
+            if base and elapsed > base['time'] * (1 + args.time_tolerance):
+                flags.append('time')
+            if base and peak > base['peak'] * (1 + args.memory_tolerance):
+                flags.append('memory')
+            if flags:
+                regressions.append(name)
+            print('{:<22} {:>9.4f} {:>7} {:>10.2f} {:>7} {}'.format(
+                name, elapsed, change(elapsed, base.get('time')),
+                peak / 2 ** 20, change(peak, base.get('peak')),
+                'REGRESSION ({})'.format(', '.join(flags)) if flags else ''
+            ))
+    finally:
+        shutil.rmtree(root)
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as fp:
+            json.dump(baseline, fp, indent=2, sort_keys=True)
+        print('baseline saved to {}'.format(args.baseline))
+    elif regressions:
+        print('{} regression(s) against {}'.format(
+            len(regressions), args.baseline
+        ))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
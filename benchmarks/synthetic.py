@@ -0,0 +1,147 @@
+"""
+Generators of synthetic CWL documents used by benchmarks.
+
+All generators return plain ``dict`` documents (as if loaded from a file), so
+they can be fed directly into ``cwl.load``.
+"""
+import random
+
+
+def tool_dict(id, n_inputs=3, n_outputs=1):
+    """Returns a ``CommandLineTool`` document with simple string ports."""
+
+    return {
+        'class': 'CommandLineTool',
+        'cwlVersion': 'v1.0',
+        'id': id,
+        'baseCommand': ['echo'],
+        'inputs': [
+            {
+                'id': 'in_{}'.format(i),
+                'type': 'string?',
+                'inputBinding': {'position': i, 'prefix': '--in-{}'.format(i)}
+            }
+            for i in range(n_inputs)
+        ],
+        'outputs': [
+            {
+                'id': 'out_{}'.format(i),
+                'type': 'File?',
+                'outputBinding': {'glob': 'out_{}.txt'.format(i)}
+            }
+            for i in range(n_outputs)
+        ],
+        'requirements': [
+            {'class': 'ShellCommandRequirement'},
+            {'class': 'ResourceRequirement', 'coresMin': 1, 'ramMin': 1000}
+        ]
+    }
+
+
+def workflow_dict(n_steps, n_inputs=3, n_outputs=1):
+    """
+    Returns a ``Workflow`` document with ``n_steps`` chained steps. First
+    input of every step is connected to the first output of the previous one,
+    all other inputs are connected to workflow inputs.
+    """
+
+    steps = []
+    for s in range(n_steps):
+        in_ = []
+        for i in range(n_inputs):
+            if i == 0 and s > 0:
+                source = 'step_{}/out_0'.format(s - 1)
+            else:
+                source = 'in_{}'.format(i)
+            in_.append({'id': 'in_{}'.format(i), 'source': source})
+        steps.append({
+            'id': 'step_{}'.format(s),
+            'in': in_,
+            'out': ['out_{}'.format(o) for o in range(n_outputs)],
+            'run': tool_dict('tool_{}'.format(s), n_inputs, n_outputs)
+        })
+
+    return {
+        'class': 'Workflow',
+        'cwlVersion': 'v1.0',
+        'id': 'synthetic',
+        'inputs': [
+            {'id': 'in_{}'.format(i), 'type': 'string?'}
+            for i in range(n_inputs)
+        ],
+        'outputs': [
+            {
+                'id': 'out',
+                'type': 'File?',
+                'outputSource': 'step_{}/out_0'.format(n_steps - 1)
+            }
+        ],
+        'steps': steps
+    }
+
+
+def nested_workflow_dict(depth=3, width=10, n_inputs=20):
+    """
+    Returns a packed ``Workflow`` document nested ``depth`` levels deep:
+    every workflow has ``width`` steps which run subworkflows, steps of the
+    innermost workflows run tools with ``n_inputs`` inputs.
+    """
+
+    def workflow(prefix, level):
+        if level == depth:
+            return tool_dict(prefix, n_inputs)
+        wf = workflow_dict(width, n_inputs=1)
+        wf['id'] = prefix
+        for s, step in enumerate(wf['steps']):
+            run = workflow('{}_{}'.format(prefix, s), level + 1)
+            step['run'] = run
+            step['in'] = [{'id': 'in_0', 'source': 'in_0'}]
+            step['out'] = ['out_0'] if level + 1 == depth else ['out']
+        wf['outputs'][0]['outputSource'] = 'step_{}/{}'.format(
+            width - 1, 'out_0' if level + 1 == depth else 'out'
+        )
+        return wf
+
+    return workflow('wf', 0)
+
+
+def dag_workflow_dict(n_steps, fan_in=3, seed=0):
+    """
+    Returns a ``Workflow`` document with ``n_steps`` steps, every step reads
+    outputs of up to ``fan_in`` random previous steps.
+    """
+
+    rnd = random.Random(seed)
+    wf = workflow_dict(n_steps, n_inputs=fan_in)
+    for s, step in enumerate(wf['steps'][1:], 1):
+        for i in step['in']:
+            i['source'] = 'step_{}/out_0'.format(rnd.randrange(s))
+    return wf
+
+
+def scatter_workflow_dict(n_steps, n_inputs=3):
+    """
+    Returns a ``Workflow`` document with ``n_steps`` independent steps, all
+    scattered over the same array input. Outputs of all steps are merged into
+    a single workflow output.
+    """
+
+    wf = workflow_dict(n_steps, n_inputs)
+    wf['inputs'].append({'id': 'items', 'type': 'string[]'})
+    wf['requirements'] = [
+        {'class': 'ScatterFeatureRequirement'},
+        {'class': 'MultipleInputFeatureRequirement'}
+    ]
+    for step in wf['steps']:
+        step['in'][0]['source'] = 'items'
+        step['scatter'] = ['in_0']
+        step['scatterMethod'] = 'dotproduct'
+    wf['outputs'] = [{
+        'id': 'out',
+        'type': {'type': 'array', 'items': ['null', 'File']},
+        'outputSource': [
+            '{}/out_0'.format(step['id']) for step in wf['steps']
+        ],
+        'linkMerge': 'merge_flattened'
+    }]
+    return wf
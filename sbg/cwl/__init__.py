@@ -1,6 +1,6 @@
 __all__ = [
     'serialize', 'tests', 'v1_0', 'Primitive', 'is_primitive', 'is_number',
-    'Session', 'Cwl', 'load', 'File', 'tool_from',
+    'Session', 'Cwl', 'load', 'File', 'tool_from', 'to_tools',
     'tool', 'workflow', 'to_tool', 'CommandInput', 'CommandLineTool',
     'CommandOutput', 'EnvVar', 'EnvironmentDef',
     'SchemaDef', 'Software', 'SoftwarePackage',
@@ -17,14 +17,20 @@ __all__ = [
     'OutputBinding', 'App', 'from_bash', 'inherit_metadata',
     'Int', 'Float', 'Bool', 'String', 'Any', 'Array', 'Enum', 'Record', 'File',
     'Dir', 'Union', 'AwsHint', 'SaveLogs', 'MaxNumberOfParallelInstances',
-    'SbgFs'
+    'SbgFs', 'Codec', 'set_json_backend',
+    'DocumentCache', 'DiskCache', 'set_disk_cache', 'write_json',
+    'write_yaml', 'FileText', 'intern_strings', 'profile',
+    'Graph', 'LocalExecutor', 'CommandLine', 'NodePool', 'set_engine',
+    'Scatter'
 ]
 
+import importlib
+
 from sbg.cwl import v1_0
-from sbg.cwl import tests
 from sbg.cwl import serialize
+from sbg.cwl.instrument import profile
 from sbg.cwl.sbg import (
-    Session, AwsHint, SaveLogs, MaxNumberOfParallelInstances, SbgFs
+    AwsHint, SaveLogs, MaxNumberOfParallelInstances, SbgFs
 )
 from sbg.cwl.v1_0 import (
     Cwl, load, Primitive, is_primitive, is_number, tool_from, inherit_metadata,
@@ -36,5 +42,31 @@ from sbg.cwl.v1_0 import (
     ScatterFeature, MultipleInputFeature, StepInputExpression, ExpressionTool,
     InputBinding, InputRecordField, InputRecord, InputEnum, InputArray,
     OutputRecord, OutputRecordField, OutputEnum, OutputArray, OutputBinding,
-    Dir, Record, File, Enum, Array, Any, String, Bool, Float, Int, Union
+    Dir, Record, File, Enum, Array, Any, String, Bool, Float, Int, Union,
+    to_tools, Codec, set_json_backend, DocumentCache, DiskCache,
+    set_disk_cache, write_json, write_yaml, FileText, intern_strings, Graph,
+    LocalExecutor, CommandLine, NodePool, set_engine, Scatter
 )
+
+# imported on first use, ``Session`` depends on sevenbridges-python
+_lazy = {
+    'Session': ('sbg.cwl.sbg.session', 'Session'),
+    'tests': ('sbg.cwl.tests', None)
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        module, attr = _lazy[name]
+        value = importlib.import_module(module)
+        if attr:
+            value = getattr(value, attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
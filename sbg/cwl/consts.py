@@ -6,14 +6,30 @@ EXPRESSION_LIB = os.path.join(
     )
 )
 
+NODE_WORKER = os.path.join(
+    os.path.dirname(__file__), 'resources', 'node_worker.js'
+)
+
 BASH_LIB = os.path.join(
     os.path.join(
         os.path.dirname(__file__), 'resources', 'bash', 'util.sh'
     )
 )
 
+BASH_BUNDLE = 'sbg.lib'
 BASH_BUNDLE_NAME = 'sbg.lib.tar.bz2.b64'
 
+INPUT_JSON = '$(JSON.stringify(inputs, null, 2))'
+
+# workflow inputs holding files shared by many tools
+SHARED_PREFIX = 'sbgcwl_shared_'
+
+# same as INPUT_JSON, but without shared inputs
+INPUT_JSON_SHARED = (
+    "$(JSON.stringify(inputs, function(k, v) {{ "
+    "return k.indexOf('{prefix}') === 0 ? undefined : v; }}, 2))"
+).format(prefix=SHARED_PREFIX)
+
 INHERIT_SINGLE = '''\
 ${{
     {preprocess}
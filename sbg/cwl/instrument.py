@@ -0,0 +1,219 @@
+"""
+Opt-in instrumentation of library hot paths. Instrumented calls (creation of
+CWL objects, ``from_file``, ``resolve``, ``calc_hash``, ``archive``,
+``serialize.Context.add``, ``Session`` methods and platform API requests)
+are counted and timed while profiling is enabled.
+
+Profiling is enabled inside ``profile`` context or for the whole process
+by ``SBG_CWL_PROFILE`` environment variable set to a path, summary is
+written there as JSON at exit (``-`` writes it to stderr).
+
+Times of calls include nested instrumented calls (e.g. creation of an app
+includes creation of its inputs).
+
+Methods called too often to afford even a check of enabled profiles (e.g.
+``CwlMeta.__call__``) are registered by ``instrument_method``, they are
+replaced by timed wrappers only while profiling is enabled.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+from contextlib import contextmanager
+
+PROFILE_ENV = 'SBG_CWL_PROFILE'
+
+# enabled profiles, instrumented calls are recorded into all of them
+_profiles = []
+# (cls, attr, name, original) of methods registered by instrument_method
+_methods = []
+_lock = threading.Lock()
+
+
+class Profile(object):
+    """Counts and times of instrumented calls."""
+
+    def __init__(self):
+        self._stats = {}  # name -> [count, total, max]
+        self._lock = threading.Lock()
+
+    def add(self, name, elapsed):
+        """Records call of ``name`` which took ``elapsed`` seconds."""
+
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = [1, elapsed, elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+
+    def summary(self):
+        """
+        Returns ``dict`` of instrumented calls ordered by total time, values
+        are ``dict`` with ``count`` and ``total``, ``avg`` and ``max`` time
+        in seconds.
+        """
+
+        with self._lock:
+            stats = sorted(
+                self._stats.items(), key=lambda item: -item[1][1]
+            )
+        return {
+            name: {
+                'count': count,
+                'total': total,
+                'avg': total / count,
+                'max': max_
+            }
+            for name, (count, total, max_) in stats
+        }
+
+    def dump(self, path):
+        """
+        Writes summary as JSON into file ``path`` (``-`` means stderr).
+        """
+
+        text = json.dumps(self.summary(), indent=2)
+        if path == '-':
+            sys.stderr.write(text + '\n')
+        else:
+            with open(path, 'w') as fp:
+                fp.write(text)
+
+
+@contextmanager
+def profile(path=None):
+    """
+    Context in which instrumented calls are recorded.
+
+    :param path: if set summary is written into this file (``-`` means
+                 stderr) on exit
+    :return: ``Profile``
+
+    Example:
+
+    .. code-block:: python
+
+       from sbg import cwl
+
+       with cwl.profile() as p:
+           wf = cwl.load('workflow.cwl')
+           wf.calc_hash()
+       print(p.summary())
+    """
+
+    p = Profile()
+    _enable(p)
+    try:
+        yield p
+    finally:
+        _disable(p)
+        if path:
+            p.dump(path)
+
+
+def _enable(p):
+    with _lock:
+        if not _profiles:
+            for cls, attr, name, original in _methods:
+                setattr(cls, attr, _timed(name, original))
+        _profiles.append(p)
+
+
+def _disable(p):
+    with _lock:
+        _profiles.remove(p)
+        if not _profiles:
+            for cls, attr, name, original in _methods:
+                setattr(cls, attr, original)
+
+
+@contextmanager
+def timer(name):
+    """Context which is recorded as a call of ``name``."""
+
+    if not _profiles:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        for p in _profiles:
+            p.add(name, elapsed)
+
+
+def _timed(name, f):
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            for p in _profiles:
+                p.add(name, elapsed)
+
+    return wrapper
+
+
+def instrumented(name):
+    """
+    .. decorator:: instrumented
+
+    Records calls of decorated function as calls of ``name``.
+    """
+
+    def deco(f):
+        timed = _timed(name, f)
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if not _profiles:
+                return f(*args, **kwargs)
+            return timed(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+def instrument_method(cls, attr, name):
+    """
+    Records calls of method ``attr`` of ``cls`` as calls of ``name``, unlike
+    ``instrumented`` the method is not wrapped while profiling is disabled.
+
+    :param cls: class
+    :param attr: method name
+    :param name: name of recorded calls
+    """
+
+    with _lock:
+        original = cls.__dict__[attr]
+        _methods.append((cls, attr, name, original))
+        if _profiles:
+            setattr(cls, attr, _timed(name, original))
+
+
+def _dump_at_exit(pid, profile, path):
+    # forked processes inherit exit handlers, only the profiled one dumps
+    if os.getpid() == pid:
+        profile.dump(path)
+
+
+def _enable_from_env():
+    path = os.environ.get(PROFILE_ENV)
+    if path:
+        p = Profile()
+        _enable(p)
+        atexit.register(_dump_at_exit, os.getpid(), p, path)
+
+
+_enable_from_env()
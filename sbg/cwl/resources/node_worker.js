@@ -0,0 +1,176 @@
+// Evaluates CWL expressions for sbg.cwl.v1_0.expression.NodePool.
+//
+// Every line of stdin is a JSON batch
+//   {"lib": <key>, "code": [<expressionLib>], "timeout": <ms>,
+//    "items": [{"code": <expression>, "context": {"inputs": ...}}, ...]}
+// where "code" is sent only with the first batch of the library. It is
+// answered by one line
+//   {"error": <library or batch error or null>,
+//    "results": [{"value": <result>} or {"error": <message>}, ...]}
+'use strict';
+
+var vm = require('vm');
+var readline = require('readline');
+var Console = require('console').Console;
+
+// maximal number of compiled expressions kept per library
+var MAX_FUNCTIONS = 10000;
+
+// runs a batch inside of a library context, the timeout of the batch is
+// checked once (a watchdog per expression is expensive)
+var RUN = new vm.Script(
+    '(function(global, items, functions, reset) {\n' +
+    '    return items.map(function(item, i) {\n' +
+    '        try {\n' +
+    '            for (var key in item.context) {\n' +
+    '                global[key] = item.context[key];\n' +
+    '            }\n' +
+    '            var value = functions[i]();\n' +
+    '            var json = JSON.stringify(\n' +
+    '                value === undefined ? null : value\n' +
+    '            );\n' +
+    '            return \'{"value":\' + (json === undefined ? \'null\' : ' +
+    'json) + \'}\';\n' +
+    '        } catch (e) {\n' +
+    '            return JSON.stringify({error: String(e)});\n' +
+    '        } finally {\n' +
+    '            reset(global, item.context);\n' +
+    '        }\n' +
+    '    });\n' +
+    '})(this, $items, $functions, $reset)'
+);
+// resets globals after a batch interrupted by the timeout
+var RESET = new vm.Script('$reset(this, {})');
+// returns globals of a context, seen from inside they include the builtins
+var GLOBALS = new vm.Script(
+    '(function(global) {\n' +
+    '    var globals = new Map();\n' +
+    '    Object.getOwnPropertyNames(global).forEach(function(name) {\n' +
+    '        globals.set(name, global[name]);\n' +
+    '    });\n' +
+    '    return globals;\n' +
+    '})(this)'
+);
+
+// library key -> {context: vm context, functions: Map of expressions}
+var libraries = {};
+// globals set by the worker itself
+var INTERNAL = ['$items', '$functions', '$reset'];
+// expressions may log, stdout belongs to the protocol
+var log = new Console(process.stderr, process.stderr);
+
+function compile(library, code) {
+    var f = library.functions.get(code);
+    if (f === undefined) {
+        try {
+            f = new vm.Script('(function() { return ' + code + '\n; })')
+                .runInContext(library.context);
+        } catch (e) {
+            f = function() { throw e; };
+        }
+        if (library.functions.size >= MAX_FUNCTIONS) {
+            library.functions.clear();
+        }
+        library.functions.set(code, f);
+    }
+    return f;
+}
+
+// Returns function resetting globals of a library context after an item,
+// so neither the item's context nor globals assigned by its expression are
+// seen by the next one. Writes to the global object end up in ``sandbox``
+// too, which is cheap to inspect, reading and deleting globals of a context
+// is not.
+function resetter(sandbox) {
+    var builtins = GLOBALS.runInContext(sandbox);
+    // globals of the library -> their values
+    var values = new Map();
+    Object.keys(sandbox).forEach(function(name) {
+        values.set(name, sandbox[name]);
+    });
+    // names expected in the sandbox, context names are reset to undefined
+    // instead of deleted
+    var known = new Set(values.keys());
+    INTERNAL.forEach(function(name) {
+        known.add(name);
+    });
+    var contextNames = [];
+    return function(global, context) {
+        var name;
+        for (name in context) {
+            if (!known.has(name)) {
+                known.add(name);
+                contextNames.push(name);
+            }
+        }
+        for (var i = 0; i < contextNames.length; i++) {
+            global[contextNames[i]] = undefined;
+        }
+        values.forEach(function(value, name) {
+            if (!Object.is(sandbox[name], value)) {
+                global[name] = value;
+            }
+        });
+        var names = Object.keys(sandbox);
+        if (names.length !== known.size) {
+            for (i = 0; i < names.length; i++) {
+                name = names[i];
+                if (known.has(name)) {
+                    continue;
+                }
+                if (builtins.has(name)) {
+                    // an overwritten builtin is restored and kept
+                    global[name] = builtins.get(name);
+                    values.set(name, builtins.get(name));
+                    known.add(name);
+                } else {
+                    delete global[name];
+                }
+            }
+        }
+    };
+}
+
+function run(batch) {
+    var library = libraries[batch.lib];
+    if (library === undefined) {
+        var sandbox = {console: log};
+        var context = vm.createContext(sandbox);
+        try {
+            vm.runInContext((batch.code || []).join('\n'), context);
+        } catch (e) {
+            return JSON.stringify({
+                error: 'Expression library failed: ' + e, results: []
+            });
+        }
+        context.$reset = resetter(sandbox);
+        library = libraries[batch.lib] = {
+            context: context, functions: new Map()
+        };
+    }
+    library.context.$items = batch.items;
+    library.context.$functions = batch.items.map(function(item) {
+        return compile(library, item.code);
+    });
+    var results;
+    try {
+        results = RUN.runInContext(library.context, {timeout: batch.timeout});
+    } catch (e) {
+        // interrupted by the timeout, globals of the item are left behind
+        RESET.runInContext(library.context);
+        return JSON.stringify({
+            error: 'Expressions failed: ' + e, results: []
+        });
+    } finally {
+        library.context.$items = library.context.$functions = undefined;
+    }
+    return '{"error":null,"results":[' + results.join(',') + ']}';
+}
+
+readline.createInterface({input: process.stdin, terminal: false})
+    .on('line', function(line) {
+        process.stdout.write(run(JSON.parse(line)) + '\n');
+    })
+    .on('close', function() {
+        process.exit(0);
+    });
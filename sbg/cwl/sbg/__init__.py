@@ -2,7 +2,27 @@ __all__ = [
     'Session', 'SbgFs', 'MaxNumberOfParallelInstances', 'SaveLogs', 'AwsHint'
 ]
 
-from sbg.cwl.sbg.session import Session
+import importlib
+
 from sbg.cwl.sbg.hints import (
     SbgFs, MaxNumberOfParallelInstances, SaveLogs, AwsHint
 )
+
+# imported on first use, it depends on sevenbridges-python
+_lazy = {
+    'Session': 'sbg.cwl.sbg.session'
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        value = getattr(importlib.import_module(_lazy[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
@@ -3,7 +3,9 @@ from sevenbridges.api import Api
 from sevenbridges.config import Config
 from sevenbridges.models.project import Project
 from sbg.cwl.sbg.hints.hint import Hint
+from sbg.cwl.instrument import instrumented, timer
 from sbg.cwl.v1_0.app import App as CwlApp
+from sbg.cwl.v1_0.util import legacy_digest
 from sevenbridges.http.error_handlers import (
     general_error_sleeper, maintenance_sleeper, rate_limit_sleeper
 )
@@ -79,6 +81,7 @@ class Session(object):
     # endregion
 
     # region methods
+    @instrumented('Session.create_app')
     def create_app(self, app, project):
         """
         Install/create revision of app. New revision is created only if there
@@ -103,33 +106,41 @@ class Session(object):
         hash_key = 'sbg:hash'
 
         if not isinstance(project, Project):
-            project = self.api.projects.get("{}".format(project))
+            with timer('Session.api.projects.get'):
+                project = self.api.projects.get("{}".format(project))
 
         app_id = '{project}/{id}'.format(
             project=project.id,
             id=app.id
         )
         app_hash = app.calc_hash()
-        result = self.api.apps.query(id=app_id)
+        with timer('Session.api.apps.query'):
+            result = self.api.apps.query(id=app_id)
         if len(result) == 0:  # install app
             app[hash_key] = app_hash
-            app = self.api.apps.install_app(id=app_id, raw=app)
+            with timer('Session.api.apps.install_app'):
+                app = self.api.apps.install_app(id=app_id, raw=app)
         else:  # create new revision if there are any changes
             sbg_app = result[0]
             sbg_app_hash = sbg_app.raw.get(hash_key)
 
-            # hash values are equal => no changes
-            if sbg_app_hash and app_hash == sbg_app_hash:
+            # hash values are equal => no changes, apps installed by older
+            # versions store hash of the whole JSON document
+            if sbg_app_hash and (
+                    app_hash == sbg_app_hash or
+                    legacy_digest(app) == sbg_app_hash):
                 app = sbg_app
             else:  # changes
                 app[hash_key] = app_hash
-                app = self.api.apps.create_revision(
-                    id=app_id,
-                    raw=app,
-                    revision=result[0].revision + 1
-                )
+                with timer('Session.api.apps.create_revision'):
+                    app = self.api.apps.create_revision(
+                        id=app_id,
+                        raw=app,
+                        revision=result[0].revision + 1
+                    )
         return app
 
+    @instrumented('Session.draft')
     def draft(self, project, app, inputs=None, hints=None):
         """
         Creates draft task.
@@ -170,16 +181,18 @@ class Session(object):
             )
 
         if not isinstance(project, Project):
-            project = self.api.projects.get("{}".format(project))
+            with timer('Session.api.projects.get'):
+                project = self.api.projects.get("{}".format(project))
 
         task_name = '{} - {}'.format(
             app.label if app.label else app.id,
             datetime.now().strftime('%Y.%m.%dT%H:%M:%S')
         )
         sbg_app = self.create_app(app, project)
-        task = self.api.tasks.create(
-            task_name, project, sbg_app, inputs=inputs
-        )
+        with timer('Session.api.tasks.create'):
+            task = self.api.tasks.create(
+                task_name, project, sbg_app, inputs=inputs
+            )
         return task
 
     @staticmethod
@@ -201,6 +214,7 @@ class Session(object):
                     raise Exception('Expected Hint, got {}', type(h))
         return app
 
+    @instrumented('Session.run')
     def run(self, project, app, inputs=None, hints=None):
         """
         Runs ``app`` on a platform.
@@ -227,5 +241,6 @@ class Session(object):
            )
         """
         task = self.draft(project, app, inputs=inputs, hints=hints)
-        return task.run()
+        with timer('Session.api.tasks.run'):
+            return task.run()
     # endregion
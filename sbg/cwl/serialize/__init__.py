@@ -1,4 +1,25 @@
-__all__ = ['Context', 'Function']
+__all__ = ['Context', 'Function', 'ArtifactCache', 'set_cache_dir']
 
-from sbg.cwl.serialize.context import Context
-from sbg.cwl.serialize.inspector import Function
+import importlib
+
+from sbg.cwl.serialize.cache import ArtifactCache, set_cache_dir
+
+# imported on first use, they depend on dill and serializer plugins
+_lazy = {
+    'Context': 'sbg.cwl.serialize.context',
+    'Function': 'sbg.cwl.serialize.inspector'
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        value = getattr(importlib.import_module(_lazy[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
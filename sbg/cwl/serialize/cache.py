@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = 'SBG_CWL_CACHE_DIR'
+
+# bump when format of cached entries or bundles changes
+CACHE_VERSION = '1'
+
+_cache_dir = None
+
+
+def set_cache_dir(path):
+    """
+    Enables on-disk cache of ``to_tool`` artifacts in directory ``path``.
+    Cache can also be enabled with ``SBG_CWL_CACHE_DIR`` environment variable.
+
+    :param path: cache directory, ``None`` disables cache
+    """
+    global _cache_dir
+    _cache_dir = path
+
+
+def get_cache():
+    """
+    Returns active ``ArtifactCache`` or ``None`` if cache is not enabled.
+    """
+    path = _cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if path:
+        return ArtifactCache(path)
+
+
+def file_stamps(paths):
+    """
+    Returns sorted ``(path, size, mtime)`` stamps of all files in ``paths``
+    (directories are walked recursively, ``__pycache__`` is skipped).
+    """
+    stamps = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if d != '__pycache__']
+                for f in files:
+                    stamps.append(os.path.join(root, f))
+        else:
+            stamps.append(path)
+
+    def stamp(path):
+        st = os.stat(path)
+        return path, st.st_size, st.st_mtime_ns
+
+    return [stamp(p) for p in sorted(stamps)]
+
+
+class ArtifactCache(object):
+    """
+    Content addressed on-disk cache of serialized artifacts (eg. ``Dirent``
+    entries created by ``to_tool``).
+
+    Entries are stored as JSON files named by their key.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def key(*parts):
+        """
+        Returns cache key for ``parts`` (anything serializable to JSON).
+        """
+        sha = hashlib.sha256()
+        sha.update(json.dumps([
+            CACHE_VERSION,
+            '{}.{}'.format(*sys.version_info[:2]),
+            parts
+        ]).encode('utf-8'))
+        return sha.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.path, key[:2], '{}.json'.format(key))
+
+    def get(self, key):
+        """
+        Returns cached value for ``key`` or ``None`` if there is no entry.
+        """
+        try:
+            with open(self._path(key), 'r') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, value):
+        """
+        Stores ``value`` under ``key``. Write is atomic, concurrent builds can
+        share the same cache directory. Entries which cannot be written (eg.
+        read-only or full disk) are skipped with a warning.
+        """
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        except OSError as e:
+            logger.warning('Cache entry %s not stored: %s', path, e)
+            return
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(value, fp)
+            os.replace(tmp, path)
+        except BaseException as e:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            if not isinstance(e, OSError):
+                raise
+            logger.warning('Cache entry %s not stored: %s', path, e)
@@ -9,7 +9,7 @@ import importlib
 
 # First we need to untar all modules to be able to import them
 {b64untar}
-b64untar('{archive_name}.tar.bz2.b64')
+b64untar('{bundle_name}')
 import sbgcwl_util
 
 
@@ -3,10 +3,12 @@ import ast
 import dill
 import types
 import base64
+import hashlib
 import inspect
 import textwrap
 import importlib
 from operator import itemgetter
+from sbg.cwl.instrument import instrumented
 from sbg.cwl.serialize.plugins import plugins
 from sbg.cwl.serialize.inspector import Function
 
@@ -20,6 +22,8 @@ class Context(object):
         self.variables = {}
         self.modules = set()
         self.working_dir = os.getcwd()
+        # name -> pickled variable
+        self._dumps = {}
 
     def _import(self, key, obj):
         if isinstance(obj, types.ModuleType):
@@ -38,6 +42,7 @@ class Context(object):
                     self.modules.add(module_file)
         self.imports[key] = obj
 
+    @instrumented('serialize.Context.add')
     def add(self, key, obj):
         if isinstance(obj, types.ModuleType):
             self._import(key, obj)
@@ -97,17 +102,42 @@ class Context(object):
             create_import(alias, obj) for alias, obj in self.imports.items()
         ], key=lambda i: ('0' if i[0] == 'i' else '1') + i)
 
-    def create_variables(self):
-        def encode_variable(name, variable):
-            variable = base64.b64encode(dill.dumps(variable))
-            return '''{} = sbgcwl_util.loads({})\n\n'''.format(name, variable)
+    def _dump(self, name):
+        if name not in self._dumps:
+            self._dumps[name] = dill.dumps(self.variables[name])
+        return self._dumps[name]
+
+    def fingerprint(self):
+        """
+        Returns JSON serializable fingerprint of collected dependencies
+        (function sources, names of classes and imports, digests of pickled
+        variables). Script built from contexts with the same fingerprint is
+        the same as long as source files of the module are not changed.
+        """
+
+        def name(obj):
+            return [getattr(obj, '__module__', None), obj.__name__]
 
         return [
-            encode_variable(name, var)
-            for name, var in
-            sorted(self.variables.items(), key=itemgetter(0))
+            sorted(
+                [k, f.func_source, list(f.decorators)]
+                for k, f in self.functions.items()
+            ),
+            sorted([k] + name(c) for k, c in self.classes.items()),
+            sorted([k] + name(o) for k, o in self.imports.items()),
+            sorted(
+                [k, hashlib.sha256(self._dump(k)).hexdigest()]
+                for k in self.variables
+            )
         ]
 
+    def create_variables(self):
+        def encode_variable(name):
+            variable = base64.b64encode(self._dump(name))
+            return '''{} = sbgcwl_util.loads({})\n\n'''.format(name, variable)
+
+        return [encode_variable(name) for name in sorted(self.variables)]
+
     @staticmethod
     def _create_function(f):
         source = inspect.getsource(f.func)
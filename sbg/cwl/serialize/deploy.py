@@ -1,7 +1,6 @@
 import io
 import sys
 import json
-import dill
 import base64
 import tarfile
 import importlib
@@ -9,16 +8,26 @@ import importlib
 
 def loads(variable):
     """Load a base64 encoded dill serialized variable"""
+    import dill  # only needed by tools with serialized variables
     return dill.loads(base64.b64decode(variable))
 
 
 def b64untar(filename):
+    # codec is recorded in bundle name: <name>.tar[.<codec>].b64
+    codec = filename[:-len('.b64')].rsplit('.tar', 1)[-1].lstrip('.')
     with io.open(filename, 'rb') as f:
-        with io.BytesIO() as stream:
-            stream.write(base64.b64decode(f.read()))
-            stream.seek(0)
-            with tarfile.open(fileobj=stream, mode='r:bz2') as tar:
-                tar.extractall()
+        data = base64.b64decode(f.read())
+    if codec == 'zst':
+        try:
+            from compression import zstd
+            data = zstd.decompress(data)
+        except ImportError:
+            import zstandard
+            data = zstandard.ZstdDecompressor().decompress(data)
+        codec = ''
+    with io.BytesIO(data) as stream:
+        with tarfile.open(fileobj=stream, mode='r:' + codec) as tar:
+            tar.extractall()
     if sys.version_info[0] == 3:
         importlib.invalidate_caches()
 
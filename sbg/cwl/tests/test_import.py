@@ -0,0 +1,27 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+))))
+
+
+def test_import_is_lazy():
+    code = (
+        'import sys, sbg.cwl; '
+        'print(sorted(m for m in ("sevenbridges", "dill", "sbg.cwl.tests", '
+        '"sbg.cwl.sbg.session") if m in sys.modules))'
+    )
+    out = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+    assert out.decode().strip() == '[]'
+
+
+def test_lazy_attributes():
+    from sbg import cwl
+    from sbg.cwl.sbg.session import Session
+    from sbg.cwl.serialize.context import Context
+    assert cwl.Session is Session
+    assert cwl.serialize.Context is Context
+    assert cwl.tests.__name__ == 'sbg.cwl.tests'
+    assert 'Session' in dir(cwl)
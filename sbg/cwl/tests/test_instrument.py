@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import pytest
+import subprocess
+from sbg import cwl
+from sbg.cwl import instrument
+from sbg.cwl.v1_0.base import CwlMeta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+))))
+
+
+def test_profile():
+    with cwl.profile() as p:
+        with cwl.profile() as inner:
+            t = cwl.CommandLineTool(id='tool')
+        t.calc_hash()
+        t.calc_hash()
+    summary = p.summary()
+    assert set(summary) == {'CwlMeta.__call__', 'Cwl.calc_hash'}
+    stats = summary['Cwl.calc_hash']
+    assert stats['count'] == 2
+    assert stats['avg'] == stats['total'] / 2
+    assert 0 <= stats['max'] <= stats['total']
+    assert set(inner.summary()) == {'CwlMeta.__call__'}
+
+    # disabled outside of profile
+    cwl.CommandLineTool(id='tool')
+    assert summary['CwlMeta.__call__'] == p.summary()['CwlMeta.__call__']
+    assert not instrument._profiles
+    assert not hasattr(CwlMeta.__dict__['__call__'], '__wrapped__')
+
+
+def test_profile_dump(tmpdir):
+    path = str(tmpdir.join('profile.json'))
+    with cwl.profile(path):
+        with instrument.timer('step'):
+            pass
+    with open(path) as fp:
+        assert json.load(fp)['step']['count'] == 1
+
+
+def test_profile_env(tmpdir):
+    path = str(tmpdir.join('profile.json'))
+    code = 'from sbg import cwl; cwl.load({"class": "Workflow", "id": "wf"})'
+    env = dict(os.environ, **{instrument.PROFILE_ENV: path})
+    subprocess.check_call([sys.executable, '-c', code], cwd=ROOT, env=env)
+    with open(path) as fp:
+        summary = json.load(fp)
+    assert summary['CwlMeta.__call__']['count'] >= 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='os.fork is missing')
+def test_profile_env_fork():
+    code = (
+        'import os, sys\n'
+        'from sbg import cwl\n'
+        'cwl.load({"class": "Workflow", "id": "wf"})\n'
+        'pid = os.fork()\n'
+        'if pid == 0:\n'
+        '    sys.exit(0)\n'
+        'os.waitpid(pid, 0)\n'
+    )
+    env = dict(os.environ, **{instrument.PROFILE_ENV: '-'})
+    out = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env=env,
+        stderr=subprocess.PIPE, check=True
+    )
+    assert out.stderr.decode().count('"CwlMeta.__call__"') == 1
@@ -0,0 +1,124 @@
+import shutil
+import pytest
+from sbg import cwl
+
+node = pytest.mark.skipif(
+    not shutil.which('node'), reason='node is not installed'
+)
+
+
+def tool(inputs, command='cmd', **kwargs):
+    return cwl.load(dict(
+        {'class': 'CommandLineTool', 'id': 'tool', 'baseCommand': command,
+         'inputs': inputs, 'outputs': []}, **kwargs
+    ))
+
+
+def test_arrays():
+    # examples of the CWL user guide
+    t = tool([
+        {'id': 'filesA', 'type': 'string[]',
+         'inputBinding': {'prefix': '-A', 'position': 1}},
+        {'id': 'filesB', 'inputBinding': {'position': 2},
+         'type': {'type': 'array', 'items': 'string',
+                  'inputBinding': {'prefix': '-B=', 'separate': False}}},
+        {'id': 'filesC', 'type': 'string[]',
+         'inputBinding': {'prefix': '-C=', 'itemSeparator': ',',
+                          'separate': False, 'position': 4}},
+        {'id': 'filesD', 'type': 'string[]?',
+         'inputBinding': {'prefix': '-D', 'position': 5}},
+    ], command='echo')
+    words = ['one', 'two', 'three']
+    assert t.command_line(
+        {'filesA': words, 'filesB': ['one', 'two'], 'filesC': words,
+         'filesD': []}
+    ) == ['echo', '-A', 'one', 'two', 'three', '-B=one', '-B=two',
+          '-C=one,two,three']
+    # empty arrays add nothing, not even their prefix
+    assert t.command_line(
+        {'filesA': [], 'filesB': [], 'filesC': [], 'filesD': []}
+    ) == ['echo']
+
+
+def test_empty_array_item_separator():
+    t = tool([
+        {'id': 'a', 'type': 'string[]',
+         'inputBinding': {'prefix': '-a', 'itemSeparator': ','}},
+        {'id': 'b', 'type': 'string[]',
+         'inputBinding': {'prefix': '-b', 'valueFrom': '$(self)'}},
+    ], command='echo')
+    assert t.command_line({'a': [], 'b': []}) == ['echo']
+    assert t.command_line({'a': ['x'], 'b': []}) == ['echo', '-a', 'x']
+
+
+def test_sorting():
+    t = tool([
+        {'id': 'b', 'type': 'File', 'inputBinding': {}},
+        {'id': 'a', 'type': 'int', 'default': 3,
+         'inputBinding': {'prefix': '-n'}},
+        {'id': 'flag', 'type': 'boolean?',
+         'inputBinding': {'prefix': '-f', 'position': -1}},
+        {'id': 'unbound', 'type': 'string'},
+        {'id': 'r', 'inputBinding': {'prefix': '--record', 'position': 1},
+         'type': {'type': 'record', 'fields': [
+             {'name': 'y', 'type': 'string', 'inputBinding': {}},
+             {'name': 'x', 'type': 'int',
+              'inputBinding': {'prefix': '-x', 'separate': False}},
+             {'name': 'z', 'type': 'string'}
+         ]}}
+    ], command=['cmd', 'sub'], arguments=[
+        'last', {'valueFrom': 'first', 'position': -2}
+    ])
+    f = {'class': 'File', 'path': '/data/b.txt'}
+    assert t.command_line(
+        {'b': f, 'flag': True, 'unbound': 'u',
+         'r': {'x': 1, 'y': 'why', 'z': 'z'}}
+    ) == ['cmd', 'sub', 'first', '-f', 'last', '-n', '3', '/data/b.txt',
+          '--record', '-x1', 'why']
+    assert t.command_line({'b': f, 'flag': False, 'a': 0}) == [
+        'cmd', 'sub', 'first', 'last', '-n', '0', '/data/b.txt'
+    ]
+
+
+def test_shell_quote():
+    t = tool([
+        {'id': 'pattern', 'type': 'string', 'inputBinding': {'position': 1}},
+    ], command='grep', arguments=[
+        {'valueFrom': '| wc -l', 'position': 2, 'shellQuote': False}
+    ], requirements=[{'class': 'ShellCommandRequirement'}])
+    assert t.command_line({'pattern': 'a b'}) == [
+        '/bin/sh', '-c', "grep 'a b' | wc -l"
+    ]
+    line = cwl.CommandLine(t, shell=False)
+    assert line.render({'pattern': 'a b'}) == ['grep', 'a b', '| wc -l']
+    assert line.arguments({'pattern': 'a'})[1:] == [
+        ('a', True), ('| wc -l', False)
+    ]
+
+
+def test_render_all():
+    line = cwl.CommandLine(tool([
+        {'id': 'n', 'type': ['null', 'int', 'string'],
+         'inputBinding': {'prefix': '-n'}}
+    ]))
+    jobs = ({'n': n} for n in [1, 'x', None])
+    assert list(line.render_all(jobs)) == [
+        ['cmd', '-n', '1'], ['cmd', '-n', 'x'], ['cmd']
+    ]
+
+
+@node
+def test_expressions():
+    t = tool([
+        {'id': 'n', 'type': 'int',
+         'inputBinding': {'valueFrom': '$(self * 2)', 'prefix': '-n'}},
+        {'id': 'words', 'type': 'string[]', 'inputBinding': {
+            'valueFrom': '$(self.map(upper))', 'position': 1
+        }}
+    ], arguments=['$(runtime.cores)'], requirements=[{
+        'class': 'InlineJavascriptRequirement',
+        'expressionLib': ['function upper(s) { return s.toUpperCase(); }']
+    }])
+    assert t.command_line(
+        {'n': 2, 'words': ['a', 'b']}, runtime={'cores': 4}
+    ) == ['cmd', '4', '-n', '4', 'A', 'B']
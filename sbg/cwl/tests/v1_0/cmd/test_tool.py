@@ -6,6 +6,8 @@ import tempfile
 from sbg import cwl
 import unittest.mock as mock
 from sbg.cwl.consts import BASH_LIB
+from sbg.cwl.serialize import deploy
+from sbg.cwl.v1_0.util import archive
 from sbg.cwl.v1_0.hints import TypeFactory
 from sbg.cwl.v1_0.requirement import (
     Docker, InitialWorkDir, InlineJavascript, EnvVar, ShellCommand
@@ -28,6 +30,42 @@ def test_unarchive_bundle(tool, bundle, postprocess, encoded):
     assert tool.arguments[0] == arg
 
 
+@pytest.mark.parametrize('codec', [
+    cwl.Codec.NONE, cwl.Codec.GZIP, cwl.Codec.BZIP2, cwl.Codec.XZ,
+    cwl.Codec.ZSTD
+])
+def test_unarchive_bundle_codec(tool, codec):
+    bundle = cwl.Codec.bundle_name('my_bundle', codec)
+    assert cwl.Codec.from_name(bundle) == codec
+    tool.unarchive_bundle(bundle, encoded=True)
+    assert cwl.Codec.UNTAR[codec] in tool.arguments[0].value_from
+
+
+def test_codec_from_name():
+    assert cwl.Codec.from_name('sbg.lib') == cwl.Codec.BZIP2
+    assert cwl.Codec.from_name('sbg.lib', cwl.Codec.XZ) == cwl.Codec.XZ
+    assert cwl.Codec.from_name('a.tar.b64') == cwl.Codec.NONE
+    assert cwl.Codec.from_name('a.tar.gz') == cwl.Codec.GZIP
+    with pytest.raises(ValueError):
+        cwl.Codec.bundle_name('a', 'rar')
+
+
+@pytest.mark.parametrize('codec', [
+    cwl.Codec.NONE, cwl.Codec.GZIP, cwl.Codec.BZIP2, cwl.Codec.XZ
+])
+def test_archive_b64untar(codec, tmpdir):
+    src = tmpdir.mkdir('src').join('data.txt')
+    src.write('payload')
+    bundle = tmpdir.mkdir('run').join(cwl.Codec.bundle_name('b', codec))
+    bundle.write(archive(
+        [str(src)], encode=True, arcnames={str(src): 'data.txt'},
+        codec=codec
+    ))
+    with tmpdir.join('run').as_cwd():
+        deploy.b64untar(bundle.basename)
+    assert tmpdir.join('run', 'data.txt').read() == 'payload'
+
+
 def make_f(t, r=inspect._empty):
     """Argument `t` is type hint for argument `x` of function `f`."""
 
@@ -120,6 +158,15 @@ def test_create_file_from(tool):
     assert tool.find_requirement(iwd).listing == listing
 
 
+def test_create_file_from_codec(tool):
+    f = make_f(int)
+    tool._create_file_from(f, 'foo', codec=cwl.Codec.XZ)
+    listing = tool.find_requirement('InitialWorkDirRequirement').listing
+    names = [d.entryname for d in listing]
+    assert 'foo.tar.xz.b64' in names
+    assert 'foo.tar.bz2.b64' not in names
+
+
 @pytest.mark.parametrize('stdout', [None, '__stdout__'])
 @pytest.mark.parametrize('name', [None, 'my_script.sh'])
 @pytest.mark.parametrize('docker', ['ubuntu1604'])
@@ -240,7 +287,7 @@ def test_add_locals(archive_mock, tool, name, postprocess, hints):
 
         archive_mock.assert_called_with(
             list(map(os.path.abspath, locals)),
-            encode=True
+            encode=True, codec=cwl.Codec.BZIP2
         )
         assert cwl.SaveLogs(name) in tool.hints
         assert cwl.SaveLogs(os.path.basename(tmp_file.name)) in tool.hints
@@ -1,6 +1,7 @@
 import pytest
 from sbg import cwl
 import unittest.mock as mock
+from sbg.cwl.v1_0.util import legacy_digest
 from sbg.cwl.sbg.session import Session, Project, Api
 from sevenbridges.http.error_handlers import (
     general_error_sleeper, maintenance_sleeper, rate_limit_sleeper
@@ -84,6 +85,18 @@ def test_create_app_no_changes(tool, project):
         assert session.api.apps.create_revision.call_count == 0
 
 
+def test_create_app_legacy_hash(tool):
+    with mock.patch('sbg.cwl.sbg.session.Api'):
+        session = Session(token='t', endpoint='e')
+
+        app_mock = mock.MagicMock()
+        app_mock.raw = {'sbg:hash': legacy_digest(tool)}
+        session.api.apps.query.return_value = [app_mock]
+
+        assert session.create_app(tool, 'user/project') == app_mock
+        assert session.api.apps.create_revision.call_count == 0
+
+
 @pytest.mark.parametrize('project', [
     'user/project', mock.MagicMock(id='user/project', spec=Project)
 ])
@@ -1,4 +1,9 @@
+import io
+import copy
+import json
+import pickle
 import pytest
+import yaml
 import base64
 
 from sbg.cwl.v1_0.schema import set_required, OutputArray, InputArray
@@ -292,3 +297,142 @@ def test_add_output_arr(cls, hint, required):
     t = cwl.Array(hint(), required=required)
     o = obj.add_output(t)
     assert o.type == TypeFactory.create(t, False)
+
+
+@pytest.mark.parametrize('cls', [CommandLineTool, Workflow])
+def test_get_port_after_rename(cls):
+    obj = cls()
+    i = obj.add_input(cwl.String(), id='in')
+    o = obj.add_output(cwl.String(), id='out')
+    assert obj.get_port('in') is i
+
+    i.id = 'renamed_in'
+    o.id = 'renamed_out'
+    assert obj.get_input('in') is None
+    assert obj.get_output('out') is None
+    assert obj.get_port('renamed_in') is i
+    assert obj.get_port('renamed_out') is o
+
+
+@pytest.mark.parametrize('cls', [CommandLineTool, Workflow])
+def test_get_port_after_item_rename(cls):
+    obj = cls()
+    other = cls()
+    i = obj.add_input(cwl.String(), id='a')
+    obj.add_input(cwl.String(), id='x')
+    other.add_input(cwl.String(), id='x')
+    assert obj.get_input('a') is i
+    assert other.get_input('x') is not None
+    index = other.inputs._index
+
+    i['id'] = 'b'
+    assert obj.get_input('a') is None
+    assert obj.get_input('b') is i
+    i.update(id='c')
+    assert obj.get_input('c') is i
+    i.pop('id')
+    assert obj.get_input('c') is None
+    # indexes of other lists are kept
+    assert other.inputs._index is index
+
+    obj.inputs.append({'id': 'plain'})
+    plain = obj.inputs[-1]
+    plain['id'] = 'renamed'
+    assert obj.get_input('plain') is None
+    assert obj.get_input('renamed') is plain
+
+
+@pytest.mark.parametrize('cls', [CommandLineTool, Workflow])
+def test_get_port_after_list_mutation(cls):
+    obj = cls()
+    first = obj.add_input(cwl.String(), id='x')
+    assert obj.get_input('x') is first
+
+    obj.inputs.remove(first)
+    assert obj.get_input('x') is None
+
+    second = obj.add_input(cwl.Int(), id='x')
+    obj.inputs.insert(0, first)
+    assert obj.get_input('x') is first
+
+    del obj.inputs[0]
+    assert obj.get_input('x') is second
+
+    obj.inputs = [dict(id='y', type='string')]
+    assert obj.get_input('y') == obj.inputs[0]
+    assert obj.get_input('x') is None
+
+
+@pytest.mark.parametrize('cls', [CommandLineTool, Workflow])
+def test_indexed_ports_serialization(cls):
+    obj = cls()
+    obj.add_input(cwl.String(), id='in')
+    obj.add_output(cwl.String(), id='out')
+    obj.get_port('in')
+
+    assert obj.to_json() == json.dumps(json.loads(obj.to_json()), indent=2)
+    assert copy.deepcopy(obj) == obj
+    assert pickle.loads(pickle.dumps(obj)).get_port('out') == obj.outputs[0]
+
+
+@pytest.mark.parametrize('doc', [
+    'plain doc', 'multi\nline', 'multi\n  indented', 'tab\there', 'é ü',
+    '😀', '', 'yes', '1e3', 'x ' * 100, None
+])
+@pytest.mark.parametrize('value', [1, 1.5, 1e20, float('inf'), True, 'k'])
+def test_str_same_as_json_roundtrip(doc, value):
+    t = CommandLineTool(id='t', doc=doc)
+    t.add_input(cwl.String(), id='x')
+    t['sbg:value'] = value
+    t['sbg:map'] = {'': doc, 'k' * 125: value, 1: [value, (doc,)]}
+    expected = yaml.dump(
+        yaml.load(json.dumps(t, indent=2), Loader=yaml.SafeLoader),
+        default_flow_style=False
+    )
+    assert str(t) == expected
+    assert repr(t) == expected
+    out = io.StringIO()
+    cwl.write_yaml(t, out)
+    assert out.getvalue() == expected
+    for indent in (None, 2):
+        out = io.StringIO()
+        cwl.write_json(t, out, indent=indent, buffer_size=10)
+        assert out.getvalue() == json.dumps(t, indent=indent)
+
+
+def test_json_backend(tmpdir):
+    pytest.importorskip('orjson')
+    t = CommandLineTool(id='t', doc='é')
+    t.add_input(cwl.String(), id='x')
+    expected = t.to_json()
+    try:
+        cwl.set_json_backend('orjson')
+        assert json.loads(t.to_json()) == json.loads(expected)
+        t.json_dump(str(tmpdir.join('t.json')))
+        assert json.loads(tmpdir.join('t.json').read()) == t
+    finally:
+        cwl.set_json_backend(None)
+    assert t.to_json() == expected
+    with pytest.raises(ValueError):
+        cwl.set_json_backend('simplejson')
+
+
+def test_file_text(tmpdir):
+    path = tmpdir.join('bundle.b64')
+    path.write_text('QUJD\n' * 1000 + 'é', encoding='utf-8')
+    expected = CommandLineTool(id='t')
+    expected.add_in_workdir(Dirent(entry=path.read_text('utf-8'),
+                                   entryname='bundle.b64'))
+    t = CommandLineTool(id='t')
+    text = cwl.FileText(str(path))
+    text.chunk_size = 7
+    t.add_in_workdir(Dirent(entry=text, entryname='bundle.b64'))
+
+    assert t == expected
+    assert t.calc_hash() == expected.calc_hash()
+    assert str(t) == str(expected)
+    assert t.to_json() == expected.to_json()
+    t.json_dump(str(tmpdir.join('t.json')))
+    assert tmpdir.join('t.json').read() == expected.to_json()
+    t.dump(str(tmpdir.join('t.cwl')))
+    assert tmpdir.join('t.cwl').read() == str(expected)
@@ -1,8 +1,11 @@
+import sys
 import pytest
 from sbg import cwl
+from sbg.cwl import serialize
+from sbg.cwl.v1_0.cmd import tool as tool_module
 from sbg.cwl.v1_0.hints import TypeFactory
 from sbg.cwl.v1_0 import (
-    CommandLineTool, CommandInput, CommandOutput, Docker, to_tool
+    CommandLineTool, CommandInput, CommandOutput, Docker, to_tool, to_tools
 )
 
 
@@ -98,3 +101,82 @@ def test_to_tool_docker(tool):
 
 def test_to_tool_stdout(tool):
     assert tool.stdout == '__stdout__'
+
+
+FACTOR = 2
+
+
+@to_tool(inputs=dict(x=cwl.Int()), outputs=dict(out=cwl.Int()))
+def times_factor(x):
+    return dict(out=x * FACTOR)
+
+
+@pytest.fixture(scope='function')
+def cache_dir(tmp_path):
+    serialize.set_cache_dir(str(tmp_path))
+    yield tmp_path
+    serialize.set_cache_dir(None)
+
+
+def test_to_tool_cache_reuses_entries(cache_dir, monkeypatch):
+    t1 = times_factor()
+    assert list(cache_dir.glob('*/*.json'))
+
+    def not_called(*args, **kwargs):
+        raise AssertionError('Bundle should be loaded from cache.')
+
+    monkeypatch.setattr(tool_module, 'archive', not_called)
+    # the script is not built either
+    for method in ('create_variables', 'create_functions'):
+        monkeypatch.setattr(serialize.Context, method, not_called)
+    t2 = times_factor()
+    assert t1 == t2
+
+
+def test_to_tool_cache_invalidation(cache_dir, monkeypatch):
+    t1 = times_factor()
+    monkeypatch.setattr(sys.modules[__name__], 'FACTOR', 3)
+    t2 = times_factor()
+    assert t1 != t2
+    assert len(list(cache_dir.glob('*/*.json'))) == 2
+
+
+def test_to_tool_cache_write_failure(cache_dir, monkeypatch, caplog):
+    def failing(*args, **kwargs):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(serialize.cache.os, 'replace', failing)
+    assert times_factor() == times_factor()
+    assert not list(cache_dir.glob('*/*'))
+    assert 'not stored' in caplog.text
+
+    cache = serialize.ArtifactCache(str(cache_dir.joinpath('file')))
+    cache_dir.joinpath('file').write_text('')
+    cache.put(cache.key('x'), 1)
+    assert cache.get(cache.key('x')) is None
+
+
+@to_tool(inputs=dict(x=cwl.Int()), outputs=dict(out=cwl.Int()))
+def plus_factor(x):
+    return dict(out=x + FACTOR)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_to_tools(processes):
+    tools = to_tools([plus_factor, times_factor], processes=processes)
+    assert [t.id for t in tools] == ['plus_factor', 'times_factor']
+    assert tools == [plus_factor(), times_factor()]
+
+
+def test_to_tools_module():
+    tools = to_tools(sys.modules[__name__], processes=1)
+    assert [t.id for t in tools] == ['times_factor', 'plus_factor']
+
+
+def test_to_tools_not_module_level():
+    @to_tool(inputs=dict(x=cwl.Int()), outputs=dict(out=cwl.Int()))
+    def nested(x):
+        return dict(out=x)
+
+    with pytest.raises(ValueError):
+        to_tools([nested, plus_factor])
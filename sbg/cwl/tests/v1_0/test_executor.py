@@ -0,0 +1,249 @@
+import os
+import shutil
+import pytest
+from sbg import cwl
+
+node = pytest.mark.skipif(
+    not shutil.which('node'), reason='node is not installed'
+)
+
+
+def tool(id, command, inputs=None, outputs=None, cores=None, **kwargs):
+    d = {
+        'class': 'CommandLineTool', 'id': id,
+        'baseCommand': command,
+        'inputs': inputs or [],
+        'outputs': outputs or [],
+        **kwargs
+    }
+    if cores is not None:
+        d.setdefault('requirements', []).append(
+            {'class': 'ResourceRequirement', 'coresMin': cores}
+        )
+    return d
+
+
+def cat(id, cores=None):
+    return tool(
+        id, ['cat'],
+        inputs=[{'id': 'files', 'type': 'File[]',
+                 'inputBinding': {'position': 1}}],
+        outputs=[{'id': 'out', 'type': 'stdout'}],
+        stdout=id + '.txt', cores=cores
+    )
+
+
+@pytest.fixture
+def executor(tmpdir):
+    return cwl.LocalExecutor(basedir=str(tmpdir), cores=2, ram=4096)
+
+
+@pytest.fixture
+def text(tmpdir):
+    path = tmpdir.join('a.txt')
+    path.write('a\n')
+    return {'class': 'File', 'path': str(path)}
+
+
+def test_run_tool(executor):
+    t = cwl.load(tool(
+        'echo', ['echo', '-n'],
+        inputs=[
+            {'id': 'n', 'type': 'int', 'inputBinding': {'prefix': '-n='}},
+            {'id': 'flag', 'type': 'boolean',
+             'inputBinding': {'prefix': '--flag', 'position': -1}},
+            {'id': 'words', 'type': 'string[]',
+             'inputBinding': {'itemSeparator': ',', 'position': 2,
+                              'prefix': '-w', 'separate': False}},
+            {'id': 'missing', 'type': 'string?',
+             'inputBinding': {'position': 3}}
+        ],
+        outputs=[{'id': 'out', 'type': 'File',
+                  'outputBinding': {'glob': '*.txt', 'loadContents': True}}],
+        arguments=['x'], stdout='out.txt'
+    ))
+    out = executor.run(t, {'n': 1, 'flag': True, 'words': ['a', 'b']})['out']
+    assert out['basename'] == 'out.txt'
+    assert out['contents'] == '--flag x -n= 1 -wa,b'
+    assert os.path.isfile(out['path']) and out['size'] == 20
+
+
+def test_run_workflow(executor, text):
+    wf = cwl.load({
+        'class': 'Workflow', 'id': 'wf',
+        'requirements': [{'class': 'MultipleInputFeatureRequirement'}],
+        'inputs': [{'id': 'f', 'type': 'File'}],
+        'outputs': [{'id': 'out', 'type': 'File', 'outputSource': 'c/out'}],
+        'steps': [
+            {'id': 'a', 'run': cat('a'), 'in': {'files': 'f'},
+             'out': ['out']},
+            {'id': 'b', 'run': cat('b'), 'in': {'files': 'f'},
+             'out': ['out']},
+            {'id': 'c', 'run': cat('c', cores=2), 'out': ['out'],
+             'in': [{'id': 'files', 'source': ['a/out', 'b/out'],
+                     'linkMerge': 'merge_flattened'}]},
+        ]
+    })
+    out = executor.run(wf, {'f': text})['out']
+    with open(out['path']) as fp:
+        assert fp.read() == 'a\na\n'
+    assert out['path'].endswith(os.path.join('wf', 'c', 'out', 'c.txt'))
+
+
+def test_run_errors(executor, text):
+    with pytest.raises(ValueError):
+        executor.run(cwl.load(cat('c', cores=4)), {'files': [text]})
+    with pytest.raises(ValueError):
+        executor.run(cwl.load(cat('c')))
+    with pytest.raises(RuntimeError):
+        executor.run(cwl.load(tool('fail', ['false'])))
+
+
+@node
+def test_run_expressions(executor, text):
+    t = cwl.load(tool(
+        'expr', ['sh', 'run.sh'],
+        inputs=[{'id': 'f', 'type': 'File'}, {'id': 'n', 'type': 'int'}],
+        outputs=[{'id': 'n', 'type': 'int', 'outputBinding': {
+            'glob': 'n.txt', 'loadContents': True,
+            'outputEval': '$(parseInt(self[0].contents) + 1)'
+        }}],
+        requirements=[
+            {'class': 'InlineJavascriptRequirement'},
+            {'class': 'InitialWorkDirRequirement', 'listing': [
+                '$(inputs.f)',
+                {'entryname': 'run.sh',
+                 'entry': 'cat $(inputs.f.basename) > /dev/null\n'
+                          'echo $(inputs.n * 2) > n.txt'}
+            ]}
+        ]
+    ))
+    assert executor.run(t, {'f': text, 'n': 2}) == {'n': 5}
+    e = cwl.load({
+        'class': 'ExpressionTool', 'id': 'e',
+        'requirements': [{'class': 'InlineJavascriptRequirement'}],
+        'inputs': [{'id': 'x', 'type': 'int'}],
+        'outputs': [{'id': 'y', 'type': 'int'}],
+        'expression': '${ return {"y": inputs.x + 1}; }'
+    })
+    assert executor.run(e, {'x': 1}) == {'y': 2}
+
+
+def test_run_scatter(executor):
+    echo = tool(
+        'echo', ['echo', '-n'],
+        inputs=[{'id': 'x', 'type': 'int', 'inputBinding': {'position': 1}},
+                {'id': 'y', 'type': 'string',
+                 'inputBinding': {'position': 2}}],
+        outputs=[{'id': 'out', 'type': 'string', 'outputBinding': {
+            'glob': 'out.txt', 'loadContents': True,
+            'outputEval': '$(self[0].contents)'
+        }}],
+        stdout='out.txt'
+    )
+
+    def workflow(method):
+        return cwl.load({
+            'class': 'Workflow', 'id': 'wf',
+            'requirements': [{'class': 'ScatterFeatureRequirement'},
+                             {'class': 'StepInputExpressionRequirement'}],
+            'inputs': [{'id': 'xs', 'type': 'int[]'},
+                       {'id': 'ys', 'type': 'string[]'}],
+            'outputs': [{'id': 'out', 'type': 'Any',
+                         'outputSource': 'echo/out'}],
+            'steps': [{
+                'id': 'echo', 'run': echo, 'out': ['out'],
+                'in': [{'id': 'x', 'source': 'xs'},
+                       {'id': 'y', 'source': 'ys',
+                        'valueFrom': '$(self)!'}],
+                'scatter': ['x', 'y'], 'scatterMethod': method
+            }]
+        })
+
+    inputs = {'xs': [1, 2], 'ys': ['a', 'b']}
+    assert executor.run(workflow('dotproduct'), inputs) == {
+        'out': ['1 a!', '2 b!']
+    }
+    assert executor.run(workflow('nested_crossproduct'), inputs) == {
+        'out': [['1 a!', '1 b!'], ['2 a!', '2 b!']]
+    }
+    assert executor.run(
+        workflow('flat_crossproduct'), {'xs': [], 'ys': ['a']}
+    ) == {'out': []}
+
+
+def env(x):
+    return {'class': 'EnvVarRequirement',
+            'envDef': [{'envName': 'X', 'envValue': x}]}
+
+
+def resource(cores=None, ram=None):
+    r = {'class': 'ResourceRequirement'}
+    if cores is not None:
+        r['coresMin'] = cores
+    if ram is not None:
+        r['ramMin'] = ram
+    return r
+
+
+def test_run_requirements_precedence(executor):
+    def echo(id, requirements):
+        return tool(
+            id, ['sh', '-c', 'echo -n $X'], requirements=requirements,
+            outputs=[{'id': 'out', 'type': 'string', 'outputBinding': {
+                'glob': 'out.txt', 'loadContents': True,
+                'outputEval': '$(self[0].contents)'
+            }}],
+            stdout='out.txt'
+        )
+
+    def step(id, run, requirements):
+        return {'id': id, 'run': run, 'in': {}, 'out': ['out'],
+                'requirements': requirements}
+
+    wf = cwl.load({
+        'class': 'Workflow', 'id': 'wf', 'requirements': [env('wf')],
+        'inputs': [],
+        'outputs': [{'id': i, 'type': 'string', 'outputSource': i + '/out'}
+                    for i in ('a', 'b', 'c')],
+        'steps': [
+            # executor has 2 cores, the tool needs only 1
+            step('a', echo('a', [env('tool'), resource(cores=1)]),
+                 [env('step'), resource(cores=4)]),
+            step('b', echo('b', []), [env('step')]),
+            step('c', echo('c', []), []),
+        ]
+    })
+    # process > step > parent workflow
+    assert executor.run(wf) == {'a': 'tool', 'b': 'step', 'c': 'wf'}
+
+
+@pytest.mark.parametrize('resources,parallel', [
+    ({'cores': 1}, True),
+    ({'cores': 2}, False),
+    ({'ram': 2048}, True),
+    ({'ram': 3072}, False),
+])
+def test_run_budget(executor, resources, parallel):
+    # executor has 2 cores and 4096 MiB of RAM
+    times = tool(
+        'times', ['sh', '-c', 'date +%s.%N; sleep 0.5; date +%s.%N'],
+        requirements=[resource(**resources)],
+        outputs=[{'id': 'out', 'type': 'string', 'outputBinding': {
+            'glob': 'out.txt', 'loadContents': True,
+            'outputEval': '$(self[0].contents)'
+        }}],
+        stdout='out.txt'
+    )
+    wf = cwl.load({
+        'class': 'Workflow', 'id': 'wf', 'inputs': [],
+        'outputs': [{'id': i, 'type': 'string', 'outputSource': i + '/out'}
+                    for i in ('a', 'b')],
+        'steps': [{'id': i, 'run': times, 'in': {}, 'out': ['out']}
+                  for i in ('a', 'b')]
+    })
+    out = executor.run(wf)
+    (a_start, a_end), (b_start, b_end) = sorted(
+        [float(t) for t in out[i].split()] for i in ('a', 'b')
+    )
+    assert (b_start < a_end) is parallel
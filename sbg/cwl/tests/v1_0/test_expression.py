@@ -0,0 +1,147 @@
+import shutil
+import pytest
+from sbg import cwl
+from sbg.cwl.consts import EXPRESSION_LIB, INHERIT_SINGLE
+from sbg.cwl.v1_0.expression import (
+    LITERAL, PARAMETER, BODY, REFERENCE, compile_expression, evaluate,
+    evaluate_all, needs_engine, parse_reference
+)
+
+node = pytest.mark.skipif(
+    not shutil.which('node'), reason='node is not installed'
+)
+
+CONTEXT = {
+    'inputs': {
+        'reads': {'class': 'File', 'path': '/data/r.fq', 'basename': 'r.fq'},
+        'names': ['a', 'b'],
+        'n': 3,
+        'empty': None
+    },
+    'self': [{'contents': '42'}],
+    'runtime': {'cores': 2}
+}
+
+
+class NoEngine(object):
+    def evaluate(self, code, context, expression_lib=None):
+        raise AssertionError('JavaScript evaluated: {}'.format(code))
+
+
+@pytest.mark.parametrize('code,reference', [
+    ('inputs.reads', ('inputs', ('reads',))),
+    (' self[0].contents ', ('self', (0, 'contents'))),
+    ("inputs['a b'][\"c\"]", ('inputs', ('a b', 'c'))),
+    (r"inputs['it\'s']", ('inputs', ("it's",))),
+    ('runtime . cores', ('runtime', ('cores',))),
+    ('inputs.n + 1', None),
+    ('inputs.names.join(" ")', None),
+    ('Math.PI', None),
+    ('inputs[0', None),
+])
+def test_parse_reference(code, reference):
+    assert parse_reference(code) == reference
+
+
+def test_compile_expression():
+    assert compile_expression(r'\$(x) $(inputs.n)-$(inputs.n * 2)${}') == (
+        (LITERAL, '$(x) '), (REFERENCE, ('inputs', ('n',))), (LITERAL, '-'),
+        (PARAMETER, 'inputs.n * 2'), (BODY, '')
+    )
+    assert compile_expression('$(inputs.n)') is compile_expression(
+        '$(inputs.n)'
+    )
+    assert compile_expression(' ${ return 1; }\n') == ((BODY, ' return 1; '),)
+    assert needs_engine('$(inputs.n * 2)')
+    assert needs_engine('${ return 1; }')
+    assert not needs_engine('$(inputs.reads.path) and $(self[0])')
+    assert not needs_engine(1)
+
+
+def test_evaluate_references():
+    engine = NoEngine()
+    assert evaluate('$(inputs.reads)', CONTEXT, engine=engine) == (
+        CONTEXT['inputs']['reads']
+    )
+    assert evaluate(
+        '-i $(inputs.reads.path) -t $(runtime.cores) $(inputs.names) '
+        '$(inputs.names.length) $(inputs.names[1]) $(inputs.empty)',
+        CONTEXT, engine=engine
+    ) == '-i /data/r.fq -t 2 ["a", "b"] 2 b null'
+    assert evaluate('$(self[0].contents)', CONTEXT, engine=engine) == '42'
+    assert evaluate('$(inputs.missing)', CONTEXT, engine=engine) is None
+    assert evaluate('$(inputs.names[5])', CONTEXT, engine=engine) is None
+    with pytest.raises(RuntimeError):
+        evaluate('$(inputs.empty.path)', CONTEXT, engine=engine)
+
+
+@node
+def test_evaluate_javascript():
+    assert evaluate('$(inputs.n * 2)', CONTEXT) == 6
+    assert evaluate(
+        '$(inputs.reads.basename) ${ return inputs.names.join(","); }',
+        CONTEXT
+    ) == 'r.fq a,b'
+
+
+@node
+def test_node_pool():
+    with open(EXPRESSION_LIB) as fp:
+        lib = [fp.read()]
+    with cwl.NodePool(processes=1, timeout=0.3) as pool:
+        assert pool.evaluate_many(
+            [('inputs.x * 2', {'inputs': {'x': i}}) for i in range(3)]
+        ) == [0, 2, 4]
+        files = [{'class': 'File', 'path': '/a', 'metadata': {'s': 1}}]
+        reads = {'class': 'File', 'path': '/r', 'metadata': {'s': 2}}
+        inherited = evaluate(
+            INHERIT_SINGLE.format(preprocess='', input='reads'),
+            {'inputs': {'reads': reads}, 'self': files, 'runtime': {}},
+            lib, engine=pool
+        )
+        assert inherited['metadata'] == {'s': 2}
+        worker, = pool._idle
+        assert len(worker.libs) == 2
+        with pytest.raises(RuntimeError):
+            pool.evaluate('(function() { while (true) {} })()', {})
+        with pytest.raises(RuntimeError):
+            pool.evaluate('1', {}, ['syntax error ('])
+        # a failed worker is replaced
+        worker.process.kill()
+        with pytest.raises(RuntimeError):
+            pool.evaluate('1', {})
+        assert pool.evaluate('inputs', {'inputs': None}) is None
+    assert not pool._idle
+
+
+@node
+def test_node_pool_isolation():
+    lib = ['var lib = function(x) { return x + 1; };']
+    leak = '(function() { leaked = 1; lib = null; Math = null; return 0; })()'
+    with cwl.NodePool(processes=1, timeout=0.3) as pool:
+        assert pool.evaluate('self', {'inputs': {}, 'self': 5}) == 5
+        assert pool.evaluate('typeof self', {'inputs': {}}) == 'undefined'
+        assert pool.evaluate_many([
+            (leak, {'inputs': {'x': 1}}),
+            ('[typeof leaked, lib(1), Math.max(1, 2), typeof inputs]', {})
+        ], lib) == [0, ['undefined', 2, 2, 'undefined']]
+        assert pool.evaluate('typeof leaked', {}, lib) == 'undefined'
+        with pytest.raises(RuntimeError):
+            pool.evaluate('(function() { spin = 1; while (true) {} })()', {})
+        assert pool.evaluate('typeof spin', {}) == 'undefined'
+
+
+def test_evaluate_all():
+    class Batch(NoEngine):
+        def evaluate_many(self, expressions, expression_lib=None):
+            self.batch = expressions
+            return [len(code) for code, _ in expressions]
+
+    engine = Batch()
+    assert evaluate_all([
+        ('$(inputs.n) $(inputs.n + 1)', CONTEXT), (3, CONTEXT),
+        ('${ return 1; }', CONTEXT), ('$(runtime.cores)', CONTEXT)
+    ], engine=engine) == ['3 14', 3, 27, 2]
+    assert [code for code, _ in engine.batch] == [
+        '(inputs.n + 1)', '(function(){ return 1; })()'
+    ]
@@ -1,6 +1,15 @@
+import os
+import json
+import pickle
 import pytest
 import tempfile
 from sbg import cwl
+from sbg.cwl.v1_0 import util
+from sbg.cwl.v1_0.base import resolve
+from sbg.cwl.v1_0.util import (
+    from_file, load_file, Lazy, YamlLoader, intern_strings
+)
+from sbg.cwl.serialize.cache import CACHE_DIR_ENV
 
 
 @pytest.mark.parametrize('app', [
@@ -20,3 +29,346 @@ def test_from_dict(app):
     app_type = type(app)
     raw_dict = app.to_dict()
     assert type(cwl.load(raw_dict)) == app_type
+
+
+@pytest.mark.parametrize('suffix, content, backend', [
+    ('.json', '{"class": "Workflow", "n": 1e+20}', ('json', 'orjson')),
+    ('.cwl', '\n  [{"class": "Workflow", "n": 1e+20}]', ('json', 'orjson')),
+    ('.cwl', '{class: Workflow, n: 1e+20}', ('CSafeLoader', 'SafeLoader')),
+    ('.cwl', 'class: Workflow\nn: 1e+20\n', ('CSafeLoader', 'SafeLoader')),
+])
+def test_load_file(tmpdir, suffix, content, backend):
+    path = tmpdir.join('app' + suffix)
+    path.write(content)
+    doc, used = load_file(str(path))
+    assert used in backend
+    if isinstance(doc, list):
+        doc = doc[0]
+    assert doc['class'] == 'Workflow'
+    # JSON numbers stay numbers, YAML 1.1 needs a dot in floats
+    assert doc['n'] == (1e+20 if used in ('json', 'orjson') else '1e+20')
+    assert from_file(str(path)) == load_file(str(path))[0]
+
+
+def test_load_from_json_file(tmpdir):
+    wf = cwl.Workflow(id='wf', doc='é')
+    path = str(tmpdir.join('wf.json'))
+    wf.json_dump(path)
+    assert cwl.load(path) == wf
+
+
+def _write(path, doc):
+    path.write(json.dumps(doc))
+    return str(path)
+
+
+def test_resolve_shared_import(tmpdir):
+    shared = tmpdir.mkdir('schemas')
+    _write(shared.join('item.json'), {'name': 'item',
+                                      'doc': {'$include': 'doc.txt'}})
+    shared.join('doc.txt').write('Item doc')
+    _write(shared.join('schemas.json'), {
+        'types': [{'$import': 'item.json'}, {'$import': 'item.json'}]
+    })
+    tool = cwl.CommandLineTool(id='t')
+    tool['sbg:item'] = {'$import': str(shared.join('item.json'))}
+    tool['sbg:schemas'] = {'$import': str(shared.join('schemas.json'))}
+    tool['sbg:more'] = [{'$mixin': str(shared.join('item.json')),
+                         'name': 'other'}]
+    tool = cwl.load(tool)
+
+    cache = cwl.DocumentCache()
+    tool.resolve(cache=cache)
+    item = {'name': 'item', 'doc': 'Item doc'}
+    assert tool['sbg:item'] == item
+    assert tool['sbg:schemas'] == {'types': [item, item]}
+    assert tool['sbg:more'] == [dict(item, name='other')]
+    # item.json, doc.txt and schemas.json are parsed once
+    assert cache.misses == 3
+    # copies are returned, resolved documents are independent
+    tool['sbg:schemas']['types'][0]['name'] = 'changed'
+    assert tool['sbg:schemas']['types'][1]['name'] == 'item'
+
+
+def test_resolve_cycle(tmpdir):
+    a = _write(tmpdir.join('a.json'), {'x': {'$import': 'b.json'}})
+    _write(tmpdir.join('b.json'), {'y': [{'$import': 'a.json'}]})
+    with pytest.raises(ValueError) as e:
+        resolve({'z': {'$import': a}})
+    assert 'a.json -> {} -> {}'.format(tmpdir.join('b.json'), a) in str(
+        e.value
+    )
+
+
+def test_document_cache(tmpdir):
+    cache = cwl.DocumentCache(max_size=1)
+    a = _write(tmpdir.join('a.json'), {'v': 1})
+    b = _write(tmpdir.join('b.json'), {'v': 2})
+    assert cache.load(a) == {'v': 1}
+    assert cache.load(a) == {'v': 1}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.load(b) == {'v': 2}
+    assert len(cache) == 1
+    assert cache.load(a) == {'v': 1}
+    assert cache.misses == 3
+
+    _write(tmpdir.join('a.json'), {'v': 10})
+    st = os.stat(a)
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert cache.load(a) == {'v': 10}
+
+
+def _types(x):
+    if isinstance(x, dict):
+        return type(x), {k: _types(v) for k, v in x.items()}
+    if isinstance(x, list):
+        return type(x), [_types(v) for v in x]
+    return type(x)
+
+
+def test_load_trusted():
+    tool = {
+        'class': 'CommandLineTool',
+        'id': 'tool',
+        'baseCommand': ['echo'],
+        'inputs': [
+            {'id': 'a', 'type': 'File[]',
+             'inputBinding': {'prefix': '-a', 'itemSeparator': ','}},
+            {'id': 'b', 'type': {'type': 'enum', 'symbols': ['x', 'y']}},
+            {'id': 'c', 'type': ['null', 'int'], 'default': 1,
+             'sbg:category': 'Options'}
+        ],
+        'outputs': [
+            {'id': 'out', 'type': 'File',
+             'outputBinding': {'glob': '*.txt'}, 'secondaryFiles': ['.bai']}
+        ],
+        'requirements': [
+            {'class': 'DockerRequirement', 'dockerPull': 'ubuntu'},
+            {'class': 'ResourceRequirement', 'coresMin': 2},
+            {'class': 'EnvVarRequirement',
+             'envDef': [{'envName': 'X', 'envValue': '1'}]}
+        ],
+        'hints': [{'class': 'sbg:MaxNumberOfParallelInstances', 'value': 2}],
+        'sbg:toolkit': 'test'
+    }
+    doc = {
+        'class': 'Workflow',
+        'id': 'wf',
+        'inputs': [{'id': 'a', 'type': 'File[]'}],
+        'outputs': [{'id': 'out', 'type': 'File[]',
+                     'outputSource': 'step/out'}],
+        'requirements': [{'class': 'ScatterFeatureRequirement'}],
+        'steps': [{
+            'id': 'step',
+            'in': [{'id': 'a', 'source': 'a'}, {'id': 'b', 'default': 'x'}],
+            'out': ['out'],
+            'scatter': 'a',
+            'run': tool
+        }]
+    }
+
+    checked = cwl.load(json.loads(json.dumps(doc)))
+    trusted = cwl.load(json.loads(json.dumps(doc)), trusted=True)
+    assert trusted == checked
+    assert _types(trusted) == _types(checked)
+    assert trusted.to_json() == checked.to_json()
+
+
+def test_load_trusted_skips_checks():
+    doc = {'class': 'Workflow', 'label': 1, 'x': 2}
+    with pytest.raises(TypeError):
+        cwl.load(dict(doc))
+    assert cwl.load(dict(doc), trusted=True)['label'] == 1
+    # checks are enabled again after trusted load
+    with pytest.raises(RuntimeError):
+        cwl.load(dict(doc, label='wf'))
+
+
+def _nested_doc():
+    tool = {'class': 'CommandLineTool', 'id': 'tool', 'baseCommand': 'ls',
+            'inputs': [{'id': 'x', 'type': 'string?'}],
+            'outputs': [{'id': 'out', 'type': 'File?',
+                         'outputBinding': {'glob': '*'}}]}
+    inner = {'class': 'Workflow', 'id': 'inner',
+             'inputs': [{'id': 'x', 'type': 'string?'}],
+             'outputs': [{'id': 'out', 'type': 'File?',
+                          'outputSource': 'tool/out'}],
+             'steps': [{'id': 'tool', 'in': {'x': 'x'}, 'out': ['out'],
+                        'run': tool}]}
+    return json.dumps({
+        'class': 'Workflow', 'id': 'outer',
+        'inputs': [{'id': 'x', 'type': 'string?'}],
+        'outputs': [{'id': 'out', 'type': 'File?',
+                     'outputSource': 'inner/out'}],
+        'steps': [{'id': 'inner', 'in': {'x': 'x'}, 'out': ['out'],
+                   'run': inner, 'hints': [{'class': 'sbg:AWSInstanceType',
+                                            'value': 'c4.2xlarge'}]}]
+    })
+
+
+@pytest.mark.parametrize('trusted', [False, True])
+def test_load_lazy(trusted):
+    doc = _nested_doc()
+    eager = cwl.load(json.loads(doc))
+    wf = cwl.load(json.loads(doc), trusted=trusted, lazy=True)
+    step = wf.get_step('inner')
+    assert isinstance(step['run'], Lazy)
+    assert step.hints[0]['value'] == 'c4.2xlarge'
+    assert isinstance(step['run'], Lazy)
+
+    inner = step.run
+    assert type(inner) is cwl.Workflow
+    assert step['run'] is inner
+    assert isinstance(inner.steps[0]['run'], Lazy)
+    assert type(inner.steps[0].run) is cwl.CommandLineTool
+    assert inner.steps[0]['run'] is inner.steps[0].run
+
+    wf = cwl.load(json.loads(doc), trusted=trusted, lazy=True)
+    assert wf == eager
+    assert wf.to_json() == eager.to_json()
+    assert str(wf) == str(eager)
+    assert wf.calc_hash() == eager.calc_hash()
+    assert pickle.loads(pickle.dumps(wf)).to_json() == eager.to_json()
+
+    step = wf.get_step('inner')
+    step.run.steps[0].run.label = 'edited'
+    eager.steps[0].run.steps[0].run.label = 'edited'
+    assert wf.calc_hash() == eager.calc_hash()
+
+
+@pytest.mark.parametrize('use', [
+    lambda wf: wf.to_json(),
+    lambda wf: str(wf),
+    lambda wf: wf.calc_hash(),
+    lambda wf: resolve(wf),
+])
+def test_load_lazy_materialized_in_place(use):
+    wf = cwl.load(json.loads(_nested_doc()), lazy=True)
+    use(wf)
+    step = wf.get_step('inner')
+    assert type(step['run']) is cwl.Workflow
+    assert type(step['run'].steps[0]['run']) is cwl.CommandLineTool
+
+    graph = wf.graph()
+    assert list(graph.steps) == ['inner/tool']
+    assert graph.steps['inner/tool'] is step['run'].steps[0]
+
+
+def test_load_lazy_json_dumps():
+    doc = _nested_doc()
+    wf = cwl.load(json.loads(doc), lazy=True)
+    # Session.create_app hashes app before sending it
+    wf.calc_hash()
+    assert json.loads(json.dumps(wf)) == json.loads(
+        cwl.load(json.loads(doc)).to_json()
+    )
+
+
+@pytest.fixture
+def disk_cache(tmpdir):
+    cache = cwl.set_disk_cache(str(tmpdir.join('cache')))
+    yield cache
+    cwl.set_disk_cache(None)
+
+
+def test_disk_cache(tmpdir, disk_cache):
+    path = str(tmpdir.join('wf.cwl'))
+    with open(path, 'w') as fp:
+        fp.write('class: Workflow\nid: wf\n')
+    assert load_file(path)[1] != 'pickle'
+    doc, backend = load_file(path)
+    assert (doc, backend) == ({'class': 'Workflow', 'id': 'wf'}, 'pickle')
+    assert cwl.load(path).id == 'wf'
+    assert (disk_cache.hits, disk_cache.misses) == (2, 1)
+
+    # same size and modification time, different content
+    st = os.stat(path)
+    with open(path, 'w') as fp:
+        fp.write('class: Workflow\nid: xx\n')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert load_file(path) == ({'class': 'Workflow', 'id': 'xx'},
+                               YamlLoader.__name__)
+
+    # broken entries are parsed again
+    for _, _, entry in disk_cache._entries():
+        with open(entry, 'wb') as fp:
+            fp.write(b'broken')
+    assert load_file(path)[0]['id'] == 'xx'
+    assert load_file(path)[1] == 'pickle'
+
+    # JSON is not cached
+    json_path = str(tmpdir.join('wf.json'))
+    with open(json_path, 'w') as fp:
+        fp.write('{"class": "Workflow"}')
+    assert load_file(json_path)[1] != 'pickle'
+    assert load_file(json_path)[1] != 'pickle'
+
+
+def test_disk_cache_directory(tmpdir, monkeypatch):
+    path = str(tmpdir.join('shared'))
+    os.mkdir(path, 0o755)
+    os.chmod(path, 0o755)
+    cwl.DiskCache(path)
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+    monkeypatch.setattr(os, 'getuid', lambda: os.stat(path).st_uid + 1)
+    with pytest.raises(PermissionError):
+        cwl.DiskCache(path)
+    monkeypatch.setenv(util.DISK_CACHE_ENV, path)
+    assert util.disk_cache() is None
+    # cache of serialized artifacts has a directory of its own
+    assert util.DISK_CACHE_ENV != CACHE_DIR_ENV
+
+
+def test_disk_cache_size(tmpdir, disk_cache):
+    disk_cache.max_size = 0
+    path = str(tmpdir.join('wf.cwl'))
+    with open(path, 'w') as fp:
+        fp.write('class: Workflow\n')
+    load_file(path)
+    assert disk_cache.size() == 0
+
+    disk_cache.max_size = 2 ** 20
+    paths = []
+    for i in range(3):
+        paths.append(str(tmpdir.join('wf{}.cwl'.format(i))))
+        with open(paths[-1], 'w') as fp:
+            fp.write('class: Workflow\nid: wf{}\n'.format(i))
+        load_file(paths[-1])
+        with open(paths[-1], 'rb') as fp:
+            entry = disk_cache.key(paths[-1], fp.read()) + disk_cache.suffix
+        os.utime(os.path.join(disk_cache.path, entry), (i, i))
+    sizes = [size for _, size, _ in disk_cache._entries()]
+    assert len(sizes) == 3
+    # last use of wf0 is updated, wf1 is least recently used
+    assert load_file(paths[0])[1] == 'pickle'
+    disk_cache.max_size = sum(sizes) - 1
+    disk_cache.prune()
+    assert len(disk_cache._entries()) == 2
+    assert load_file(paths[0])[1] == 'pickle'
+    assert load_file(paths[2])[1] == 'pickle'
+    assert load_file(paths[1])[1] != 'pickle'
+
+
+def test_intern_strings(tmpdir):
+    long = 'x' * 100
+    paths = []
+    for i in range(2):
+        paths.append(str(tmpdir.join('wf{}.cwl'.format(i))))
+        with open(paths[-1], 'w') as fp:
+            fp.write('class: Workflow\nid: wf{}\ndoc: {}\n'
+                     'inputs: [{{id: in_q, type: File}}]\n'.format(i, long))
+    a, b = (load_file(p)[0] for p in paths)
+    assert a['inputs'][0]['id'] is b['inputs'][0]['id']
+    assert next(iter(a['inputs'][0])) is next(iter(b['inputs'][0]))
+    assert a['doc'] is not b['doc']
+
+    doc = json.loads(_nested_doc())
+    wf = cwl.load(json.loads(_nested_doc()))
+    hash = wf.calc_hash()
+    other = cwl.load(doc, lazy=True, intern=True)
+    intern_strings(wf)
+    assert wf.calc_hash() == hash
+    assert wf.inputs[0].type is other.inputs[0].type
+    assert (wf.steps[0].run.inputs[0].id is
+            other.steps[0].run.inputs[0].id)
@@ -0,0 +1,98 @@
+import pytest
+from sbg import cwl
+from sbg.cwl.v1_0.requirement.resource import DEFAULT_RAM
+
+
+def step(id, *sources, run=None, cores=None):
+    d = {
+        'id': id,
+        'in': [{'id': 'in_{}'.format(i), 'source': s}
+               for i, s in enumerate(sources)],
+        'out': ['out'],
+        'run': run or {'class': 'CommandLineTool', 'id': id, 'inputs': [],
+                       'outputs': []}
+    }
+    if cores is not None:
+        d['requirements'] = [
+            {'class': 'ResourceRequirement', 'coresMin': cores}
+        ]
+    return d
+
+
+def workflow(*steps, outputs=None):
+    return {
+        'class': 'Workflow', 'id': 'wf',
+        'inputs': [{'id': 'x', 'type': 'File'}],
+        'outputs': [{'id': o, 'type': 'File', 'outputSource': s}
+                    for o, s in (outputs or {}).items()],
+        'steps': list(steps)
+    }
+
+
+@pytest.fixture
+def diamond():
+    return cwl.load(workflow(
+        step('a', 'x'),
+        step('b', 'a/out', cores=4),
+        step('c', '#wf/a/out'),
+        step('d', ['b/out', 'c/out']),
+        step('e', 'x')
+    ))
+
+
+def test_graph(diamond):
+    g = diamond.graph()
+    assert g.predecessors['d'] == ['b', 'c']
+    assert g.predecessors['c'] == ['a']
+    assert g.successors['a'] == ['b', 'c']
+    assert g.topological_order() == ['a', 'e', 'b', 'c', 'd']
+    assert g.levels() == [['a', 'e'], ['b', 'c'], ['d']]
+    assert g.max_concurrency() == 2
+    assert g.find_cycle() is None
+    assert g.critical_path() == (3, ['a', 'b', 'd'])
+    assert g.critical_path('cores') == (6, ['a', 'b', 'd'])
+    assert g.critical_path({'c': 10, 'd': 1, 'e': 2}) == (11, ['a', 'c', 'd'])
+    assert g.critical_path(lambda n, s: 2) == (6, ['a', 'b', 'd'])
+    with pytest.raises(ValueError):
+        g.critical_path('disk')
+
+
+def test_graph_weights_app_first():
+    tool = {'class': 'CommandLineTool', 'id': 'tool', 'inputs': [],
+            'outputs': [], 'requirements': [
+                {'class': 'ResourceRequirement', 'coresMin': 8, 'ramMin': 64}
+            ]}
+    g = cwl.load(workflow(
+        step('a', 'x', run=tool, cores=2), step('b', 'x', cores=2)
+    )).graph()
+    # requirements of the app override requirements of the step
+    assert g.weights('cores') == {'a': 8, 'b': 2}
+    assert g.weights('ram') == {'a': 64, 'b': DEFAULT_RAM}
+
+
+def test_graph_nested():
+    # inputs of steps are in_<i>
+    sub = workflow(step('s1', 'in_0'), step('s2', 's1/out'),
+                   outputs={'out': 's2/out'})
+    sub['inputs'][0]['id'] = 'in_0'
+    wf = cwl.load(workflow(
+        step('a', 'x'), step('sub', 'a/out', run=sub),
+        step('b', 'sub/out'), outputs={'out': 'b/out'}
+    ))
+    g = wf.graph()
+    assert g.topological_order() == ['a', 'sub/s1', 'sub/s2', 'b']
+    assert g.predecessors['sub/s1'] == ['a']
+    assert g.predecessors['b'] == ['sub/s2']
+    assert wf.graph(expand=False).levels() == [['a'], ['sub'], ['b']]
+
+
+def test_graph_cycle():
+    g = cwl.load(workflow(
+        step('a', 'x'), step('b', 'a/out', 'd/out'), step('c', 'b/out'),
+        step('d', 'c/out'), step('e', 'd/out')
+    )).graph()
+    cycle = g.find_cycle()
+    assert cycle[0] == cycle[-1] and set(cycle) == {'b', 'c', 'd'}
+    with pytest.raises(ValueError) as e:
+        g.topological_order()
+    assert 'cycle' in str(e.value)
@@ -0,0 +1,87 @@
+import pytest
+from sbg import cwl
+from sbg.cwl import ScatterMethod
+
+
+@pytest.fixture
+def inputs():
+    return {'x': [1, 2], 'y': ['a', 'b', 'c'], 'z': 0}
+
+
+def test_dotproduct(inputs):
+    s = cwl.Scatter(inputs, '#wf/step/x')
+    assert len(s) == 2 and s.shape == (2,)
+    assert list(s) == [
+        {'x': 1, 'y': ['a', 'b', 'c'], 'z': 0},
+        {'x': 2, 'y': ['a', 'b', 'c'], 'z': 0}
+    ]
+    inputs['y'].pop()
+    s = cwl.Scatter(inputs, ['x', 'y'], ScatterMethod.DOTPRODUCT)
+    assert [(j['x'], j['y']) for j in s] == [(1, 'a'), (2, 'b')]
+    assert s.job(1) == {'x': 2, 'y': 'b', 'z': 0}
+    assert s.gather([{'o': 1}, {'o': 2}]) == {'o': [1, 2]}
+
+
+@pytest.mark.parametrize('method,gathered', [
+    (ScatterMethod.FLAT_CROSSPRODUCT, ['1a', '1b', '1c', '2a', '2b', '2c']),
+    (ScatterMethod.NESTED_CROSSPRODUCT,
+     [['1a', '1b', '1c'], ['2a', '2b', '2c']]),
+])
+def test_crossproduct(inputs, method, gathered):
+    s = cwl.Scatter(inputs, ['x', 'y'], method)
+    jobs = list(s)
+    assert len(s) == len(jobs) == 6
+    assert [s.job(i) for i in range(6)] == jobs
+    assert s.gather(
+        {'o': '{}{}'.format(j['x'], j['y'])} for j in jobs
+    ) == {'o': gathered}
+    assert len(list(s.indices())) == 6
+
+
+def test_large_crossproduct():
+    s = cwl.Scatter(
+        {'a': list(range(1000)), 'b': list(range(1000)),
+         'c': list(range(1000))},
+        ['a', 'b', 'c'], ScatterMethod.NESTED_CROSSPRODUCT
+    )
+    assert len(s) == 10 ** 9 and s.shape == (1000, 1000, 1000)
+    assert s.job(123456789) == {'a': 123, 'b': 456, 'c': 789}
+    jobs = iter(s)
+    next(jobs)
+    assert next(jobs) == {'a': 0, 'b': 0, 'c': 1}
+
+
+def test_empty():
+    s = cwl.Scatter({'x': [1], 'y': []}, ['x', 'y'],
+                    ScatterMethod.NESTED_CROSSPRODUCT)
+    assert len(s) == 0 and list(s) == []
+    assert s.gather([], ['o']) == {'o': [[]]}
+    assert cwl.Scatter({'x': []}, 'x').gather([], ['o']) == {'o': []}
+
+
+def test_errors(inputs):
+    with pytest.raises(ValueError):
+        cwl.Scatter(inputs, ['x', 'y'])
+    with pytest.raises(ValueError):
+        cwl.Scatter(inputs, ['x', 'y'], ScatterMethod.DOTPRODUCT)
+    with pytest.raises(ValueError):
+        cwl.Scatter(inputs, 'z')
+    with pytest.raises(ValueError):
+        cwl.Scatter(inputs, 'x', 'zip')
+    with pytest.raises(ValueError, match='unique'):
+        cwl.Scatter(inputs, ['x', 'x'], ScatterMethod.FLAT_CROSSPRODUCT)
+    with pytest.raises(ValueError, match='unique'):
+        cwl.Scatter(inputs, ['#step/x', 'x'], ScatterMethod.DOTPRODUCT)
+    with pytest.raises(ValueError):
+        cwl.Scatter(inputs, 'x').gather([{'o': 1}])
+    with pytest.raises(IndexError):
+        cwl.Scatter(inputs, 'x').job(2)
+
+
+def test_step_scatter_jobs():
+    step = cwl.Step(
+        id='s', in_=[{'id': 'x'}, {'id': 'y'}], out=['o'],
+        run={'class': 'CommandLineTool', 'inputs': [], 'outputs': []},
+        scatter=['x', 'y'], scatter_method=ScatterMethod.FLAT_CROSSPRODUCT
+    )
+    assert len(step.scatter_jobs({'x': [1, 2], 'y': [3, 4]})) == 4
@@ -1,7 +1,13 @@
+import os
+import sys
+import copy
+import pickle
 import pytest
+import subprocess
 from sbg import cwl
 from functools import partial
 
+from sbg.cwl.consts import INPUT_JSON_SHARED
 from sbg.cwl.v1_0.hints import TypeFactory
 from sbg.cwl.v1_0.schema import set_required
 from sbg.cwl.v1_0 import (
@@ -13,6 +19,8 @@ from sbg.cwl.v1_0 import (
     OutputArray, ScatterMethod, is_primitive
 )
 
+ROOT = os.path.abspath(os.path.join(__file__, *['..'] * 6))
+
 
 @pytest.fixture(scope='function')
 def wf():
@@ -320,3 +328,217 @@ def test_is_scattered(wf, hint, req, scatter):
 
     for k in scatter:
         assert step.is_scattered(k) is True
+
+
+def test_get_step_after_rename(wf):
+    step = wf.add_step(CommandLineTool(id='t1'))
+    assert wf.get_step('t1') is step
+
+    step.id = 't2'
+    assert wf.get_step('t1') is None
+    assert wf.get_step('t2') is step
+    wf.add_step(CommandLineTool(id='t1'))
+    assert wf.get_step('t1').run.id == 't1'
+
+
+def test_add_step_duplicate_id(wf):
+    wf.add_step(CommandLineTool(id='t1'))
+    with pytest.raises(ValueError):
+        wf.add_step(CommandLineTool(id='t1'))
+
+
+def test_expose_unique_ids(wf):
+    for i in range(3):
+        t = CommandLineTool(id='t{}'.format(i))
+        t.add_input(cwl.String(), 'input')
+        t.add_output(cwl.String(), 'output')
+        wf.add_step(t)
+
+    assert [i.id for i in wf.inputs] == ['input', 'input_1', 'input_2']
+    assert [o.id for o in wf.outputs] == ['output', 'output_1', 'output_2']
+    assert wf.get_port('input_2').id == 'input_2'
+    assert wf.steps[2].in_ == [StepInput('input', source='input_2')]
+
+
+def _tools(n):
+    tools = []
+    for i in range(n):
+        t = CommandLineTool(id='t{}'.format(i))
+        t.add_input(cwl.String(), 'input')
+        t.add_input(cwl.Int(), 'n')
+        t.add_output(cwl.String(), 'output')
+        tools.append(t)
+    return tools
+
+
+def test_add_steps_same_as_add_step():
+    wf1, wf2 = Workflow(), Workflow()
+    for t in _tools(5):
+        wf1.add_step(t, expose=['n', 'output'], scatter=['input'])
+    for i in range(1, 5):
+        wf1.add_connection('t{}.output'.format(i - 1), 't{}.input'.format(i))
+
+    steps = wf2.add_steps(_tools(5), expose=['n', 'output'],
+                          scatter=['input'])
+    wf2.add_connections(
+        ('t{}.output'.format(i - 1), 't{}.input'.format(i))
+        for i in range(1, 5)
+    )
+    assert wf1.to_json() == wf2.to_json()
+    assert steps == wf2.steps
+
+
+def test_add_steps_item_arguments(wf):
+    t1, t2 = _tools(2)
+    wf.add_steps([t1, dict(step=t2, id='second', expose={'n': 'count'})],
+                 expose=[])
+    assert [s.id for s in wf.steps] == ['t0', 'second']
+    assert [i.id for i in wf.inputs] == ['count']
+    assert wf.steps[1].in_ == [StepInput('n', source='count')]
+
+
+def test_add_steps_duplicate_id(wf):
+    t1, t2 = _tools(2)
+    t2.id = t1.id
+    with pytest.raises(ValueError):
+        wf.add_steps([t1, t2])
+
+
+@pytest.mark.parametrize('items', [
+    lambda t1, t2: [t1, t2, dict(step=t2, id=t1.id)],
+    lambda t1, t2: [t1, t2, 'tool'],
+    lambda t1, t2: [t1, dict(step=t2, expose=['missing'])],
+])
+def test_add_steps_failed(wf, items):
+    wf.add_steps(_tools(1), expose=['input'])
+    before = wf.to_json()
+    t1, t2 = _tools(3)[1:]
+    with pytest.raises(ValueError):
+        wf.add_steps(items(t1, t2))
+    assert wf.to_json() == before
+    assert [s.id for s in wf.steps] == ['t0']
+    assert wf.get_input('input_1') is None
+
+
+def test_add_connections_ordered_sources(wf):
+    wf.add_input(cwl.String(), 'a')
+    wf.add_input(cwl.String(), 'b')
+    t1, t2 = _tools(2)
+    wf.add_steps([t1, t2], expose=[])
+    wf.add_connections([
+        ('b', 't1.input'), ('t0.output', 't1.input'), ('a', 't1.input'),
+        ('b', 't1.input')
+    ])
+    assert wf.steps[0].out == [StepOutput('output')]
+    assert wf.steps[1].in_ == [
+        StepInput('input', source=['b', 't0/output', 'a'])
+    ]
+
+
+def test_add_connections_validates_first(wf):
+    t1, t2 = _tools(2)
+    wf.add_steps([t1, t2], expose=[])
+    with pytest.raises(ValueError):
+        wf.add_connections([('t0.output', 't1.input'), ('a', 'b')])
+    assert wf.steps[1].in_ == []
+
+
+def test_share_files(wf):
+    bundle = 'a' * 2048
+    tools = _tools(3)
+    for i, t in enumerate(tools):
+        t.add_file(bundle, entryname='bundle.tar.bz2.b64')
+        t.add_file('script {}'.format(i) * 500, entryname='script.py.b64')
+        t.add_input_json()
+    wf.add_steps(tools, expose=[])
+
+    added = wf.share_files()
+    assert len(added) == 1
+    shared = wf.get_input(added[0])
+    assert shared.default == bundle
+    for step in wf.steps:
+        assert StepInput(added[0], source=added[0]) in step.in_
+        assert step.run.get_input(added[0]).type == Primitive.STRING
+        listing = step.run.find_requirement(
+            'InitialWorkDirRequirement'
+        ).listing
+        assert listing[0].entry == '$(inputs.{})'.format(added[0])
+        assert listing[0].entryname == 'bundle.tar.bz2.b64'
+        assert listing[1].entry.startswith('script')
+        assert listing[2].entry == INPUT_JSON_SHARED
+    assert wf.share_files() == []
+
+
+def test_share_files_min_count(wf):
+    t1, t2 = _tools(2)
+    t1.add_file('a' * 2048)
+    t2.add_file('b' * 2048)
+    wf.add_steps([t1, t2], expose=[])
+    assert wf.share_files() == []
+    assert wf.share_files(min_count=1, min_size=4096) == []
+    assert len(wf.share_files(min_count=1)) == 2
+
+
+def _hashed_wf():
+    wf = Workflow(id='wf')
+    tools = _tools(2)
+    tools[0]['sbg:meta'] = {'tags': ['a']}
+    wf.add_steps(tools, expose=['input'])
+    wf.add_step(tools[0], id='again', expose=[])
+    wf.calc_hash()
+    return wf
+
+
+@pytest.mark.parametrize('edit', [
+    lambda wf: setattr(wf.steps[0].run.inputs[0], 'label', 'x'),
+    lambda wf: wf.steps[1].in_.append(StepInput('extra')),
+    lambda wf: wf.steps[2].run['sbg:meta']['tags'].append('b'),
+    lambda wf: wf.steps[1].run.inputs.reverse(),
+    lambda wf: wf.steps[1].run.inputs[0].pop('type'),
+    lambda wf: wf.inputs[0].update(label='x'),
+])
+def test_calc_hash_after_edit(edit):
+    wf = _hashed_wf()
+    before = wf.calc_hash()
+    edit(wf)
+    after = wf.calc_hash()
+    assert after != before
+    assert after == copy.deepcopy(wf).calc_hash()
+    assert after == pickle.loads(pickle.dumps(wf)).calc_hash()
+
+
+def test_calc_hash_caller_containers():
+    wf = _hashed_wf()
+    tool = wf.steps[1].run
+    meta = {'tags': ['a']}
+    command = ['echo']
+    tool['sbg:meta'] = meta
+    tool.base_command = command
+    assert tool['sbg:meta'] is meta and tool.base_command is command
+    hashes = [wf.calc_hash()]
+    for edit in (
+        lambda: meta.update(x=1),
+        lambda: meta['tags'].append('b'),
+        lambda: meta.__setitem__('tags', ['a', 'b']),
+        lambda: command.append('-v'),
+    ):
+        edit()
+        hashes.append(wf.calc_hash())
+        assert hashes[-1] == copy.deepcopy(wf).calc_hash()
+    assert len(set(hashes)) == len(hashes) - 1
+    assert hashes[-2] == hashes[-3]
+
+
+def test_calc_hash_stable():
+    wf = _hashed_wf()
+    code = (
+        'from sbg.cwl.tests.v1_0.wf.test_workflow import _hashed_wf; '
+        'print(_hashed_wf().calc_hash())'
+    )
+    out = subprocess.check_output(
+        [sys.executable, '-c', code], cwd=ROOT,
+        env=dict(os.environ, PYTHONHASHSEED='1')
+    )
+    assert out.decode().strip() == wf.calc_hash()
+    assert wf.steps[0].run.calc_hash() == wf.steps[2].run.calc_hash()
+    assert wf.calc_hash() != wf.steps[0].calc_hash()
@@ -1,6 +1,6 @@
 __all__ = [
     'Cwl', 'load', 'Primitive', 'is_number', 'is_primitive',
-    'tool_from', 'tool', 'workflow', 'to_tool',
+    'tool_from', 'tool', 'workflow', 'to_tool', 'to_tools',
     'CommandInput', 'CommandLineTool', 'CommandOutput', 'EnvVar',
     'EnvironmentDef', 'SchemaDef', 'Software', 'SoftwarePackage',
     'InitialWorkDir', 'Dirent', 'Docker',
@@ -15,7 +15,10 @@ __all__ = [
     'OutputRecordField', 'OutputEnum', 'OutputArray',
     'OutputBinding', 'App', 'from_bash', 'inherit_metadata',
     'Int', 'Float', 'Bool', 'String', 'Any', 'Array', 'Enum', 'Record', 'File',
-    'Dir', 'Union'
+    'Dir', 'Union', 'Codec', 'set_json_backend',
+    'DocumentCache', 'DiskCache', 'set_disk_cache', 'write_json',
+    'write_yaml', 'FileText', 'intern_strings', 'Graph',
+    'LocalExecutor', 'CommandLine', 'NodePool', 'set_engine', 'Scatter'
 ]
 
 from sbg.cwl.v1_0.app import App
@@ -24,10 +27,18 @@ from sbg.cwl.v1_0.load import load
 from sbg.cwl.v1_0.hints import (
     Int, Float, Bool, String, Any, Array, Enum, Record, File, Dir, Union
 )
-from sbg.cwl.v1_0.context import tool_from, tool, workflow, to_tool
+from sbg.cwl.v1_0.context import (
+    tool_from, tool, workflow, to_tool, to_tools
+)
 from sbg.cwl.v1_0.cmd import (
-    CommandInput, CommandLineTool, CommandOutput
+    CommandInput, CommandLineTool, CommandOutput, CommandLine
+)
+from sbg.cwl.v1_0.util import (
+    Codec, set_json_backend, DocumentCache, DiskCache, set_disk_cache,
+    write_json, write_yaml, FileText, intern_strings
 )
+from sbg.cwl.v1_0.executor import LocalExecutor
+from sbg.cwl.v1_0.expression import NodePool, set_engine
 from sbg.cwl.v1_0.types import Primitive, is_number, is_primitive
 from sbg.cwl.v1_0.requirement import (
     EnvVar, EnvironmentDef, SchemaDef, Software, SoftwarePackage,
@@ -36,7 +47,8 @@ from sbg.cwl.v1_0.requirement import (
 from sbg.cwl.v1_0.wf import (
     WorkflowInput, MergeMethod, WorkflowOutput, StepInput, StepOutput, Step,
     ScatterMethod, Workflow, SubworkflowFeature, ScatterFeature,
-    MultipleInputFeature, StepInputExpression, ExpressionTool
+    MultipleInputFeature, StepInputExpression, ExpressionTool, Graph,
+    Scatter
 )
 from sbg.cwl.v1_0.schema import (
     InputBinding, InputRecordField, InputRecord, InputEnum, InputArray,
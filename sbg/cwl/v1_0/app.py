@@ -6,8 +6,9 @@ from sbg.cwl.v1_0.types import Primitive
 from sbg.cwl.v1_0.base import Cwl, salad
 from sbg.cwl.v1_0.hints import TypeFactory
 from sbg.cwl.v1_0.check import to_str, to_list
+from sbg.cwl.v1_0.util import to_id_list, find_by_id
 from sbg.cwl.consts import (
-    SBG_NAMESPACE, INHERIT_SINGLE, INHERIT_MULTI, EXPRESSION_LIB
+    SBG_NAMESPACE, INHERIT_SINGLE, INHERIT_MULTI, EXPRESSION_LIB, INPUT_JSON
 )
 from sbg.cwl.v1_0.requirement import (
     InlineJavascript, Docker, Resource, ShellCommand, EnvVar, InitialWorkDir,
@@ -87,6 +88,9 @@ class App(Cwl):
      - Workflow
     """
 
+    # digest is cached (see ``Cwl.calc_hash``)
+    cache_digest = True
+
     def __init__(self, class_, cwl_version='v1.0', inputs=None, outputs=None,
                  id=None, requirements=None, hints=None, label=None, doc=None):
         super(App, self).__init__()
@@ -134,7 +138,7 @@ class App(Cwl):
         """
         self.add_file(
             entryname='input.json',
-            entry='$(JSON.stringify(inputs, null, 2))'
+            entry=INPUT_JSON
         )
 
     def find_requirement(self, name):
@@ -170,9 +174,7 @@ class App(Cwl):
         :param id: input id
         :return: input object
         """
-        for i in self.inputs:
-            if i.id == id:
-                return i
+        return find_by_id(self.inputs, id)
 
     def get_output(self, id):
         """
@@ -181,10 +183,7 @@ class App(Cwl):
         :param id: output id
         :return: output object
         """
-
-        for o in self.outputs:
-            if o.id == id:
-                return o
+        return find_by_id(self.outputs, id)
 
     def create_file(self, entry, entryname=None, writable=None, encode=False):
         """
@@ -607,7 +606,9 @@ class App(Cwl):
 
     @inputs.setter
     def inputs(self, value):
-        self['inputs'] = to_inputs(value, self._get_input_cls())
+        self['inputs'] = to_id_list(
+            to_inputs(value, self._get_input_cls())
+        )
 
     @property
     def outputs(self):
@@ -619,7 +620,9 @@ class App(Cwl):
 
     @outputs.setter
     def outputs(self, value):
-        self['outputs'] = to_outputs(value, self._get_output_cls())
+        self['outputs'] = to_id_list(
+            to_outputs(value, self._get_output_cls())
+        )
 
     @property
     def id(self):
@@ -1,9 +1,55 @@
+import os
 import re
-import yaml
-import json
-import hashlib
 import inspect
-from sbg.cwl.v1_0.util import from_file
+import threading
+import functools
+from contextlib import contextmanager
+from sbg.cwl.instrument import instrumented, instrument_method
+from sbg.cwl.v1_0.util import (
+    DocumentCache, TrackedDict, Lazy, digest, to_json, to_yaml, write_json,
+    write_yaml
+)
+
+
+class _LoadMode(threading.local):
+    trusted = False
+    lazy = False
+
+
+_mode = _LoadMode()
+
+
+@contextmanager
+def _load_mode(**kwargs):
+    previous = {k: getattr(_mode, k) for k in kwargs}
+    for k, v in kwargs.items():
+        setattr(_mode, k, v)
+    try:
+        yield
+    finally:
+        for k, v in previous.items():
+            setattr(_mode, k, v)
+
+
+def trusted():
+    """
+    Context in which documents are trusted: they are already valid and have
+    no salad $directives (e.g. previously dumped or returned by the platform).
+
+    Value checks from ``check`` and salad $directive detection are skipped,
+    conversion to CWL classes is the same. Used by ``load(trusted=True)``.
+    """
+
+    return _load_mode(trusted=True)
+
+
+def lazy():
+    """
+    Context in which ``run`` documents of workflow steps are kept raw and
+    converted on first access of ``Step.run``. Used by ``load(lazy=True)``.
+    """
+
+    return _load_mode(lazy=True)
 
 
 class CwlMeta(type):
@@ -20,56 +66,95 @@ class CwlMeta(type):
     first_cap_re = re.compile('(.)([A-Z][a-z]+)')
     all_cap_re = re.compile('([a-z0-9])([A-Z])')
 
+    # cls -> names of cls.__init__ parameters
+    _parameters = {}
+    # cls -> subclass initializing new objects (see ``_untracked``)
+    _untracked_classes = {}
+
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def to_(k):
         s1 = CwlMeta.first_cap_re.sub(r'\1_\2', k)
         return CwlMeta.all_cap_re.sub(r'\1_\2', s1).lower()
 
+    def _init_parameters(cls):
+        """Returns names of ``cls.__init__`` parameters (cached per class)."""
+
+        try:
+            return CwlMeta._parameters[cls]
+        except KeyError:
+            signature = inspect.signature(cls.__init__)
+            parameters = frozenset(signature.parameters)
+            CwlMeta._parameters[cls] = parameters
+            return parameters
+
+    def _untracked(cls):
+        """
+        Returns subclass of ``cls`` storing items with plain
+        ``dict.__setitem__``. New objects are initialized as its instances
+        and then turned into ``cls`` ones: no digest depends on them yet, so
+        property setters skip the tracking hook (see ``Tracked``).
+        """
+
+        try:
+            return CwlMeta._untracked_classes[cls]
+        except KeyError:
+            sub = type.__new__(type(cls), cls.__name__, (cls,), {
+                '__setitem__': dict.__setitem__,
+                '__module__': cls.__module__,
+                '__qualname__': cls.__qualname__
+            })
+            CwlMeta._untracked_classes[cls] = sub
+            return sub
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def param_name(k):
+        """Returns ``__init__`` parameter name for document key ``k``."""
+
+        if ':' in k:
+            return k
+        k = CwlMeta.to_(k)
+        return 'in_' if k == 'in' else k
+
     @staticmethod
     def params_to_(obj, params):
         kwargs = {}
         for k, v in obj.items():
-            k_old = k
-            if k.count(":") == 0:
-                k = CwlMeta.to_(k)
-            if k == 'class':
+            name = CwlMeta.param_name(k)
+            if name == 'class':
                 continue
-            elif k == 'in':
-                k = 'in_'
-            if k in params:
-                kwargs[k] = v
+            if name in params:
+                kwargs[name] = v
             else:
-                kwargs[k_old] = v
+                kwargs[k] = v
         return kwargs
 
     def __call__(cls, *args, **kwargs):
-        signature = inspect.signature(cls.__init__)
-        parameters = signature.parameters.values()
-        kwargs = CwlMeta.params_to_(kwargs, [p.name for p in parameters])
-
-        if not args:
-            args_names = [x.name for x in signature.parameters.values()
-                          if x.default == inspect._empty]
-            args_names.remove('self')
-            args_names = tuple(args)
-
-            args = list(map(lambda x: kwargs[x], args_names))
-
-            for k in args_names:
-                if k in kwargs:
-                    del kwargs[k]
-
-        parameters = {p.name for p in parameters}
-        cwl_kwargs = {k: v for k, v in kwargs.items() if k in parameters}
-        obj = type.__call__(cls, *args, **cwl_kwargs)
+        parameters = cls._init_parameters()
+        cwl_kwargs = {}
+        ext = {}
+        for k, v in kwargs.items():
+            name = CwlMeta.param_name(k)
+            if name in parameters:
+                cwl_kwargs[name] = v
+            elif name != 'class':
+                ext[k] = v
+        obj = type.__call__(cls._untracked(), *args, **cwl_kwargs)
+        obj.__class__ = cls
         empty_keys = [k for k, v in obj.items() if v is None]
+        # new object, nothing to invalidate
         for k in empty_keys:
-            del obj[k]
-
-        ext = set(set(kwargs.keys())).difference(set(cwl_kwargs.keys()))
-        for k in ext:
-            if ':' in k or '$' in k:
-                obj[k] = to_salad_recursive(kwargs[k])
+            dict.__delitem__(obj, k)
+
+        if not ext:
+            return obj
+        trusted = _mode.trusted
+        for k, v in ext.items():
+            if trusted:
+                obj[k] = v
+            elif ':' in k or '$' in k:
+                obj[k] = to_salad_recursive(v)
             else:
                 raise RuntimeError(
                     'Found unsupported salad extension: {}'.format(k)
@@ -77,16 +162,16 @@ class CwlMeta(type):
         return obj
 
 
-class Cwl(dict, metaclass=CwlMeta):
+instrument_method(CwlMeta, '__call__', 'CwlMeta.__call__')
+
+
+class Cwl(TrackedDict, metaclass=CwlMeta):
     """Super class for all CWL v1.0 subclasses."""
 
     __version__ = 'v1.0'
 
     def __str__(self):
-        return yaml.dump(
-            yaml.load(json.dumps(self, indent=2), Loader=yaml.SafeLoader),
-            default_flow_style=False
-        )
+        return to_yaml(self)
 
     def to_json(self):
         """
@@ -94,54 +179,61 @@ class Cwl(dict, metaclass=CwlMeta):
 
         :return: serialized object
         """
-        return json.dumps(self, indent=2)
+        return to_json(self, indent=2)
 
     def to_dict(self):
         return dict(self)
 
+    @instrumented('Cwl.calc_hash')
     def calc_hash(self):
         """
         Returns calculated hash value for this object.
 
-        :return: hash value using hashlib.sha512 encoded with ``utf-8``
+        Digests of nested objects are cached (see ``digest``), so hashing
+        again after an edit recomputes only the edited path.
+
+        :return: hash value using hashlib.sha512
         """
-        sha = hashlib.sha512()
-        sha.update(json.dumps(self, sort_keys=True).encode('utf-8'))
-        return sha.hexdigest()
+        return digest(self)
 
     def __repr__(self):
         return self.__str__()
 
     def dump(self, path):
         """
-        Dump this object into file formated as YAML.
+        Dump this object into file formated as YAML. Document is written
+        while it is serialized (see ``write_yaml``).
 
         :param path: file path
         """
 
         with open(path, 'w') as out:
-            out.write(self.__str__())
+            write_yaml(self, out)
 
     def json_dump(self, path):
         """
-        Dump this object into file formated as JSON.
+        Dump this object into file formated as JSON. Document is written
+        while it is serialized (see ``write_json``).
 
         :param path: file path
         """
-        with open(path, 'w') as out:
-            out.write(self.to_json())
+        with open(path, 'w', encoding='utf-8') as out:
+            write_json(self, out, indent=2)
 
-    def resolve(self):
+    def resolve(self, cache=None):
         """
         Resolve all salad schema $directives inside object
         ($mixin, $include, $import).
+
+        :param cache: ``DocumentCache`` shared between calls (by default
+                      every file is parsed once per call)
         """
-        resolve(self)
+        resolve(self, cache=cache)
 
 
 class SaladBase(Cwl):
 
-    def resolve_salad(self):
+    def resolve_salad(self, context=None):
         raise NotImplementedError()
 
 
@@ -151,9 +243,9 @@ class SaladInclude(SaladBase):
     def __init__(self, d):
         super(SaladInclude, self).__init__(d)
 
-    def resolve_salad(self):
-        with open(self["$include"]) as fp:
-            return fp.read()
+    def resolve_salad(self, context=None):
+        context = context or SaladContext()
+        return context.include(self["$include"])
 
 
 class SaladImport(SaladBase):
@@ -162,8 +254,9 @@ class SaladImport(SaladBase):
     def __init__(self, d):
         super(SaladImport, self).__init__(d)
 
-    def resolve_salad(self):
-        return resolve(from_file(self["$import"]))
+    def resolve_salad(self, context=None):
+        context = context or SaladContext()
+        return context.import_(self["$import"])
 
 
 class SaladMixin(SaladBase):
@@ -172,36 +265,102 @@ class SaladMixin(SaladBase):
     def __init__(self, d):
         super(SaladMixin, self).__init__(d)
 
-    def resolve_salad(self):
+    def resolve_salad(self, context=None):
+        context = context or SaladContext()
         x = dict()
         for k, v in self.items():
             if k == "$mixin":
-                d = from_file(self["$mixin"])
+                d = context.import_(self["$mixin"])
                 for k2, v2 in d.items():
                     if k2 not in self:
                         x[k2] = v2
             else:
                 x[k] = v
+        return context.resolve(x)
+
+
+class SaladContext(object):
+    """
+    State of a single salad $directives resolution. Files are loaded through
+    ``DocumentCache``, relative paths in loaded files are resolved against
+    their directory and cyclic imports are reported with the import chain.
+
+    :param cache: ``DocumentCache`` (default new unbounded cache)
+    """
+
+    directives = {
+        '$import': SaladImport,
+        '$include': SaladInclude,
+        '$mixin': SaladMixin
+    }
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else DocumentCache()
+        self.chain = []
+
+    def path(self, path):
+        """Returns absolute ``path`` relative to the importing document."""
+
+        if self.chain and not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(self.chain[-1]), path)
+        return os.path.abspath(path)
+
+    def include(self, path):
+        """Returns text of file ``path``."""
+
+        return self.cache.read(self.path(path))
+
+    def import_(self, path):
+        """Returns resolved document from file ``path``."""
+
+        path = self.path(path)
+        if path in self.chain:
+            raise ValueError('Cyclic $import: {}'.format(
+                ' -> '.join(self.chain + [path])
+            ))
+        self.chain.append(path)
+        try:
+            return self.resolve(self.cache.load(path))
+        finally:
+            self.chain.pop()
+
+    def resolve(self, x):
+        """Load all remote salad $directives into object"""
+
+        if isinstance(x, Lazy):
+            x = x.materialize()
+        if isinstance(x, dict) and not isinstance(x, Cwl):
+            # documents loaded from files are plain dicts
+            for k, cls in self.directives.items():
+                if k in x:
+                    x = cls(x)
+                    break
+        if isinstance(x, SaladBase):
+            x = x.resolve_salad(self)
+        elif isinstance(x, dict):
+            for k, v in x.items():
+                if isinstance(v, (dict, Lazy)):
+                    x[k] = self.resolve(v)
+                elif isinstance(v, list):
+                    mapped = list(map(self.resolve, v))
+
+                    if hasattr(x, k):
+                        setattr(x, k, mapped)
+                    else:
+                        x[k] = mapped
         return x
 
 
-def resolve(x):
-    """Load all remote salad $directives into object"""
+@instrumented('resolve')
+def resolve(x, cache=None):
+    """
+    Load all remote salad $directives into object.
 
-    if isinstance(x, SaladBase):
-        x = x.resolve_salad()
-    elif isinstance(x, dict):
-        for k, v in x.items():
-            if isinstance(v, dict):
-                x[k] = resolve(v)
-            elif isinstance(v, list):
-                mapped = list(map(resolve, v))
-
-                if hasattr(x, k):
-                    setattr(x, k, mapped)
-                else:
-                    x[k] = mapped
-    return x
+    :param x: object
+    :param cache: ``DocumentCache`` shared between calls
+    """
+
+    return SaladContext(cache).resolve(x)
 
 
 def salad(wrapped):
@@ -209,7 +368,7 @@ def salad(wrapped):
 
     def wrapper(*args, **kwargs):
         value = args[0]
-        if isinstance(value, dict):
+        if isinstance(value, dict) and not _mode.trusted:
             if "$import" in value:
                 return SaladImport(value)
             elif "$include" in value:
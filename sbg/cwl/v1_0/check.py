@@ -1,13 +1,29 @@
-from sbg.cwl.v1_0.base import salad
+from sbg.cwl.v1_0.base import salad, _mode
 from sbg.cwl.v1_0.util import is_instance_both
 
 
-@salad
+def check(wrapped):
+    """
+    Decorator for value checks, handles salad $directives like ``salad``.
+    Inside ``trusted`` context value is returned unchecked.
+    """
+
+    checked = salad(wrapped)
+
+    def wrapper(value):
+        if _mode.trusted:
+            return value
+        return checked(value)
+
+    return wrapper
+
+
+@check
 def to_any(value):
     return value
 
 
-@salad
+@check
 def to_str_int(value):
     if value is not None:
         if isinstance(value, (str, int)):
@@ -16,7 +32,7 @@ def to_str_int(value):
             raise TypeError('Expected str|int, got {}'.format(type(value)))
 
 
-@salad
+@check
 def to_bool(value):
     if value is not None:
         if isinstance(value, bool):
@@ -25,7 +41,7 @@ def to_bool(value):
             raise TypeError('Expected bool, got: {}'.format(type(value)))
 
 
-@salad
+@check
 def to_str(value):
     if value is not None:
         if isinstance(value, str):
@@ -34,7 +50,7 @@ def to_str(value):
             raise TypeError('Expected str, got: {}'.format(type(value)))
 
 
-@salad
+@check
 def to_int(value):
     if value is not None:
         if isinstance(value, int):
@@ -43,7 +59,7 @@ def to_int(value):
             raise TypeError('Expected int, got: {}'.format(type(value)))
 
 
-@salad
+@check
 def to_list(value):
     if value is not None:
         if isinstance(value, list):
@@ -52,7 +68,7 @@ def to_list(value):
             raise TypeError('Expected list, got {}'.format(type(value)))
 
 
-@salad
+@check
 def to_slist(obj):
     if obj is not None:
         if isinstance(obj, list):
@@ -61,7 +77,7 @@ def to_slist(obj):
             raise TypeError('Expected list[str], got: {}'.format(type(obj)))
 
 
-@salad
+@check
 def to_ilist(obj):
     if obj is not None:
         if isinstance(obj, list):
@@ -70,7 +86,7 @@ def to_ilist(obj):
             raise TypeError('Expected list[int], got: {}'.format(type(obj)))
 
 
-@salad
+@check
 def to_str_slist(value):
     if value is not None:
         if is_instance_both(value, str):
@@ -1,7 +1,8 @@
 __all__ = [
-    'CommandLineTool', 'CommandInput', 'CommandOutput'
+    'CommandLineTool', 'CommandInput', 'CommandOutput', 'CommandLine'
 ]
 
 from sbg.cwl.v1_0.cmd.input import CommandInput
 from sbg.cwl.v1_0.cmd.output import CommandOutput
 from sbg.cwl.v1_0.cmd.tool import CommandLineTool
+from sbg.cwl.v1_0.cmd.command_line import CommandLine
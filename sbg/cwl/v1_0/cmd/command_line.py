@@ -0,0 +1,375 @@
+import shlex
+from sbg.cwl.v1_0.util import local_id
+from sbg.cwl.v1_0.expression import evaluate
+from sbg.cwl.v1_0.requirement import InlineJavascript, SchemaDef, ShellCommand
+
+_NUMBERS = ('int', 'long', 'float', 'double')
+
+
+def _tostr(value):
+    if isinstance(value, dict) and value.get('class') in ('File', 'Directory'):
+        return value['path']
+    return str(value)
+
+
+def _find(cls, tool):
+    for attr in ('requirements', 'hints'):
+        for r in tool.get(attr) or []:
+            if isinstance(r, cls):
+                return r
+    return None
+
+
+class _Binding(object):
+    """``inputBinding`` turned into arguments of a value."""
+
+    __slots__ = ('prefix', 'separate', 'item_separator', 'value_from',
+                 'quote')
+
+    def __init__(self, binding):
+        self.prefix = binding.get('prefix')
+        self.separate = binding.get('separate') is not False
+        self.item_separator = binding.get('itemSeparator')
+        self.value_from = binding.get('valueFrom')
+        self.quote = binding.get('shellQuote') is not False
+
+    def args(self, value):
+        """Returns command line arguments of ``value``."""
+
+        prefix = self.prefix
+        if isinstance(value, list):
+            if not value:
+                # empty arrays are not bound, their prefix neither
+                return []
+            if self.item_separator is not None:
+                args = [self.item_separator.join(_tostr(v) for v in value)]
+            elif self.value_from is not None:
+                args = [_tostr(v) for v in value]
+            else:
+                # items are bound by their own bindings
+                return [prefix] if prefix else []
+        elif isinstance(value, dict) and value.get('class') not in (
+                'File', 'Directory'):
+            # fields are bound by their own bindings
+            return [prefix] if prefix else []
+        elif value is True:
+            return [prefix] if prefix else []
+        elif value is None or value is False:
+            return []
+        else:
+            args = [_tostr(value)]
+        if not prefix:
+            return args
+        if self.separate:
+            return [prefix] + args
+        return [prefix + a for a in args[:1]] + args[1:]
+
+    def render(self, value, ctx, out):
+        """
+        Appends ``(argument, quote)`` pairs of ``value`` to ``out`` and
+        returns the value, ``valueFrom`` evaluated.
+        """
+
+        if self.value_from is not None:
+            value = evaluate(
+                self.value_from, dict(ctx.context, self=value), ctx.lib
+            )
+        out.extend((a, self.quote) for a in self.args(value))
+        return value
+
+
+class _Context(object):
+    __slots__ = ('context', 'lib')
+
+    def __init__(self, context, lib):
+        self.context = context
+        self.lib = lib
+
+
+class CommandLine(object):
+    """
+    Renders command lines of ``CommandLineTool`` jobs as described by the
+    CWL v1.0 specification: ``baseCommand`` followed by ``arguments`` and
+    input bindings sorted by ``position`` and then by argument index or
+    input id, nested array items and record fields following their parent.
+
+    Bindings of the tool are compiled once into a sorted plan, rendering of
+    a job only walks the plan, so many jobs of the same tool (scatter,
+    batches) are rendered without sorting or inspecting types again.
+
+    :param tool: ``CommandLineTool``
+    :param shell: if True the command line is a ``/bin/sh -c`` command with
+                  arguments quoted unless ``shellQuote: false``, by default
+                  True if the tool has ``ShellCommandRequirement``
+    :param expression_lib: JavaScript code fragments for expressions, by
+                           default ones of the tool's
+                           ``InlineJavascriptRequirement``
+
+    Example:
+
+    .. code-block:: python
+
+       from sbg import cwl
+
+       line = cwl.CommandLine(cwl.load('tool.cwl'))
+       line.render({'reads': {'class': 'File', 'path': 'reads.fastq'}})
+       for argv in line.render_all(jobs):
+           ...
+    """
+
+    def __init__(self, tool, shell=None, expression_lib=None):
+        if shell is None:
+            shell = _find(ShellCommand, tool) is not None
+        if expression_lib is None:
+            r = _find(InlineJavascript, tool)
+            expression_lib = r.expression_lib if r else None
+        self.tool = tool
+        self.shell = shell
+        self.expression_lib = expression_lib
+        self._names = {}
+        r = _find(SchemaDef, tool)
+        for t in (r.types if r else None) or []:
+            if isinstance(t, dict) and t.get('name'):
+                self._names[local_id(t['name'])] = t
+        base = tool.base_command
+        if isinstance(base, str):
+            base = [base]
+        self._base = [(a, True) for a in base or []]
+        # (id, default) of all inputs, bound or not
+        self._inputs = [
+            (local_id(i.id), i.default) for i in tool.inputs or []
+        ]
+        self._plan = self._compile_plan()
+
+    # region compile
+    def _compile_plan(self):
+        entries = []
+        for k, a in enumerate(self.tool.arguments or []):
+            if isinstance(a, str):
+                a = {'valueFrom': a}
+            entries.append(((a.get('position') or 0, 0, k), None,
+                            self._binding_node(_Binding(a))))
+        for i in self.tool.inputs or []:
+            id = local_id(i.id)
+            node = self._compile(i.type, i.get('inputBinding'))
+            if node is not None:
+                entries.append((
+                    ((i.get('inputBinding') or {}).get('position') or 0,
+                     1, id), id, node
+                ))
+        entries.sort(key=lambda e: e[0])
+        return [(id, node) for _, id, node in entries]
+
+    @staticmethod
+    def _binding_node(binding):
+        def node(value, ctx, out):
+            binding.render(value, ctx, out)
+
+        return node
+
+    def _resolve(self, t):
+        """Returns type ``t`` with shortcuts expanded and names resolved."""
+
+        if isinstance(t, str):
+            if t.endswith('?'):
+                return ['null', t[:-1]]
+            if t.endswith('[]'):
+                return {'type': 'array', 'items': t[:-2]}
+            name = local_id(t)
+            if name in self._names:
+                return self._names[name]
+        return t
+
+    def _compile(self, t, binding):
+        """
+        Returns function ``node(value, ctx, out)`` appending arguments of
+        ``value`` of type ``t`` bound by ``binding`` or None if nothing of
+        the type is bound.
+        """
+
+        t = self._resolve(t)
+        if isinstance(t, list):
+            return self._compile_union(t, binding)
+        if isinstance(t, dict):
+            kind = t.get('type')
+            if kind == 'array':
+                return self._compile_array(t, binding)
+            if kind == 'record':
+                return self._compile_record(t, binding)
+        if binding is None:
+            return None
+        return self._binding_node(_Binding(binding))
+
+    def _compile_union(self, types, binding):
+        alternatives = [
+            (self._resolve(t), self._compile(t, binding)) for t in types
+        ]
+        if all(node is None for _, node in alternatives):
+            return None
+        others = [n for t, n in alternatives if t != 'null']
+        if len(others) == 1 and len(alternatives) == 2:
+            # optional type, the value needs no matching
+            null = alternatives[0][1] if types[0] == 'null' else (
+                alternatives[1][1]
+            )
+            other = others[0]
+
+            def optional(value, ctx, out):
+                if value is None:
+                    if null is not None:
+                        null(value, ctx, out)
+                elif other is not None:
+                    other(value, ctx, out)
+
+            return optional
+        matches = self._matches
+        # the type of an unexpected value (e.g. of a default) decides
+        fallback = (
+            self._binding_node(_Binding(binding)) if binding is not None
+            else None
+        )
+
+        def node(value, ctx, out):
+            for t, n in alternatives:
+                if matches(t, value):
+                    if n is not None:
+                        n(value, ctx, out)
+                    return
+            if fallback is not None:
+                fallback(value, ctx, out)
+
+        return node
+
+    def _compile_array(self, t, binding):
+        item_binding = t.get('inputBinding')
+        if (item_binding is None and binding is not None and
+                binding.get('itemSeparator') is None):
+            item_binding = {}
+        items = self._compile(t.get('items'), item_binding)
+        outer = _Binding(binding) if binding is not None else None
+        if outer is None and items is None:
+            return None
+
+        def node(value, ctx, out):
+            if outer is not None:
+                outer.render(value, ctx, out)
+                if outer.value_from is not None:
+                    return
+            if items is not None and isinstance(value, list):
+                for v in value:
+                    items(v, ctx, out)
+
+        return node
+
+    def _compile_record(self, t, binding):
+        fields = []
+        for f in t.get('fields') or []:
+            b = f.get('inputBinding')
+            n = self._compile(f.get('type'), b)
+            if n is not None:
+                name = local_id(f['name'])
+                fields.append((((b or {}).get('position') or 0, name), n))
+        fields.sort(key=lambda x: x[0])
+        fields = [(name, n) for (_, name), n in fields]
+        outer = _Binding(binding) if binding is not None else None
+        if outer is None and not fields:
+            return None
+
+        def node(value, ctx, out):
+            if outer is not None:
+                outer.render(value, ctx, out)
+                if outer.value_from is not None:
+                    return
+            if isinstance(value, dict):
+                for name, n in fields:
+                    n(value.get(name), ctx, out)
+
+        return node
+
+    def _matches(self, t, value):
+        """Returns True if ``value`` is of (resolved) type ``t``."""
+
+        if isinstance(t, dict):
+            kind = t.get('type')
+            if kind == 'array':
+                return isinstance(value, list)
+            if kind == 'record':
+                return isinstance(value, dict) and 'class' not in value
+            if kind == 'enum':
+                return value in [local_id(s) for s in t.get('symbols') or []]
+            return False
+        if isinstance(t, list):
+            return any(self._matches(self._resolve(x), value) for x in t)
+        if t == 'null':
+            return value is None
+        if t == 'Any':
+            return value is not None
+        if t == 'boolean':
+            return isinstance(value, bool)
+        if isinstance(value, bool):
+            return False
+        if t in ('int', 'long'):
+            return isinstance(value, int)
+        if t in _NUMBERS:
+            return isinstance(value, (int, float))
+        if t == 'string':
+            return isinstance(value, str)
+        if t in ('File', 'Directory'):
+            return isinstance(value, dict) and value.get('class') == t
+        return False
+
+    # endregion
+
+    # region render
+    def arguments(self, inputs, runtime=None):
+        """
+        Returns command line as list of ``(argument, quote)`` pairs, where
+        ``quote`` is False for arguments bound with ``shellQuote: false``.
+
+        :param inputs: input object of the job, defaults of missing inputs
+                       are used
+        :param runtime: ``runtime`` object of expressions
+        """
+
+        filled = dict(inputs)
+        for id, default in self._inputs:
+            if filled.get(id) is None and default is not None:
+                filled[id] = default
+        ctx = _Context(
+            {'inputs': filled, 'self': None, 'runtime': runtime or {}},
+            self.expression_lib
+        )
+        out = list(self._base)
+        for id, node in self._plan:
+            node(filled.get(id) if id is not None else None, ctx, out)
+        return out
+
+    def render(self, inputs, runtime=None):
+        """
+        Returns command line of a job as list of arguments, if ``shell``
+        a ``/bin/sh -c`` command.
+
+        :param inputs: input object of the job
+        :param runtime: ``runtime`` object of expressions
+        """
+
+        args = self.arguments(inputs, runtime)
+        if self.shell:
+            return ['/bin/sh', '-c', ' '.join(
+                shlex.quote(a) if quote else a for a, quote in args
+            )]
+        return [a for a, _ in args]
+
+    def render_all(self, jobs, runtime=None):
+        """
+        Yields command lines of input objects ``jobs`` (see ``render``).
+
+        :param jobs: iterable of input objects
+        :param runtime: ``runtime`` object of expressions
+        """
+
+        render = self.render
+        for inputs in jobs:
+            yield render(inputs, runtime)
+
+    # endregion
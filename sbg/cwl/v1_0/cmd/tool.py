@@ -10,14 +10,16 @@ from sbg.cwl.sbg.hints import SaveLogs
 from sbg.cwl.v1_0.base import salad
 from sbg.cwl.serialize import consts
 from sbg.cwl.serialize import deploy
+from sbg.cwl.serialize.cache import get_cache, file_stamps
 from sbg.cwl.v1_0.cmd.input import CommandInput
 from sbg.cwl.v1_0.cmd.output import CommandOutput
-from sbg.cwl.consts import BASH_BUNDLE_NAME, BASH_LIB
+from sbg.cwl.v1_0.cmd.command_line import CommandLine
+from sbg.cwl.consts import BASH_BUNDLE, BASH_LIB
 from sbg.cwl.serialize.consts import OUT_PATH, UTIL_PATH
 from sbg.cwl.v1_0.schema import InputBinding, OutputBinding
 from sbg.cwl.v1_0.check import to_str_slist, to_str, to_ilist
 from sbg.cwl.v1_0.util import (
-    is_instance_all, is_instance_all_dict, archive
+    is_instance_all, is_instance_all_dict, archive, Codec
 )
 from sbg.cwl.v1_0.hints import (
     String, Int, Float, Bool, Any, Hint, File, Dir, Array, Union, Enum,
@@ -141,13 +143,16 @@ class CommandLineTool(App):
 
     # region utils
 
-    def unarchive_bundle(self, bundle, encoded=False, postprocess=None):
+    def unarchive_bundle(self, bundle, encoded=False, postprocess=None,
+                         codec=None):
         """
         Adds first unarchiving command as first argument. It can also decode
         base64 encoded bundles.
 
         :param bundle: bundle name
         :param encoded: flag which indicates that ``bundle`` is base64 encoded
+        :param codec: bundle compression codec (default taken from ``bundle``
+                      name, ``bz2`` if name does not contain it)
         """
         m = 0
         if self.arguments:
@@ -159,26 +164,32 @@ class CommandLineTool(App):
         else:
             self.arguments = []
         ib = self.get_unarchive_argument(
-            bundle, encoded=encoded, postprocess=postprocess
+            bundle, encoded=encoded, postprocess=postprocess, codec=codec
         )
         if m != 0:
             ib.position = m
         self.arguments.insert(0, ib)
 
     @staticmethod
-    def get_unarchive_argument(bundle, encoded=False, postprocess=None):
+    def get_unarchive_argument(bundle, encoded=False, postprocess=None,
+                               codec=None):
         """
         Returns ``InputBinding`` argument with untar command.
 
         :param bundle: archive name
         :param encoded: flag which indicates that ``bundle`` is base64 encoded
+        :param codec: bundle compression codec (default taken from ``bundle``
+                      name, ``bz2`` if name does not contain it)
         :return: an instance of ``InputBinding`` which is an argument
         """
 
+        if not codec:
+            codec = Codec.from_name(bundle)
         ib = InputBinding(
             shell_quote=False,
-            value_from='cat {name} {decode}| tar xjf - ; {proc}'.format(
+            value_from='cat {name} {decode}| {untar} ; {proc}'.format(
                 decode='| base64 --decode ' if encoded else '',
+                untar=Codec.UNTAR[codec],
                 name=bundle,
                 proc="{} ;".format(
                     postprocess.rstrip(';')
@@ -308,10 +319,16 @@ class CommandLineTool(App):
             ))
         return '\n'.join(args)
 
-    def _listing_from_f(self, func, name):
+    def _listing_from_f(self, func, name, codec=Codec.BZIP2):
         """
         Sets all init workdir requirements necessary for running python
         function `f`.
+
+        With artifact cache enabled (see ``serialize.set_cache_dir``) the
+        listing is looked up by a key built from the dependencies of `f`
+        (``serialize.Context.fingerprint``) and stamps of bundled files,
+        before the script and the bundle are built. Dependencies are still
+        collected on cache hits, they are known only from walking `f`.
         """
 
         def rrm_pycache(dir):
@@ -326,9 +343,9 @@ class CommandLineTool(App):
             for m in {os.path.join(working_dir, m) for m in modules}:
                 rrm_pycache(m)
 
-        def tar_modules(modules, extra=None):
-            """Create a tar file of provided module list with paths, inside the
-            tar, are relative to the working_dir.
+        def bundle_modules(modules, extra=None):
+            """Returns paths and arcnames of provided module list with paths,
+            inside the tar, relative to the working_dir.
             """
 
             working_dir = os.getcwd()
@@ -338,68 +355,94 @@ class CommandLineTool(App):
                 m.replace(working_dir, '', 1).lstrip('/').split('/')[0]
                 for m in modules
             }
-            rm_pycache(modules, working_dir)
             arcnames = dict()
-            for obj in sorted(extra):
+            for obj in sorted(extra, key=lambda x: x['path']):
                 if os.path.isfile(obj['path']):
                     modules.add(obj['path'])
                     arcnames[obj['path']] = obj['name']
-            return archive(modules, encode=True, arcnames=arcnames)
+            return modules, arcnames
 
         context = serialize.Context(func)
         context.add(name, func)
 
         util_file = deploy.__file__
+        bundle_name = Codec.bundle_name(name, codec)
+        modules, arcnames = bundle_modules(context.modules, extra=[
+            dict(
+                name=UTIL_PATH,
+                path=util_file
+            )
+        ])
+
+        cache = get_cache()
+        if cache:
+            # sources of classes are not in the fingerprint
+            source_file = inspect.getsourcefile(func)
+            key = cache.key(
+                name, bundle_name, func.__qualname__, consts.SCAFOLD,
+                context.fingerprint(), sorted(arcnames.items()),
+                file_stamps(sorted(modules) + [source_file])
+            )
+            entries = cache.get(key)
+            if entries is not None:
+                return [Dirent(**e) for e in entries]
+
+        rm_pycache(modules - set(arcnames), os.getcwd())
+        script = consts.SCAFOLD.format(
+            bundle_name=bundle_name,
+            b64untar=inspect.getsource(deploy.b64untar),
+            imports='\n'.join(context.create_imports()),
+            variables='\n\n'.join(context.create_variables()),
+            functions='\n\n'.join(context.create_functions()),
+            classes='\n\n'.join(context.create_classes()),
+            function=func.__name__
+        )
 
-        return [
+        listing = [
             self.create_file(
                 entryname="{}.py.b64".format(name),
-                entry=consts.SCAFOLD.format(
-                    archive_name=name,
-                    b64untar=inspect.getsource(deploy.b64untar),
-                    imports='\n'.join(context.create_imports()),
-                    variables='\n\n'.join(context.create_variables()),
-                    functions='\n\n'.join(context.create_functions()),
-                    classes='\n\n'.join(context.create_classes()),
-                    function=func.__name__
-                ),
+                entry=script,
                 encode=True
             ),
             Dirent(
-                entryname='{}.tar.bz2.b64'.format(name),
-                entry=tar_modules(context.modules, extra=[
-                    dict(
-                        name=UTIL_PATH,
-                        path=util_file
-                    )
-                ])
+                entryname=bundle_name,
+                entry=archive(
+                    modules, encode=True, arcnames=arcnames, codec=codec
+                )
             )
         ]
+        if cache:
+            cache.put(key, listing)
+        return listing
 
-    def _create_file_from(self, f, name=None):
+    def _create_file_from(self, f, name=None, codec=Codec.BZIP2):
         """
         Creates all init workdir requirements necessary for running python
         function `f`.
         """
         if not name:
             name = f.__name__
-        for r in self._listing_from_f(f, name):
+        for r in self._listing_from_f(f, name, codec=codec):
             self.add_in_workdir(r)
 
-    def add_locals(self, locals, name, postprocess=None):
+    def add_locals(self, locals, name, postprocess=None, codec=None):
         """
         Add local files/dirs to tool in runtime.
 
         :param locals: list with paths
         :param name: bundle name in runtime
         :param postprocess: bash operation after unarchiving a bundle
+        :param codec: bundle compression codec (see ``Codec``), default is
+                      taken from ``name`` (``bz2`` if name does not contain it)
         """
 
+        if not codec:
+            codec = Codec.from_name(name)
         names = list(map(os.path.abspath, locals))
-        entry = archive(names, encode=True)
+        entry = archive(names, encode=True, codec=codec)
         self.add_file(entry=entry, entryname=name)
         self.unarchive_bundle(
-            bundle=name, encoded=True, postprocess=postprocess
+            bundle=name, encoded=True, postprocess=postprocess, codec=codec
         )
 
         if not self.hints:
@@ -481,7 +524,8 @@ class CommandLineTool(App):
     @classmethod
     def from_bash(cls, script, name='script.sh', id=None, label=None, doc=None,
                   inputs=None, outputs=None, sources=None, lib=None,
-                  docker=None, secondary_files=None, stdout=None):
+                  docker=None, secondary_files=None, stdout=None,
+                  codec=None):
         """
         Creates CommandLineTool created from bash script.
 
@@ -506,10 +550,12 @@ class CommandLineTool(App):
         :param secondary_files: dictionary where key is input/output id and
                                 value is secondary files
         :param stdout: standard output redirect to this file
+        :param codec: compression codec for bundle with sources
+                      (default is taken from ``lib`` name or ``bz2``)
         :return: an instance of ``cwl.CommandLineTool``
         """
         if not lib:
-            lib = BASH_BUNDLE_NAME
+            lib = Codec.bundle_name(BASH_BUNDLE, codec or Codec.BZIP2)
         if not sources:
             sources = []
         sources.append(BASH_LIB)
@@ -549,7 +595,7 @@ class CommandLineTool(App):
                 raise ValueError(
                     'Argument lib should be provided when sources are used.'
                 )
-            t.add_locals(sources, lib)
+            t.add_locals(sources, lib, codec=codec)
             sources_str = ''.join(map(
                 lambda x: "source {} && ".format(
                     os.path.basename(x)
@@ -609,6 +655,17 @@ class CommandLineTool(App):
         t = cls.add_sbg_namespace(t)
         return t
 
+    def command_line(self, inputs, runtime=None):
+        """
+        Returns command line of a job of the tool as list of arguments (see
+        ``CommandLine``), use ``CommandLine`` directly to render many jobs.
+
+        :param inputs: input object of the job
+        :param runtime: ``runtime`` object of expressions
+        """
+
+        return CommandLine(self).render(inputs, runtime)
+
     # endregion
 
     # region override
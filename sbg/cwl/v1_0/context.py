@@ -1,8 +1,11 @@
 import sys
+import types
 import inspect
 import functools
+import importlib
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
-from sbg.cwl.v1_0.util import from_file
+from sbg.cwl.v1_0.util import from_file, Codec
 from sbg.cwl.v1_0.schema import InputBinding
 from sbg.cwl.v1_0.wf.workflow import Workflow
 from sbg.cwl.v1_0.cmd.tool import CommandLineTool
@@ -13,7 +16,7 @@ from sbg.cwl.v1_0.requirement.inline_javascript import (
 )
 
 
-def _tool_from(t, f):
+def _tool_from(t, f, codec=Codec.BZIP2):
     """Generates an instance of CommandLineTool from annotated function."""
 
     doc = inspect.getdoc(f)
@@ -47,7 +50,7 @@ def _tool_from(t, f):
         ),
         py, "{}.py".format(f.__name__)
     ]
-    t._create_file_from(f)
+    t._create_file_from(f, codec=codec)
     t.add_input_json()
     return t
 
@@ -223,7 +226,8 @@ def to_tool(
         # helpers
         docker=None,  # Docker image
         js=True,  # Add InlineJavascriptRequirement
-        sh=True  # Add ShellCommandRequirement
+        sh=True,  # Add ShellCommandRequirement
+        codec=Codec.BZIP2  # Compression codec for bundled modules
 ):
     """
     .. decorator:: to_tool
@@ -257,6 +261,8 @@ def to_tool(
     :param docker: specify a Docker image to retrieve using docker pull
     :param js: include ``InlineJavascriptRequirement``
     :param sh: include ``ShellCommandRequirement``
+    :param codec: compression codec for bundled local modules
+                  (see ``Codec``)
     :return: typing.Callable[..., CommandLineTool]
 
     Example:
@@ -296,7 +302,7 @@ def to_tool(
                 success_codes=success_codes,
                 temporary_fail_codes=temporary_fail_codes,
                 permanent_fail_codes=permanent_fail_codes,
-                docker=docker, js=js, sh=sh
+                docker=docker, js=js, sh=sh, codec=codec
             )
             t = CommandLineTool(
                 inputs=[], outputs=[], id=id, requirements=requirements,
@@ -312,8 +318,72 @@ def to_tool(
                 t.add_requirement(InlineJavascript())
             if sh:
                 t.add_requirement(ShellCommand())
-            return _tool_from(t, f)
+            return _tool_from(t, f, codec=codec)
 
+        # marks wrapper as tool factory (used by ``to_tools``)
+        wrapper.is_to_tool = True
         return wrapper
 
     return deco
+
+
+def _build_tool(module, name):
+    """Builds tool in a worker process from wrapper ``module.name``."""
+
+    return getattr(importlib.import_module(module), name)()
+
+
+def to_tools(source, processes=None):
+    """
+    Generates tools from many ``@to_tool`` decorated functions using a pool of
+    processes.
+
+    Decorated functions have to be module level functions, because worker
+    processes look them up by their module and name.
+
+    :param source: module (all ``@to_tool`` functions defined in it are used)
+                   or list of ``@to_tool`` decorated functions
+    :param processes: number of worker processes (default number of CPUs),
+                      ``1`` builds all tools in the current process
+    :return: list of ``CommandLineTool`` in the same order as functions in
+             ``source``
+
+    Example:
+
+    .. code-block:: python
+
+       from sbg import cwl
+       import my_tools
+
+       tools = cwl.to_tools(my_tools)
+    """
+
+    if isinstance(source, types.ModuleType):
+        functions = [
+            f for f in vars(source).values()
+            if getattr(f, 'is_to_tool', False) and
+            f.__module__ == source.__name__
+        ]
+    else:
+        functions = list(source)
+
+    for f in functions:
+        if not getattr(f, 'is_to_tool', False):
+            raise ValueError('Expected @to_tool function, got {}'.format(f))
+        module = sys.modules.get(f.__module__)
+        if getattr(module, f.__name__, None) is not f:
+            raise ValueError(
+                'Function {} is not defined on module level.'.format(
+                    f.__name__
+                )
+            )
+
+    if processes == 1 or len(functions) < 2:
+        return [f() for f in functions]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(
+            _build_tool,
+            [f.__module__ for f in functions],
+            [f.__name__ for f in functions]
+        ))
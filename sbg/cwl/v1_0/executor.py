@@ -0,0 +1,746 @@
+import os
+import glob
+import json
+import logging
+import itertools
+import functools
+import subprocess
+import collections
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from sbg.cwl.v1_0.app import App
+from sbg.cwl.v1_0.load import load
+from sbg.cwl.v1_0.util import FileText, local_id
+from sbg.cwl.v1_0.expression import evaluate, evaluate_all
+from sbg.cwl.v1_0.wf.graph import Graph
+from sbg.cwl.v1_0.wf.methods import MergeMethod
+from sbg.cwl.v1_0.wf.workflow import Workflow
+from sbg.cwl.v1_0.cmd.tool import CommandLineTool
+from sbg.cwl.v1_0.cmd.command_line import CommandLine
+from sbg.cwl.v1_0.wf.expression_tool import ExpressionTool
+from sbg.cwl.v1_0.requirement import (
+    InlineJavascript, InitialWorkDir, Dirent, EnvVar, ShellCommand, Docker
+)
+from sbg.cwl.v1_0.requirement.resource import (
+    find_resource, DEFAULT_CORES, DEFAULT_RAM
+)
+
+logger = logging.getLogger(__name__)
+
+# maximal number of bytes of File.contents read by loadContents
+CONTENTS_LIMIT = 64 * 2 ** 10
+
+# written by a tool into its output directory it replaces output collection
+OUTPUT_JSON = 'cwl.output.json'
+
+
+def _total_ram():
+    """Returns physical memory in MiB."""
+
+    try:
+        return (os.sysconf('SC_PAGE_SIZE') *
+                os.sysconf('SC_PHYS_PAGES') // 2 ** 20)
+    except (ValueError, OSError, AttributeError):
+        return DEFAULT_RAM
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _is_array(t):
+    """Returns True if ``t`` is an array type (or optional array)."""
+
+    if isinstance(t, list):
+        return any(_is_array(x) for x in t if x != 'null')
+    if isinstance(t, dict):
+        return t.get('type') == 'array'
+    return isinstance(t, str) and t.rstrip('?').endswith('[]')
+
+
+def _find_requirement(cls, apps):
+    """
+    Returns first requirement and then hint of class ``cls`` of ``apps``.
+    """
+
+    for attr in ('requirements', 'hints'):
+        for app in apps:
+            for r in app.get(attr) or []:
+                if isinstance(r, cls):
+                    return r
+    return None
+
+
+def _expression_lib(apps):
+    r = _find_requirement(InlineJavascript, apps)
+    return r.expression_lib if r else None
+
+
+def file_object(path, cls='File'):
+    """
+    Returns CWL ``File`` (or ``Directory``) object of local ``path``.
+
+    :param path: file path
+    :param cls: ``'File'`` or ``'Directory'``
+    """
+
+    path = os.path.abspath(path)
+    basename = os.path.basename(path)
+    obj = {
+        'class': cls,
+        'location': 'file://' + path,
+        'path': path,
+        'basename': basename,
+        'dirname': os.path.dirname(path)
+    }
+    if cls == 'File':
+        obj['nameroot'], obj['nameext'] = os.path.splitext(basename)
+        obj['size'] = os.path.getsize(path)
+    return obj
+
+
+def _normalize(value, basedir=None):
+    """
+    Returns ``value`` in which ``File`` and ``Directory`` objects given by
+    ``path`` or ``file://`` ``location`` (relative to ``basedir``) have all
+    their fields set.
+    """
+
+    if isinstance(value, list):
+        return [_normalize(v, basedir) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if value.get('class') not in ('File', 'Directory'):
+        return {k: _normalize(v, basedir) for k, v in value.items()}
+    path = value.get('path') or value.get('location')
+    if path is None:  # file literal
+        return value
+    if path.startswith('file://'):
+        path = path[len('file://'):]
+    if basedir:
+        path = os.path.join(basedir, path)
+    obj = dict(value)
+    obj.update(file_object(path, value['class']))
+    if value.get('secondaryFiles'):
+        obj['secondaryFiles'] = _normalize(value['secondaryFiles'], basedir)
+    return obj
+
+
+def _stage(value, indir):
+    """
+    Returns ``value`` with files linked into separate directories of
+    ``indir``, secondary files are linked next to their primary file.
+    """
+
+    count = itertools.count()
+
+    def stage(v, dir=None):
+        if isinstance(v, list):
+            return [stage(x) for x in v]
+        if not isinstance(v, dict):
+            return v
+        if v.get('class') not in ('File', 'Directory') or 'path' not in v:
+            return {k: stage(x) for k, x in v.items()}
+        dir = dir or os.path.join(indir, str(next(count)))
+        os.makedirs(dir, exist_ok=True)
+        dest = os.path.join(dir, v['basename'])
+        if not os.path.lexists(dest):
+            os.symlink(v['path'], dest)
+        staged = dict(v, path=dest, location='file://' + dest, dirname=dir)
+        if v.get('secondaryFiles'):
+            staged['secondaryFiles'] = [
+                stage(s, dir) for s in v['secondaryFiles']
+            ]
+        return staged
+
+    return stage(value)
+
+
+def _fill_inputs(app, inputs):
+    """
+    Returns input object of ``app`` with defaults of missing inputs.
+
+    :raise ValueError: if a required input is missing
+    """
+
+    result = {}
+    for i in app.inputs or []:
+        id = local_id(i.id)
+        value = inputs.get(id)
+        if value is None:
+            value = i.default
+        if value is None and App.is_required(i.type):
+            raise ValueError('Missing required input {} of {}'.format(
+                id, app.id
+            ))
+        result[id] = _normalize(value)
+    return result
+
+
+def _merge(values, method):
+    if method == MergeMethod.MERGE_FLATTENED:
+        merged = []
+        for v in values:
+            if isinstance(v, list):
+                merged.extend(v)
+            else:
+                merged.append(v)
+        return merged
+    return list(values)
+
+
+def _load_contents(tool, inputs):
+    """Reads ``contents`` of ``File`` inputs bound with ``loadContents``."""
+
+    for i in tool.inputs or []:
+        b = i.input_binding
+        if b is None or not b.load_contents:
+            continue
+        for f in _as_list(inputs.get(local_id(i.id))):
+            if isinstance(f, dict) and f.get('class') == 'File':
+                with open(f['path'], 'rb') as fp:
+                    f['contents'] = fp.read(CONTENTS_LIMIT).decode(
+                        'utf-8', 'replace'
+                    )
+
+
+def _write_listing(tool, apps, context, lib, outdir):
+    """Creates ``InitialWorkDir`` listing of ``tool`` in ``outdir``."""
+
+    def link(f, name=None, writable=False):
+        dest = os.path.join(outdir, name or f['basename'])
+        if writable:
+            subprocess.check_call(['cp', '-r', f['path'], dest])
+        else:
+            os.symlink(f['path'], dest)
+
+    r = _find_requirement(InitialWorkDir, apps)
+    for item in (r.listing if r else None) or []:
+        if not isinstance(item, Dirent):
+            for f in _as_list(evaluate(item, context, lib)):
+                if f is not None:
+                    link(f)
+            continue
+        entry = item.entry
+        if not isinstance(entry, FileText):
+            entry = evaluate(entry, context, lib)
+        name = evaluate(item.entryname, context, lib)
+        if isinstance(entry, dict) and 'path' in entry:
+            link(entry, name, item.writable)
+            continue
+        if isinstance(entry, FileText):
+            entry = entry.read()
+        elif not isinstance(entry, str):
+            entry = json.dumps(entry)
+        with open(os.path.join(outdir, name), 'w') as fp:
+            fp.write(entry)
+
+
+def _execute(spec):
+    """
+    Runs command of a job described by ``spec`` in a worker process and
+    collects files matching output globs.
+    """
+
+    outdir = spec['outdir']
+    stdin = open(spec['stdin'], 'rb') if spec['stdin'] else None
+    try:
+        with open(spec['stdout'], 'wb') as stdout, \
+                open(spec['stderr'], 'wb') as stderr:
+            code = subprocess.call(
+                spec['argv'], cwd=outdir, env=spec['env'],
+                stdin=stdin or subprocess.DEVNULL, stdout=stdout,
+                stderr=stderr
+            )
+    finally:
+        if stdin:
+            stdin.close()
+
+    files = {}
+    for id, (patterns, load_contents) in spec['outputs'].items():
+        found = files[id] = []
+        for pattern in patterns:
+            for path in sorted(glob.glob(os.path.join(outdir, pattern))):
+                if os.path.isdir(path):
+                    found.append(file_object(path, 'Directory'))
+                    continue
+                f = file_object(path)
+                if load_contents:
+                    with open(path, 'rb') as fp:
+                        f['contents'] = fp.read(CONTENTS_LIMIT).decode(
+                            'utf-8', 'replace'
+                        )
+                found.append(f)
+
+    output_json = None
+    path = os.path.join(outdir, OUTPUT_JSON)
+    if os.path.isfile(path):
+        with open(path) as fp:
+            output_json = json.load(fp)
+    return {'code': code, 'files': files, 'json': output_json}
+
+
+class _Job(object):
+    """Execution of a ``CommandLineTool`` in the process pool."""
+
+    def __init__(self, run, tool, inputs, name, apps, callback):
+        self.run = run
+        self.tool = tool
+        self.inputs = inputs
+        self.name = name
+        self.apps = apps
+        self.callback = callback
+        self.cores = find_resource('cores', DEFAULT_CORES, *apps)
+        self.ram = find_resource('ram', DEFAULT_RAM, *apps)
+        executor = run.executor
+        if self.cores > executor.cores or self.ram > executor.ram:
+            raise ValueError(
+                '{} requires {} cores and {} MiB RAM, only {} cores and {} '
+                'MiB are available'.format(
+                    name, self.cores, self.ram, executor.cores, executor.ram
+                )
+            )
+        self.context = self.lib = self.stderr = None
+
+    def prepare(self):
+        """Stages inputs, evaluates expressions and returns job spec."""
+
+        tool = self.tool
+        jobdir = os.path.join(self.run.rundir, *self.name.split('/'))
+        outdir = os.path.join(jobdir, 'out')
+        tmpdir = os.path.join(jobdir, 'tmp')
+        os.makedirs(outdir)
+        os.makedirs(tmpdir)
+        if tool.requirements and _find_requirement(Docker, [tool]):
+            logger.warning(
+                'DockerRequirement of %s is ignored, %s runs on the host',
+                tool.id, self.name
+            )
+        runtime = {
+            'outdir': outdir, 'tmpdir': tmpdir, 'cores': self.cores,
+            'ram': self.ram, 'outdirSize': 1024, 'tmpdirSize': 1024
+        }
+        inputs = _stage(self.inputs, os.path.join(jobdir, 'in'))
+        _load_contents(tool, inputs)
+        context = self.context = {
+            'inputs': inputs, 'self': None, 'runtime': runtime
+        }
+        lib = self.lib = _expression_lib(self.apps)
+        _write_listing(tool, self.apps, context, lib, outdir)
+
+        env = {'PATH': os.environ.get('PATH', os.defpath), 'HOME': outdir,
+               'TMPDIR': tmpdir}
+        r = _find_requirement(EnvVar, self.apps)
+        env_def = (r.env_def if r else None) or []
+        values = evaluate_all(
+            [(e.env_value, context) for e in env_def], lib
+        )
+        for e, value in zip(env_def, values):
+            env[e.env_name] = str(value)
+
+        outputs = {}
+        streams = {}
+        for o in tool.outputs or []:
+            id = local_id(o.id)
+            if o.type in ('stdout', 'stderr'):
+                name = evaluate(getattr(tool, o.type), context, lib)
+                streams[o.type] = name or '{}.{}'.format(id, o.type)
+                outputs[id] = ([streams[o.type]], False)
+            elif o.output_binding is not None:
+                b = o.output_binding
+                outputs[id] = (
+                    _as_list(evaluate(b.glob, context, lib)),
+                    bool(b.load_contents)
+                )
+        for stream in ('stdout', 'stderr'):
+            name = streams.get(stream) or evaluate(
+                getattr(tool, stream), context, lib
+            )
+            streams[stream] = (
+                os.path.join(outdir, name) if name
+                else os.path.join(jobdir, stream + '.log')
+            )
+        self.stderr = streams['stderr']
+        stdin = evaluate(tool.stdin, context, lib)
+
+        return {
+            'argv': self.run.command_line(
+                tool, _find_requirement(ShellCommand, self.apps) is not None,
+                lib
+            ).render(inputs, runtime),
+            'outdir': outdir,
+            'env': env,
+            'stdin': stdin,
+            'stdout': streams['stdout'],
+            'stderr': streams['stderr'],
+            'outputs': outputs
+        }
+
+    def finish(self, result):
+        """Returns outputs of the job from result of ``_execute``."""
+
+        tool = self.tool
+        if result['code'] not in (tool.success_codes or [0]):
+            raise RuntimeError('{} failed with exit code {}, see {}'.format(
+                self.name, result['code'], self.stderr
+            ))
+        outdir = self.context['runtime']['outdir']
+        if result['json'] is not None:
+            return _normalize(result['json'], outdir)
+
+        evaluated = {}
+        expressions = []
+        for o in tool.outputs or []:
+            b = o.output_binding
+            if b is not None and b.output_eval is not None:
+                evaluated[o.id] = len(expressions)
+                expressions.append((b.output_eval, dict(
+                    self.context, self=result['files'].get(local_id(o.id), [])
+                )))
+        values = evaluate_all(expressions, self.lib)
+
+        outputs = {}
+        for o in tool.outputs or []:
+            id = local_id(o.id)
+            files = result['files'].get(id, [])
+            if o.id in evaluated:
+                value = values[evaluated[o.id]]
+            elif _is_array(o.type):
+                value = files
+            else:
+                value = files[0] if files else None
+            if value is None and App.is_required(o.type):
+                raise RuntimeError('{} did not produce output {}'.format(
+                    self.name, id
+                ))
+            outputs[id] = value
+        return outputs
+
+
+class _WorkflowRun(object):
+    """Execution of ``Workflow`` steps in order of their dependencies."""
+
+    def __init__(self, run, wf, inputs, name, apps, callback):
+        self.run = run
+        self.wf = wf
+        self.inputs = inputs
+        self.name = name
+        self.apps = apps
+        self.callback = callback
+        self.graph = Graph(wf, expand=False)
+        # raises ValueError on cycles
+        self.graph.topological_order()
+        self.waiting = {
+            n: len(p) for n, p in self.graph.predecessors.items()
+        }
+        self.outputs = {}
+
+    def start(self):
+        if not self.waiting:
+            self._finish()
+        for id, count in list(self.waiting.items()):
+            if count == 0:
+                self._start_step(id)
+
+    def _value(self, sources, link_merge):
+        values = []
+        for source in _as_list(sources):
+            parts = source.rsplit('#', 1)[-1].split('/')
+            if len(parts) > 1 and parts[-2] in self.graph.steps:
+                values.append(self.outputs[parts[-2]].get(parts[-1]))
+            else:
+                values.append(self.inputs.get(parts[-1]))
+        if len(values) == 1 and link_merge is None:
+            return values[0]
+        return _merge(values, link_merge) if values else None
+
+    def _start_step(self, id):
+        step = self.graph.steps[id]
+        run = step.run
+        if isinstance(run, str):
+            run = load(run)
+        inputs = {}
+        expressions = []
+        for i in step.in_ or []:
+            in_id = local_id(i.id)
+            value = self._value(i.source, i.link_merge)
+            if value is None:
+                value = i.default
+            inputs[in_id] = _normalize(value)
+            if i.value_from is not None:
+                expressions.append((in_id, i.value_from))
+        name = '{}/{}'.format(self.name, id)
+        callback = functools.partial(self._done, id)
+        if step.scatter:
+            _ScatterRun(
+                self, step, run, step.scatter_jobs(inputs), expressions, name,
+                callback
+            ).start()
+            return
+        self.run.start(
+            run, self.value_from(inputs, expressions), name, (step,),
+            self.apps, callback
+        )
+
+    def value_from(self, inputs, expressions):
+        """
+        Returns step input object with ``valueFrom`` ``expressions`` (list
+        of ``(id, expression)``) evaluated.
+        """
+
+        if not expressions:
+            return inputs
+        context = {'inputs': dict(inputs), 'runtime': {}}
+        values = evaluate_all([
+            (expression, dict(context, self=inputs[in_id]))
+            for in_id, expression in expressions
+        ], _expression_lib(self.apps))
+        inputs = dict(inputs)
+        for (in_id, _), value in zip(expressions, values):
+            inputs[in_id] = value
+        return inputs
+
+    def _done(self, id, outputs):
+        self.outputs[id] = outputs
+        del self.waiting[id]
+        for s in self.graph.successors[id]:
+            self.waiting[s] -= 1
+            if self.waiting[s] == 0:
+                self._start_step(s)
+        if not self.waiting:
+            self._finish()
+
+    def _finish(self):
+        self.callback({
+            local_id(o.id): self._value(o.output_source, o.link_merge)
+            for o in self.wf.outputs or []
+        })
+
+
+class _ScatterRun(object):
+    """
+    Execution of jobs of a scattered step, jobs are generated as running
+    ones finish, at most twice as many as cores run or wait at a time.
+    """
+
+    def __init__(self, wf_run, step, app, scatter, expressions, name,
+                 callback):
+        self.wf_run = wf_run
+        self.step = step
+        self.app = app
+        self.scatter = scatter
+        self.expressions = expressions
+        self.name = name
+        self.callback = callback
+        self.jobs = enumerate(scatter)
+        self.outputs = [None] * len(scatter)
+        self.remaining = len(scatter)
+
+    def start(self):
+        if not self.remaining:
+            self.wf_run.run.completed.append((self.callback, self._gather()))
+            return
+        for _ in range(2 * self.wf_run.run.executor.cores):
+            self._next()
+
+    def _next(self):
+        for index, inputs in self.jobs:
+            # valueFrom is evaluated after scattering
+            inputs = self.wf_run.value_from(inputs, self.expressions)
+            self.wf_run.run.start(
+                self.app, inputs, '{}/{}'.format(self.name, index),
+                (self.step,), self.wf_run.apps,
+                functools.partial(self._done, index)
+            )
+            return
+
+    def _done(self, index, outputs):
+        self.outputs[index] = outputs
+        self.remaining -= 1
+        if self.remaining:
+            self._next()
+        else:
+            self.callback(self._gather())
+
+    def _gather(self):
+        return self.scatter.gather(self.outputs, [
+            local_id(o if isinstance(o, str) else o.id)
+            for o in self.step.out or []
+        ])
+
+
+class _Run(object):
+    """State of one ``LocalExecutor.run``."""
+
+    def __init__(self, executor, pool, rundir):
+        self.executor = executor
+        self.pool = pool
+        self.rundir = rundir
+        self.free_cores = executor.cores
+        self.free_ram = executor.ram
+        self.pending = collections.deque()  # jobs waiting for resources
+        self.running = {}  # future -> job
+        self.completed = collections.deque()  # (callback, outputs)
+        self.errors = []
+        self.command_lines = {}
+
+    def command_line(self, tool, shell, lib):
+        """Returns ``CommandLine`` of ``tool``, compiled once per run."""
+
+        key = (id(tool), shell, tuple(lib or ()))
+        if key not in self.command_lines:
+            self.command_lines[key] = CommandLine(tool, shell, lib or [])
+        return self.command_lines[key]
+
+    def start(self, app, inputs, name, step, parents, callback):
+        """
+        Starts ``app``, ``callback`` is called with its outputs.
+        Requirements of ``app`` override ones of its step, which override
+        ones of its parents.
+
+        :param step: tuple of the step running ``app``, empty at top level
+        :param parents: apps whose requirements ``app`` inherits (parent
+                        workflows and their steps)
+        """
+
+        inputs = _fill_inputs(app, inputs)
+        apps = (app,) + step + parents
+        if isinstance(app, Workflow):
+            _WorkflowRun(self, app, inputs, name, apps, callback).start()
+        elif isinstance(app, CommandLineTool):
+            self.pending.append(
+                _Job(self, app, inputs, name, apps, callback)
+            )
+        elif isinstance(app, ExpressionTool):
+            value = evaluate(
+                app.expression,
+                {'inputs': inputs, 'self': None, 'runtime': {}},
+                _expression_lib(apps)
+            )
+            if not isinstance(value, dict):
+                raise RuntimeError(
+                    'Expression of {} returned {}, expected object'.format(
+                        name, type(value).__name__
+                    )
+                )
+            self.completed.append((callback, {
+                local_id(o.id): value.get(local_id(o.id))
+                for o in app.outputs or []
+            }))
+        else:
+            raise TypeError(
+                'Expected Workflow, CommandLineTool or ExpressionTool, '
+                'got: {}'.format(type(app))
+            )
+
+    def _schedule(self):
+        """Submits pending jobs which fit into free cores and RAM."""
+
+        waiting = collections.deque()
+        while self.pending and self.free_cores > 0:
+            job = self.pending.popleft()
+            if job.cores > self.free_cores or job.ram > self.free_ram:
+                waiting.append(job)
+                continue
+            try:
+                spec = job.prepare()
+            except Exception as e:
+                self.errors.append(e)
+                return
+            self.free_cores -= job.cores
+            self.free_ram -= job.ram
+            self.running[self.pool.submit(_execute, spec)] = job
+        waiting.extend(self.pending)
+        self.pending = waiting
+
+    def loop(self):
+        """Runs jobs until all are finished or one of them fails."""
+
+        while True:
+            while self.completed and not self.errors:
+                callback, outputs = self.completed.popleft()
+                callback(outputs)
+            if not self.errors:
+                self._schedule()
+            if not self.running:
+                break
+            done, _ = wait(self.running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = self.running.pop(future)
+                self.free_cores += job.cores
+                self.free_ram += job.ram
+                try:
+                    outputs = job.finish(future.result())
+                except Exception as e:
+                    self.errors.append(e)
+                    continue
+                self.completed.append((job.callback, outputs))
+        if self.errors:
+            raise self.errors[0]
+
+
+class LocalExecutor(object):
+    """
+    Runs ``Workflow``, ``CommandLineTool`` and ``ExpressionTool`` objects
+    on this machine. Ready steps run concurrently in a process pool as long
+    as their ``Resource`` (``coresMin``, ``ramMin``) fits into free cores and
+    RAM, steps which do not fit wait and are started in order as soon as
+    they fit. Jobs of scattered steps (``Scatter``) are generated as
+    previous ones finish.
+
+    Every tool runs in its own directory ``<step path>/out`` of the run
+    directory with input files linked into ``<step path>/in``. Commands run
+    on the host, ``DockerRequirement`` is ignored. Parameter references
+    are evaluated in Python, other JavaScript expressions by the engine of
+    ``set_engine`` (persistent ``node`` workers of ``NodePool``).
+
+    :param basedir: directory in which run directories are created, system
+                    temporary directory by default
+    :param cores: number of cores available to jobs, number of CPUs by
+                  default
+    :param ram: RAM available to jobs in MiB, physical memory by default
+    :param processes: number of worker processes, ``cores`` by default
+
+    Example:
+
+    .. code-block:: python
+
+       from sbg import cwl
+
+       executor = cwl.LocalExecutor(cores=8, ram=16 * 1024)
+       outputs = executor.run(
+           cwl.load('workflow.cwl'),
+           {'reads': {'class': 'File', 'path': 'reads.fastq'}}
+       )
+    """
+
+    def __init__(self, basedir=None, cores=None, ram=None, processes=None):
+        self.basedir = basedir
+        self.cores = cores or os.cpu_count() or 1
+        self.ram = ram or _total_ram()
+        self.processes = processes or self.cores
+
+    def run(self, app, inputs=None):
+        """
+        Runs ``app`` and returns its outputs.
+
+        :param app: an instance of ``Workflow``, ``CommandLineTool`` or
+                    ``ExpressionTool``
+        :param inputs: input object, files are given as
+                       ``{'class': 'File', 'path': <path>}``
+        :return: ``dict`` of outputs
+        :raise RuntimeError: if a tool fails
+        """
+
+        rundir = tempfile.mkdtemp(prefix='sbg-cwl-', dir=self.basedir)
+        outputs = {}
+        with ProcessPoolExecutor(self.processes) as pool:
+            run = _Run(self, pool, rundir)
+            run.start(
+                app, inputs or {}, local_id(app.id) if app.id else 'main',
+                (), (), outputs.update
+            )
+            run.loop()
+        return outputs
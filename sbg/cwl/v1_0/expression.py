@@ -0,0 +1,551 @@
+import os
+import re
+import json
+import atexit
+import shutil
+import hashlib
+import functools
+import threading
+import subprocess
+from sbg.cwl.consts import NODE_WORKER
+
+# kinds of parts returned by ``split``
+LITERAL = None
+PARAMETER = '('  # $(...)
+BODY = '{'  # ${...}
+# kind of parts of ``compile_expression`` evaluated without JavaScript
+REFERENCE = '.'  # $(inputs.x.y)
+
+# roots of parameter references
+SYMBOLS = ('inputs', 'self', 'runtime')
+
+_CLOSING = {'(': ')', '{': '}', '[': ']'}
+
+
+def _scan(text, start):
+    """
+    Returns index after the bracket closing the one at ``start`` of
+    ``text``, brackets inside of JavaScript strings are skipped.
+    """
+
+    stack = [_CLOSING[text[start]]]
+    quote = None
+    i = start + 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if quote:
+            if c == '\\':
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in '\'"':
+            quote = c
+        elif c in _CLOSING:
+            stack.append(_CLOSING[c])
+        elif c in ')}]':
+            if c != stack.pop():
+                break
+            if not stack:
+                return i + 1
+        i += 1
+    raise ValueError('Unterminated expression: {}'.format(text[start - 1:]))
+
+
+def split(text):
+    """
+    Splits ``text`` into list of ``(kind, code)`` parts where ``kind`` is
+    ``LITERAL`` (``code`` is a string with ``\\$`` escapes resolved),
+    ``PARAMETER`` for ``$(...)`` or ``BODY`` for ``${...}`` (``code`` is
+    JavaScript between the brackets).
+
+    :param text: string which may contain CWL expressions
+    """
+
+    parts = []
+    literal = []
+    i = start = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '\\' and i + 1 < n and text[i + 1] in '$\\':
+            literal.append(text[start:i])
+            start = i + 1
+            i += 2
+        elif c == '$' and i + 1 < n and text[i + 1] in '({':
+            literal.append(text[start:i])
+            if any(literal):
+                parts.append((LITERAL, ''.join(literal)))
+            literal = []
+            end = _scan(text, i + 1)
+            parts.append((text[i + 1], text[i + 2:end - 1]))
+            i = start = end
+        else:
+            i += 1
+    literal.append(text[start:])
+    if any(literal) or not parts:
+        parts.append((LITERAL, ''.join(literal)))
+    return parts
+
+
+def is_expression(value):
+    """Returns True if ``value`` is a string containing a CWL expression."""
+
+    return (isinstance(value, str) and '$' in value and
+            any(kind is not LITERAL for kind, _ in compile_expression(value)))
+
+
+_SYMBOL = re.compile(r'\s*([A-Za-z_]\w*)')
+_SEGMENT = re.compile(
+    r'\s*(?:\.\s*([A-Za-z_]\w*)|'
+    r'\[\s*(?:\'((?:[^\'\\]|\\.)*)\'|"((?:[^"\\]|\\.)*)"|(\d+))\s*\])'
+)
+_ESCAPE = re.compile(r'\\(.)')
+
+
+def parse_reference(code):
+    """
+    Returns tuple of the root symbol and keys (``str`` or ``int``) of
+    parameter reference ``code`` (e.g. ``inputs.reads['path']`` or
+    ``self[0].basename``) or None if ``code`` is not a parameter reference
+    and requires a JavaScript engine.
+
+    :param code: code between ``$(`` and ``)``
+    """
+
+    m = _SYMBOL.match(code)
+    if m is None or m.group(1) not in SYMBOLS:
+        return None
+    symbol = m.group(1)
+    keys = []
+    i = m.end()
+    n = len(code)
+    while i < n:
+        m = _SEGMENT.match(code, i)
+        if m is None:
+            break
+        name, single, double, index = m.groups()
+        if index is not None:
+            keys.append(int(index))
+        elif name is not None:
+            keys.append(name)
+        else:
+            quoted = single if single is not None else double
+            keys.append(_ESCAPE.sub(r'\1', quoted))
+        i = m.end()
+    if code[i:].strip():
+        return None
+    return symbol, tuple(keys)
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_expression(text):
+    """
+    Returns ``split`` parts of ``text`` where parameter references are
+    parsed into ``(REFERENCE, (symbol, keys))`` parts, remaining
+    ``PARAMETER`` and ``BODY`` parts are JavaScript. Whitespace around
+    a single expression is ignored. Results are cached.
+
+    :param text: string which may contain CWL expressions
+    """
+
+    split_parts = split(text)
+    if len(split_parts) > 1 and text != text.strip():
+        stripped = split(text.strip())
+        if len(stripped) == 1:
+            split_parts = stripped
+    parts = []
+    for kind, code in split_parts:
+        if kind == PARAMETER:
+            reference = parse_reference(code)
+            if reference is not None:
+                parts.append((REFERENCE, reference))
+                continue
+        parts.append((kind, code))
+    return tuple(parts)
+
+
+def needs_engine(value):
+    """
+    Returns True if ``value`` is a string with expressions which are not
+    parameter references and must be evaluated by a JavaScript engine.
+    """
+
+    return (isinstance(value, str) and '$' in value and
+            any(kind in (PARAMETER, BODY)
+                for kind, _ in compile_expression(value)))
+
+
+def resolve_reference(reference, context):
+    """
+    Returns value of parsed parameter reference (see ``parse_reference``)
+    with JavaScript semantics: a missing key is ``null``, ``length`` of
+    an array or a string is its length.
+
+    :param reference: tuple of root symbol and keys
+    :param context: ``dict`` of ``inputs``, ``self`` and ``runtime``
+    :raise RuntimeError: if a key of ``null`` is referenced
+    """
+
+    symbol, keys = reference
+    value = context.get(symbol)
+    for key in keys:
+        if isinstance(value, dict):
+            value = value.get(str(key))
+        elif isinstance(value, (list, str)):
+            if key == 'length':
+                value = len(value)
+            elif isinstance(key, str) and not key.isdigit():
+                value = None
+            elif int(key) < len(value):
+                value = value[int(key)]
+            else:
+                value = None
+        elif value is None:
+            raise RuntimeError(
+                'Expression {} failed: cannot read property {!r} of '
+                'null'.format(_format_reference(reference), key)
+            )
+        else:
+            value = None
+    return value
+
+
+def _format_reference(reference):
+    symbol, keys = reference
+    return '$({}{})'.format(symbol, ''.join(
+        '[{}]'.format(k) if isinstance(k, int) else '.' + k for k in keys
+    ))
+
+
+def to_js(kind, code):
+    """Returns JavaScript expression evaluating part of ``split``."""
+
+    if kind == BODY:
+        return '(function(){{{}}})()'.format(code)
+    return '({})'.format(code)
+
+
+class NodeEngine(object):
+    """
+    Evaluates JavaScript expressions with ``node``, every evaluation runs a
+    new process.
+
+    :param node: ``node`` executable, searched on ``PATH`` by default
+    """
+
+    def __init__(self, node=None):
+        self.node = node or shutil.which('node') or shutil.which('nodejs')
+
+    def evaluate(self, code, context, expression_lib=None):
+        """
+        Returns value of JavaScript expression ``code``.
+
+        :param code: JavaScript expression
+        :param context: ``dict`` of global variables (``inputs``, ``self``,
+                        ``runtime``)
+        :param expression_lib: list of JavaScript code fragments defining
+                               functions used by ``code``
+        """
+
+        if not self.node:
+            raise RuntimeError('JavaScript engine node was not found.')
+        script = '\n'.join(
+            list(expression_lib or []) +
+            ['var {} = {};'.format(k, json.dumps(v))
+             for k, v in context.items()] +
+            ['var $result = {};'.format(code),
+             'process.stdout.write(JSON.stringify('
+             '$result === undefined ? null : $result));']
+        )
+        p = subprocess.run(
+            [self.node], input=script.encode(), stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        if p.returncode != 0:
+            raise RuntimeError('Expression {} failed: {}'.format(
+                code, p.stderr.decode().strip()
+            ))
+        return json.loads(p.stdout.decode())
+
+
+class _Worker(object):
+    """A ``node`` process running ``node_worker.js``."""
+
+    def __init__(self, node):
+        self.process = subprocess.Popen(
+            [node, NODE_WORKER], stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE, universal_newlines=True, bufsize=1
+        )
+        self.libs = set()  # keys of loaded expression libraries
+
+    def call(self, line):
+        try:
+            self.process.stdin.write(line + '\n')
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        except (OSError, ValueError):
+            line = ''
+        if not line:
+            raise RuntimeError('JavaScript engine exited with code {}'.format(
+                self.process.poll()
+            ))
+        return json.loads(line)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process.stdout.close()
+
+
+class NodePool(object):
+    """
+    Evaluates JavaScript expressions in persistent ``node`` worker processes.
+    Workers are started on demand, an expression library is loaded once per
+    worker and batches of expressions (``evaluate_many``) are sent over
+    a pipe in one message. A worker which fails (e.g. is killed) is
+    replaced.
+
+    It is the default engine of ``evaluate`` (see ``set_engine``).
+
+    :param processes: maximal number of workers (used by concurrent
+                      callers), number of CPUs by default
+    :param node: ``node`` executable, searched on ``PATH`` by default
+    :param timeout: seconds a batch of expressions may run
+
+    Example:
+
+    .. code-block:: python
+
+       from sbg import cwl
+
+       with cwl.NodePool() as engine:
+           engine.evaluate('inputs.x + 1', {'inputs': {'x': 1}})
+    """
+
+    def __init__(self, processes=None, node=None, timeout=20):
+        self.processes = processes or os.cpu_count() or 1
+        self.node = node or shutil.which('node') or shutil.which('nodejs')
+        self.timeout = timeout
+        self._idle = []
+        self._started = 0
+        self._condition = threading.Condition()
+        self._keys = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _acquire(self):
+        with self._condition:
+            while not self._idle and self._started >= self.processes:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        try:
+            return _Worker(self.node)
+        except Exception:
+            self._release(None)
+            raise
+
+    def _release(self, worker):
+        with self._condition:
+            if worker is None:
+                self._started -= 1
+            else:
+                self._idle.append(worker)
+            self._condition.notify()
+
+    def _key(self, expression_lib):
+        lib = tuple(expression_lib or ())
+        key = self._keys.get(lib)
+        if key is None:
+            key = self._keys[lib] = hashlib.sha1(
+                '\n'.join(lib).encode()
+            ).hexdigest()
+        return key, lib
+
+    def evaluate(self, code, context, expression_lib=None):
+        """
+        Returns value of JavaScript expression ``code``.
+
+        :param code: JavaScript expression
+        :param context: ``dict`` of global variables (``inputs``, ``self``,
+                        ``runtime``)
+        :param expression_lib: list of JavaScript code fragments defining
+                               functions used by ``code``
+        """
+
+        return self.evaluate_many([(code, context)], expression_lib)[0]
+
+    def evaluate_many(self, expressions, expression_lib=None):
+        """
+        Returns list of values of JavaScript expressions evaluated by one
+        worker in one batch.
+
+        :param expressions: list of ``(code, context)`` pairs
+        :param expression_lib: list of JavaScript code fragments
+        :raise RuntimeError: if an expression fails
+        """
+
+        if not self.node:
+            raise RuntimeError('JavaScript engine node was not found.')
+        key, lib = self._key(expression_lib)
+        head = {'lib': key, 'timeout': int(self.timeout * 1000)}
+        items = json.dumps([{'code': code, 'context': context}
+                            for code, context in expressions])
+        worker = self._acquire()
+        try:
+            if key not in worker.libs:
+                head['code'] = list(lib)
+            response = worker.call(
+                '{}, "items": {}}}'.format(json.dumps(head)[:-1], items)
+            )
+        except Exception:
+            worker.close()
+            self._release(None)
+            raise
+        if response['error'] is None:
+            worker.libs.add(key)
+        self._release(worker)
+        if response['error'] is not None:
+            raise RuntimeError(response['error'])
+        values = []
+        for (code, _), result in zip(expressions, response['results']):
+            if 'error' in result:
+                raise RuntimeError('Expression {} failed: {}'.format(
+                    code, result['error']
+                ))
+            values.append(result['value'])
+        return values
+
+    def close(self):
+        """Stops all workers."""
+
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for worker in idle:
+            worker.close()
+
+
+_engine = None
+
+
+def set_engine(engine):
+    """
+    Sets JavaScript engine used by ``evaluate`` by default.
+
+    :param engine: object with ``evaluate(code, context, expression_lib)``
+                   method (``NodePool``, ``NodeEngine``), ``None`` resets to
+                   a shared ``NodePool``
+    :return: the engine
+    """
+    global _engine
+    _engine = engine
+    return _default_engine()
+
+
+def _default_engine():
+    global _engine
+    if _engine is None:
+        _engine = NodePool()
+        atexit.register(_engine.close)
+    return _engine
+
+
+def evaluate(value, context, expression_lib=None, engine=None):
+    """
+    Returns ``value`` with CWL expressions evaluated. A string which is
+    a single expression evaluates to its value, expressions inside of
+    a longer string are interpolated (non-string values as JSON). Other
+    values are returned as is.
+
+    Parameter references (``$(inputs.x.path)``) are evaluated in Python,
+    only other expressions are passed to the JavaScript engine.
+
+    :param value: value which may contain CWL expressions
+    :param context: ``dict`` of ``inputs``, ``self`` and ``runtime``
+    :param expression_lib: JavaScript code fragments of
+                           ``InlineJavascript.expression_lib``
+    :param engine: JavaScript engine, by default the one of ``set_engine``
+    """
+
+    if not isinstance(value, str) or '$' not in value:
+        return value
+    return _join([
+        _evaluate_part(part, context, expression_lib, engine)
+        for part in compile_expression(value)
+    ])
+
+
+def evaluate_all(values, expression_lib=None, engine=None):
+    """
+    Returns list of values of ``(value, context)`` pairs evaluated like
+    ``evaluate``. JavaScript expressions of all values are evaluated in one
+    batch if the engine has ``evaluate_many`` (``NodePool``).
+
+    :param values: list of ``(value, context)`` pairs
+    :param expression_lib: JavaScript code fragments of
+                           ``InlineJavascript.expression_lib``
+    :param engine: JavaScript engine, by default the one of ``set_engine``
+    """
+
+    compiled = []
+    code = []
+    for value, context in values:
+        parts = None
+        if isinstance(value, str) and '$' in value:
+            parts = compile_expression(value)
+            code.extend(
+                (to_js(kind, c), context) for kind, c in parts
+                if kind in (PARAMETER, BODY)
+            )
+        compiled.append(parts)
+    results = []
+    if code:
+        engine = engine or _default_engine()
+        if hasattr(engine, 'evaluate_many'):
+            results = engine.evaluate_many(code, expression_lib)
+        else:
+            results = [engine.evaluate(c, context, expression_lib)
+                       for c, context in code]
+    results = iter(results)
+    evaluated = []
+    for (value, context), parts in zip(values, compiled):
+        if parts is None:
+            evaluated.append(value)
+            continue
+        evaluated.append(_join([
+            next(results) if part[0] in (PARAMETER, BODY)
+            else _evaluate_part(part, context, None, None)
+            for part in parts
+        ]))
+    return evaluated
+
+
+def _join(values):
+    """Returns single value or interpolation of values of parts."""
+
+    if len(values) == 1:
+        return values[0]
+    return ''.join(v if isinstance(v, str) else json.dumps(v) for v in values)
+
+
+def _evaluate_part(part, context, expression_lib, engine):
+    kind, code = part
+    if kind is LITERAL:
+        return code
+    if kind == REFERENCE:
+        return resolve_reference(code, context)
+    return (engine or _default_engine()).evaluate(
+        to_js(kind, code), context, expression_lib
+    )
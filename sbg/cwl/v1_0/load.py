@@ -1,21 +1,39 @@
-from sbg.cwl.v1_0.util import from_file
+from sbg.cwl.v1_0.util import from_file, intern_strings
+from sbg.cwl.v1_0.base import trusted as trusted_context, lazy as lazy_context
 from sbg.cwl.v1_0.wf.workflow import Workflow
 from sbg.cwl.v1_0.cmd.tool import CommandLineTool
 from sbg.cwl.v1_0.wf.expression_tool import ExpressionTool
 
 
-def load(cwl):
+def load(cwl, trusted=False, lazy=False, intern=False):
     """
     Loads CWL document from file or JSON object and instantiate object of a
     class specified by key ``class`` inside a document.
 
     :param cwl: file (can be either in ``JSON`` or ``YAML`` format)
+    :param trusted: skip value checks and salad $directive detection, for
+                    documents known to be valid (e.g. previously dumped or
+                    returned by the platform)
+    :param lazy: keep ``run`` documents of workflow steps raw and convert
+                 them on first access of ``Step.run``; serialized output is
+                 the same
+    :param intern: intern short strings of ``cwl`` before loading (see
+                   ``intern_strings``), useful when many apps are kept in
+                   memory; YAML files are always interned
     :return: depending on ``class`` can be either an instance of
              ``CommandLineTool`` or ``ExpressionTool`` or ``Workflow``
     """
 
     if not isinstance(cwl, dict):
         cwl = from_file(cwl)
+    if intern:
+        intern_strings(cwl)
+    if trusted:
+        with trusted_context():
+            return load(cwl, lazy=lazy)
+    if lazy:
+        with lazy_context():
+            return load(cwl)
     if isinstance(cwl, dict):
         if "class" in cwl:
             if cwl['class'] == 'CommandLineTool':
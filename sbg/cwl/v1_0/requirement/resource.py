@@ -1,6 +1,34 @@
 from sbg.cwl.v1_0.base import Cwl
 from sbg.cwl.v1_0.check import to_str_int
 
+# CWL defaults of ResourceRequirement
+DEFAULT_CORES = 1
+DEFAULT_RAM = 1024
+
+
+def find_resource(key, default, *apps):
+    """
+    Returns ``<key>Min`` (or ``<key>Max`` if not set) of the first
+    ``Resource`` of requirements and then hints of ``apps`` (steps, tools,
+    workflows) in which it is a number, expressions are skipped.
+
+    :param key: ``'cores'``, ``'ram'``, ``'tmpdir'`` or ``'outdir'``
+    :param default: returned if no value is found
+    """
+
+    for attr in ('requirements', 'hints'):
+        for app in apps:
+            if not isinstance(app, dict):  # run given by path
+                continue
+            for r in app.get(attr) or []:
+                if isinstance(r, Resource):
+                    value = r.get(key + 'Min')
+                    if value is None:
+                        value = r.get(key + 'Max')
+                    if isinstance(value, (int, float)):
+                        return value
+    return default
+
 
 class Resource(Cwl):
     """
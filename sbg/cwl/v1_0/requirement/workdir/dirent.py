@@ -1,4 +1,5 @@
 from sbg.cwl.v1_0.base import Cwl
+from sbg.cwl.v1_0.util import FileText
 from sbg.cwl.v1_0.check import to_str, to_bool
 
 
@@ -33,12 +34,18 @@ class Dirent(Cwl):
 
         If writable is false, the file may be made available using a bind mount
         or file system link to avoid unnecessary copying of the input file.
+
+        Large string literals can be given as ``FileText``, they are read
+        from the file when serialized.
         """
         return self.get('entry')
 
     @entry.setter
     def entry(self, value):
-        self['entry'] = to_str(value)
+        if isinstance(value, FileText):
+            self['entry'] = value
+        else:
+            self['entry'] = to_str(value)
 
     @property
     def entryname(self):
@@ -1,15 +1,281 @@
 import io
 import os
+import re
+import sys
+import copy
+import json
+import math
 import yaml
 import time
+import pickle
+import operator
+import logging
 import base64
+import hashlib
 import tarfile
+import tempfile
+import functools
+import weakref
+import threading
+import collections
 from datetime import datetime
+from sbg.cwl.instrument import instrumented
 
 
+# libyaml parser if PyYAML is built with it
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+logger = logging.getLogger(__name__)
+
+
+def _json_load(data):
+    """
+    Parses JSON ``data`` (``orjson`` is used if installed) and returns tuple
+    of parsed document and backend name.
+    """
+
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(data), 'json'
+    try:
+        return orjson.loads(data), 'orjson'
+    except orjson.JSONDecodeError:
+        # orjson rejects integers which do not fit into 64 bits
+        return json.loads(data), 'json'
+
+
+def load_file(path):
+    """
+    Loads JSON or YAML file. Files with ``.json`` extension or starting with
+    ``{``/``[`` are parsed as JSON (if that fails as YAML in flow style),
+    other files are streamed into YAML parser.
+
+    Short strings of YAML documents are interned (see ``intern_strings``),
+    JSON parsers already share repeated keys.
+
+    If on-disk cache is enabled (see ``set_disk_cache``), parsed YAML
+    documents are stored in it and loaded from it while file is unchanged.
+
+    :param path: file path
+    :return: tuple of loaded document and name of used backend
+             (``json``, ``orjson``, ``CSafeLoader``, ``SafeLoader`` or
+             ``pickle`` if loaded from on-disk cache)
+    """
+
+    with open(path, 'rb') as fp:
+        head = fp.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+        fp.seek(0)
+        if path.endswith('.json') or head[:1] in (b'{', b'['):
+            try:
+                return _json_load(fp.read())
+            except ValueError:
+                fp.seek(0)
+        cache = disk_cache()
+        if cache is not None:
+            doc, hit = cache.get(path, fp.read(), lambda data: intern_strings(
+                yaml.load(data, YamlLoader)
+            ))
+            if hit:
+                # strings are shared inside of unpickled document only
+                return intern_strings(doc), 'pickle'
+            return doc, YamlLoader.__name__
+        return intern_strings(
+            yaml.load(fp, Loader=YamlLoader)
+        ), YamlLoader.__name__
+
+
+class DiskCache(object):
+    """
+    On-disk cache of parsed documents stored with pickle (protocol 5).
+
+    Entries are keyed by SHA-256 of absolute source path and its content, so
+    changed files are never loaded from cache. Entries are written
+    atomically and unreadable entries are parsed again. When total size of
+    entries exceeds ``max_size``, least recently used ones are removed.
+
+    Loading pickle can execute code, so cache directory is created
+    accessible only by its owner. An existing directory of another user is
+    refused (``PermissionError``), one accessible by others is restricted to
+    its owner.
+
+    :param path: cache directory (created if missing)
+    :param max_size: maximal total size of entries in bytes
+    """
+
+    suffix = '.pickle'
+    # part of keys, changed when format of entries changes
+    version = 1
+
+    def __init__(self, path, max_size=256 * 2 ** 20):
+        self.path = os.path.abspath(path)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        self._check_path()
+
+    def _check_path(self):
+        st = os.stat(self.path)
+        if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+            raise PermissionError(
+                'Cache directory {} is owned by another user'.format(
+                    self.path
+                )
+            )
+        if st.st_mode & 0o077:
+            logger.warning(
+                'Cache directory %s is accessible by others, restricting it '
+                'to its owner', self.path
+            )
+            os.chmod(self.path, 0o700)
+
+    def key(self, path, data):
+        """Returns key of source file ``path`` with content ``data``."""
+
+        h = hashlib.sha256('{}\0{}\0'.format(
+            self.version, os.path.abspath(path)
+        ).encode('utf-8'))
+        h.update(data)
+        return h.hexdigest()
+
+    def get(self, path, data, parse):
+        """
+        Returns tuple of document and ``True`` if it was loaded from cache.
+        On miss document is parsed by ``parse(data)`` and stored.
+
+        :param path: source file path
+        :param data: content of source file (``bytes``)
+        :param parse: function parsing ``data``
+        """
+
+        entry = os.path.join(self.path, self.key(path, data) + self.suffix)
+        try:
+            with open(entry, 'rb') as fp:
+                doc = pickle.load(fp)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning('Removing broken cache entry %s', entry)
+            self._remove(entry)
+        else:
+            self.hits += 1
+            try:
+                # modification time orders entries by last use
+                os.utime(entry)
+            except OSError:
+                pass
+            return doc, True
+
+        doc = parse(data)
+        self.misses += 1
+        self._store(entry, doc)
+        return doc, False
+
+    def _store(self, entry, doc):
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        except OSError as e:
+            logger.warning('Cache entry %s not stored: %s', entry, e)
+            return
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                pickle.dump(doc, fp, protocol=5)
+            os.replace(tmp, entry)
+        except OSError as e:
+            logger.warning('Cache entry %s not stored: %s', entry, e)
+            self._remove(tmp)
+            return
+        self.prune()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        """Returns list of (mtime, size, path) of entries."""
+
+        entries = []
+        for e in os.scandir(self.path):
+            if e.name.endswith(self.suffix):
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, e.path))
+        return entries
+
+    def size(self):
+        """Returns total size of entries in bytes."""
+
+        return sum(size for _, size, _ in self._entries())
+
+    def prune(self):
+        """Removes least recently used entries exceeding ``max_size``."""
+
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """Removes all entries."""
+
+        for _, _, path in self._entries():
+            self._remove(path)
+
+
+# not ``SBG_CWL_CACHE_DIR`` of ``ArtifactCache``, entries of both caches
+# would be pruned as the other's
+DISK_CACHE_ENV = 'SBG_CWL_YAML_CACHE_DIR'
+
+_disk_cache = None
+_env_disk_cache = None
+
+
+def set_disk_cache(path, max_size=256 * 2 ** 20):
+    """
+    Enables on-disk cache of parsed YAML documents used by ``load_file``
+    (and so by ``load``, ``from_file`` and ``DocumentCache``). Cache can also
+    be enabled with ``SBG_CWL_YAML_CACHE_DIR`` environment variable.
+
+    :param path: cache directory, ``None`` resets cache
+    :param max_size: maximal total size of entries in bytes
+    :return: ``DiskCache`` or ``None``
+    """
+    global _disk_cache
+    _disk_cache = DiskCache(path, max_size) if path is not None else None
+    return _disk_cache
+
+
+def disk_cache():
+    """Returns enabled ``DiskCache`` or ``None`` (see ``set_disk_cache``)."""
+    global _env_disk_cache
+    if _disk_cache is not None:
+        return _disk_cache
+    path = os.environ.get(DISK_CACHE_ENV)
+    if not path:
+        return None
+    if _env_disk_cache is None or _env_disk_cache.path != os.path.abspath(
+            path):
+        try:
+            _env_disk_cache = DiskCache(path)
+        except OSError as e:
+            logger.warning('Disk cache %s not used: %s', path, e)
+            return None
+    return _env_disk_cache
+
+
+@instrumented('from_file')
 def from_file(cwl):
     """
-    Load CWL document from file.
+    Load CWL document from file (see ``load_file``).
 
     :param cwl: file (can be either in ``JSON`` or ``YAML`` format)
     :return: ``dict`` representation of loaded file
@@ -17,8 +283,9 @@ def from_file(cwl):
 
     if isinstance(cwl, str):
         if os.path.isfile(cwl):
-            with open(cwl, 'r') as fp:
-                cwl = yaml.load(fp, Loader=yaml.SafeLoader)
+            path = cwl
+            cwl, backend = load_file(path)
+            logger.debug('Loaded %s using %s', path, backend)
         else:
             raise ValueError("Expected yaml/json file got, {}".format(cwl))
     else:
@@ -26,6 +293,465 @@ def from_file(cwl):
     return cwl
 
 
+class DocumentCache(object):
+    """
+    Cache of parsed documents (and raw texts) keyed by absolute file path.
+    Entries are validated by file modification time and size, so changed
+    files are parsed again.
+
+    :param max_size: maximal number of cached files (least recently used are
+                     evicted), ``None`` means unbounded
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key, path, parse):
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        value = parse(path)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def load(self, path):
+        """
+        Returns document from file ``path``. Document is a copy, so it can
+        be modified.
+        """
+
+        path = os.path.abspath(path)
+        return copy.deepcopy(
+            self._get(('load', path), path, lambda p: load_file(p)[0])
+        )
+
+    def read(self, path):
+        """Returns text of file ``path``."""
+
+        def read(p):
+            with open(p) as fp:
+                return fp.read()
+
+        path = os.path.abspath(path)
+        return self._get(('read', path), path, read)
+
+
+JSON_BACKEND_ENV = 'SBG_CWL_JSON_BACKEND'
+JSON_BACKENDS = ('json', 'orjson')
+
+_json_backend = None
+
+
+def set_json_backend(name):
+    """
+    Sets backend used by ``to_json`` and ``json_dump``. Backend can also be set
+    with ``SBG_CWL_JSON_BACKEND`` environment variable.
+
+    ``orjson`` is much faster, but its output is not byte-identical with
+    ``json`` (non-ASCII characters are not escaped, floats may be formatted
+    differently).
+
+    :param name: ``json`` (default) or ``orjson``, ``None`` resets backend
+    """
+    global _json_backend
+    if name is not None and name not in JSON_BACKENDS:
+        raise ValueError('Unsupported JSON backend: {}'.format(name))
+    if name == 'orjson':
+        try:
+            import orjson  # noqa: F401
+        except ImportError:
+            raise ValueError('JSON backend orjson requires orjson package.')
+    _json_backend = name
+
+
+def to_json(obj, indent=None):
+    """
+    Serializes ``obj`` into JSON string using active JSON backend.
+
+    :param obj: object to be serialized
+    :param indent: ``None`` or ``2``
+    :return: JSON string
+    """
+    backend = _json_backend or os.environ.get(JSON_BACKEND_ENV) or 'json'
+    if backend == 'orjson':
+        import orjson
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(
+            obj, default=_json_default, option=option
+        ).decode('utf-8')
+    return json.dumps(obj, indent=indent, default=_json_default)
+
+
+# libyaml emitter if PyYAML is built with it
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# characters outside of basic multilingual plane
+_astral_re = re.compile('[\U00010000-\U0010ffff]')
+
+# ASCII characters which are escaped by YAML emitters
+_escaped_re = re.compile('[\x00-\x09\x0b-\x1f\x7f]')
+
+
+def _surrogate_pair(match):
+    code = ord(match.group()) - 0x10000
+    return chr(0xd800 + (code >> 10)) + chr(0xdc00 + (code & 0x3ff))
+
+
+class _YamlData(object):
+    """
+    Converts objects into plain python types exactly like serializing them
+    into JSON and loading back as YAML would. It also checks if libyaml
+    emits converted data the same way as python emitter.
+    """
+
+    def __init__(self):
+        self.libyaml = True
+
+    def str(self, value):
+        if value.isascii():
+            # libyaml wraps double quoted text (with escapes or spaces
+            # around line breaks) differently
+            if self.libyaml and (_escaped_re.search(value) or
+                                 ' \n' in value or '\n ' in value):
+                self.libyaml = False
+            return str(value)
+        # libyaml measures non-ASCII text in bytes
+        self.libyaml = False
+        # JSON escapes these as surrogate pairs and YAML reads them that way
+        return _astral_re.sub(_surrogate_pair, value)
+
+    def key(self, value):
+        if not isinstance(value, str):
+            value = next(iter(json.loads(json.dumps({value: None}))))
+        # python emitter uses complex keys (``? key``) for empty keys and
+        # keys with 123+ characters (tag is counted), libyaml for keys with
+        # 129+ characters
+        if not value or 123 <= len(value) <= 128:
+            self.libyaml = False
+        return self.str(value)
+
+    def convert(self, obj):
+        if isinstance(obj, str):
+            return self.str(obj)
+        elif isinstance(obj, dict):
+            return {self.key(k): self.convert(v) for k, v in obj.items()}
+        elif isinstance(obj, (list, tuple)):
+            return [self.convert(x) for x in obj]
+        elif isinstance(obj, Lazy):
+            return self.convert(obj.materialize())
+        return self.scalar(obj)
+
+    def scalar(self, obj):
+        if isinstance(obj, str):
+            return self.str(obj)
+        elif obj is None or isinstance(obj, bool):
+            return obj
+        elif isinstance(obj, int):
+            return int(obj)
+        elif isinstance(obj, float):
+            if math.isfinite(obj) and 'e' not in repr(obj):
+                return float(obj)
+            # JSON forms like 1e+20 or Infinity are strings for YAML 1.1
+            return yaml.load(json.dumps(obj), Loader=yaml.SafeLoader)
+        elif isinstance(obj, FileText):
+            return self.str(obj.read())
+        raise TypeError(
+            'Object of type {} is not JSON serializable'.format(
+                type(obj).__name__
+            )
+        )
+
+    def check(self, obj):
+        """Only checks if libyaml can be used for ``obj``."""
+
+        if isinstance(obj, str):
+            self.str(obj)
+        elif isinstance(obj, dict):
+            for k, v in obj.items():
+                self.key(k)
+                self.check(v)
+                if not self.libyaml:
+                    return
+        elif isinstance(obj, (list, tuple)):
+            for v in obj:
+                self.check(v)
+                if not self.libyaml:
+                    return
+        elif isinstance(obj, Lazy):
+            self.check(obj.materialize())
+        elif isinstance(obj, FileText):
+            last = ''
+            for chunk in obj.chunks():
+                # line breaks with spaces may be split between chunks
+                self.str(last + chunk)
+                if not self.libyaml:
+                    return
+                last = chunk[-1:]
+
+
+def to_yaml(obj):
+    """
+    Serializes ``obj`` into YAML string. Output is the same as dumping YAML
+    loaded from JSON serialized ``obj``, libyaml emitter is used when it
+    gives the same result.
+    """
+
+    data = _YamlData()
+    plain = data.convert(obj)
+    return yaml.dump(
+        plain, Dumper=YamlDumper if data.libyaml else yaml.SafeDumper,
+        default_flow_style=False
+    )
+
+
+def _yaml_events(obj, data, dumper):
+    if isinstance(obj, str):
+        obj = data.str(obj)
+    elif isinstance(obj, Lazy):
+        obj = obj.materialize()
+    if isinstance(obj, dict):
+        yield yaml.MappingStartEvent(
+            None, 'tag:yaml.org,2002:map', True, flow_style=False
+        )
+        items = {data.key(k): v for k, v in obj.items()}
+        for k in sorted(items):
+            yield from _yaml_events(k, data, dumper)
+            yield from _yaml_events(items[k], data, dumper)
+        yield yaml.MappingEndEvent()
+    elif isinstance(obj, (list, tuple)):
+        yield yaml.SequenceStartEvent(
+            None, 'tag:yaml.org,2002:seq', True, flow_style=False
+        )
+        for v in obj:
+            yield from _yaml_events(v, data, dumper)
+        yield yaml.SequenceEndEvent()
+    else:
+        if not isinstance(obj, str):
+            obj = data.scalar(obj)
+        # the same as Serializer does for represented node
+        node = dumper.represent_data(obj)
+        implicit = (
+            node.tag == dumper.resolve(yaml.ScalarNode, node.value,
+                                       (True, False)),
+            node.tag == dumper.resolve(yaml.ScalarNode, node.value,
+                                       (False, True))
+        )
+        yield yaml.ScalarEvent(
+            None, node.tag, implicit, node.value, style=node.style
+        )
+
+
+def write_yaml(obj, fp):
+    """
+    Writes ``obj`` as YAML into file object ``fp`` (opened in text mode)
+    while walking it, without building a whole document in memory. Output
+    is the same as ``to_yaml(obj)``.
+
+    ``FileText`` values are read into memory one at a time when written.
+
+    :param obj: object to be serialized
+    :param fp: file object
+    """
+
+    data = _YamlData()
+    data.check(obj)
+    dumper = (YamlDumper if data.libyaml else yaml.SafeDumper)(
+        fp, default_flow_style=False
+    )
+    try:
+        dumper.open()
+        dumper.emit(yaml.DocumentStartEvent())
+        for event in _yaml_events(obj, data, dumper):
+            dumper.emit(event)
+        dumper.emit(yaml.DocumentEndEvent())
+        dumper.close()
+    finally:
+        dumper.dispose()
+
+
+_json_str = json.encoder.encode_basestring_ascii
+
+
+def _json_float(obj):
+    if obj != obj:
+        return 'NaN'
+    elif obj == math.inf:
+        return 'Infinity'
+    elif obj == -math.inf:
+        return '-Infinity'
+    return float.__repr__(obj)
+
+
+def _json_key(key):
+    if isinstance(key, str):
+        return key
+    elif isinstance(key, float):
+        return _json_float(key)
+    elif key is True:
+        return 'true'
+    elif key is False:
+        return 'false'
+    elif key is None:
+        return 'null'
+    elif isinstance(key, int):
+        return int.__repr__(key)
+    raise TypeError('keys must be str, int, float, bool or None, '
+                    'not {}'.format(type(key).__name__))
+
+
+def _json_chunks(obj, indent, level):
+    if isinstance(obj, str):
+        yield _json_str(obj)
+    elif obj is None:
+        yield 'null'
+    elif obj is True:
+        yield 'true'
+    elif obj is False:
+        yield 'false'
+    elif isinstance(obj, int):
+        yield int.__repr__(obj)
+    elif isinstance(obj, float):
+        yield _json_float(obj)
+    elif isinstance(obj, (dict, list, tuple)):
+        is_dict = isinstance(obj, dict)
+        if not obj:
+            yield '{}' if is_dict else '[]'
+            return
+        if indent is None:
+            newline, separator, end = '', ', ', ''
+        else:
+            newline = '\n' + indent * (level + 1)
+            separator = ',' + newline
+            end = '\n' + indent * level
+        yield ('{' if is_dict else '[') + newline
+        first = True
+        for item in (obj.items() if is_dict else obj):
+            if not first:
+                yield separator
+            first = False
+            if is_dict:
+                yield _json_str(_json_key(item[0])) + ': '
+                item = item[1]
+            yield from _json_chunks(item, indent, level + 1)
+        yield end + ('}' if is_dict else ']')
+    elif isinstance(obj, FileText):
+        yield '"'
+        for chunk in obj.chunks():
+            yield _json_str(chunk)[1:-1]
+        yield '"'
+    elif isinstance(obj, Lazy):
+        yield from _json_chunks(obj.materialize(), indent, level)
+    else:
+        raise TypeError(
+            'Object of type {} is not JSON serializable'.format(
+                type(obj).__name__
+            )
+        )
+
+
+def write_json(obj, fp, indent=None, buffer_size=2 ** 16):
+    """
+    Writes ``obj`` as JSON into file object ``fp`` (opened in text mode)
+    while walking it, without building a whole document in memory. With
+    ``json`` backend output is the same as ``to_json(obj, indent)``,
+    ``FileText`` values are copied from their files in chunks.
+
+    ``orjson`` backend (see ``set_json_backend``) does not stream, its
+    output is written at once.
+
+    :param obj: object to be serialized
+    :param fp: file object
+    :param indent: ``None`` or ``2``
+    :param buffer_size: size of chunks written to ``fp`` (in characters)
+    """
+
+    backend = _json_backend or os.environ.get(JSON_BACKEND_ENV) or 'json'
+    if backend == 'orjson':
+        fp.write(to_json(obj, indent=indent))
+        return
+    buffer = []
+    size = 0
+    for chunk in _json_chunks(obj, ' ' * indent if indent else None, 0):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            fp.write(''.join(buffer))
+            buffer.clear()
+            size = 0
+    fp.write(''.join(buffer))
+
+
+class FileText(object):
+    """
+    String value (e.g. ``Dirent.entry`` with a large bundle) which is kept
+    in a text file and read when serialized. ``write_json`` copies it in
+    chunks, so it is never whole in memory.
+
+    :param path: file path
+    :param encoding: file encoding
+    """
+
+    chunk_size = 2 ** 20
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = os.path.abspath(path)
+        self.encoding = encoding
+
+    def read(self):
+        """Returns whole text."""
+
+        with open(self.path, encoding=self.encoding) as fp:
+            return fp.read()
+
+    def chunks(self):
+        """Yields text in chunks of ``chunk_size`` characters."""
+
+        with open(self.path, encoding=self.encoding) as fp:
+            while True:
+                chunk = fp.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def __eq__(self, other):
+        if isinstance(other, FileText):
+            if (self.path, self.encoding) == (other.path, other.encoding):
+                return True
+            other = other.read()
+        elif not isinstance(other, str):
+            return NotImplemented
+        return self.read() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'FileText({!r})'.format(self.path)
+
+
 def is_instance_all(obj, *classes):
     """
     Checks if ``obj`` is a list and all values are an instance of one of
@@ -54,13 +780,81 @@ def is_instance_both(obj, *classes):
     return isinstance(obj, classes) or is_instance_all(obj, *classes)
 
 
-def archive(names, mode='w:bz2', encode=False, arcnames=None):
+class Codec(object):
+    """
+    Compression codecs for archived bundles. Codec is recorded in a bundle
+    name (``<name>.tar[.<codec>].b64``), so runtime knows how to unpack it.
+    """
+
+    NONE = 'none'
+    GZIP = 'gz'
+    BZIP2 = 'bz2'
+    XZ = 'xz'
+    # requires python>=3.14 or zstandard package (zstd binary for bash tools)
+    ZSTD = 'zst'
+
+    # commands unpacking tar stream from stdin
+    UNTAR = {
+        NONE: 'tar xf -',
+        GZIP: 'tar xzf -',
+        BZIP2: 'tar xjf -',
+        XZ: 'tar xJf -',
+        ZSTD: 'zstd -dc | tar xf -'
+    }
+
+    @staticmethod
+    def extension(codec):
+        """Returns archive extension for ``codec`` (eg. ``.tar.bz2``)."""
+
+        if codec not in Codec.UNTAR:
+            raise ValueError('Unsupported codec: {}'.format(codec))
+        return '.tar' if codec == Codec.NONE else '.tar.{}'.format(codec)
+
+    @staticmethod
+    def bundle_name(name, codec):
+        """Returns base64 encoded bundle name (eg. ``name.tar.bz2.b64``)."""
+
+        return '{}{}.b64'.format(name, Codec.extension(codec))
+
+    @staticmethod
+    def from_name(name, default=BZIP2):
+        """Returns codec recorded in bundle ``name`` or ``default``."""
+
+        name = name[:-len('.b64')] if name.endswith('.b64') else name
+        for codec in Codec.UNTAR:
+            if name.endswith(Codec.extension(codec)):
+                return codec
+        return default
+
+
+def zstd_compress(data):
+    """Compresses ``data`` bytes into a zstd frame."""
+
+    try:
+        from compression import zstd
+        return zstd.compress(data)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            'Codec {} requires python>=3.14 or zstandard package.'.format(
+                Codec.ZSTD
+            )
+        )
+    return zstandard.ZstdCompressor().compress(data)
+
+
+@instrumented('archive')
+def archive(names, mode='w:bz2', encode=False, arcnames=None, codec=None):
     """
     Archives files/dirs using their paths specified by ``names``.
 
     :param mode: tar modes
     :param encode: encode bundle using base64
     :param arcnames: dict with arcnames for names
+    :param codec: compression codec (see ``Codec``), overrides ``mode``
     :return: byte stream
     """
 
@@ -72,6 +866,9 @@ def archive(names, mode='w:bz2', encode=False, arcnames=None):
 
     if not arcnames:
         arcnames = dict()
+    if codec:
+        Codec.extension(codec)  # validate
+        mode = 'w' if codec in (Codec.NONE, Codec.ZSTD) else 'w:' + codec
 
     stream = io.BytesIO()
     with tarfile.open(fileobj=stream, mode=mode) as tar:
@@ -87,7 +884,541 @@ def archive(names, mode='w:bz2', encode=False, arcnames=None):
                         name
                     )
                 )
+    if codec == Codec.ZSTD:
+        stream = io.BytesIO(zstd_compress(stream.getvalue()))
     stream.seek(0)
     if encode:
         return base64.b64encode(stream.read()).decode('ascii')
     return stream
+
+
+# id -> container caching its digest (see ``Tracked``)
+_digest_owners = weakref.WeakValueDictionary()
+_MISSING = object()
+
+
+class Tracked(object):
+    """
+    Mixin for containers which take part in cached digests (see ``digest``).
+
+    Containers with ``cache_digest`` set cache their own digest, the rest
+    are hashed as a part of the closest one which does. While a cached
+    digest depends on a tracked container, the container remembers its
+    owner and every mutation drops cached digests on the path to the root.
+
+    Plain lists and dicts are stored as they are, so the caller keeps
+    working with the same objects. They cannot notify anybody, so a cached
+    digest remembers them with shallow snapshots (``_checks``) and is
+    computed again once one of them differs.
+    """
+
+    cache_digest = False
+
+    _digest = None
+    # plain containers and nested digests the cached digest depends on,
+    # see ``_cached_digest``
+    _checks = None
+    # id of the closest container caching digest which depends on this one,
+    # ids of the others (if it is stored in more places) are in ``_owners``;
+    # ids are kept instead of references, instance dicts of so many objects
+    # would slow down garbage collection otherwise
+    _owner = None
+    _owners = None
+
+    def _add_owner(self, owner):
+        if self._owner is None or self._owner not in _digest_owners:
+            self._owner = owner
+        else:
+            if self._owners is None:
+                self._owners = set()
+            self._owners.add(owner)
+
+    def _changed(self):
+        if self._digest is not None:
+            self._digest = None
+        if self._owner is not None:
+            owners = [self._owner]
+            if self._owners:
+                owners.extend(self._owners)
+            self._owner = self._owners = None
+            for key in owners:
+                owner = _digest_owners.get(key)
+                if owner is not None:
+                    owner._changed()
+
+    def __getstate__(self):
+        # rebuilt on demand, do not copy/pickle them
+        state = dict(self.__dict__)
+        for k in ('_digest', '_checks', '_owner', '_owners', '_id_lists'):
+            state.pop(k, None)
+        return state or None
+
+
+class Lazy(object):
+    """
+    Value converted from raw document on its first use (see ``Step.run``).
+    Serializers, ``digest`` and ``==`` use the converted value. Converted
+    value replaces the wrapper in its owner (see ``bind``), so the owner
+    holds plain values once the wrapper was used.
+
+    :param raw: raw document
+    :param convert: function converting raw document
+    """
+
+    __slots__ = ('raw', 'convert', 'value', 'owner', 'key')
+
+    def __init__(self, raw, convert):
+        self.raw = raw
+        self.convert = convert
+        self.value = None
+        self.owner = self.key = None
+
+    def bind(self, owner, key):
+        """
+        Sets dict holding the wrapper under ``key``, converted value is
+        stored there instead of the wrapper.
+
+        :param owner: dict holding the wrapper
+        :param key: key of the wrapper in ``owner``
+        :return: the wrapper
+        """
+
+        self.owner, self.key = owner, key
+        return self
+
+    def materialize(self):
+        """Returns converted value, raw document is converted once."""
+
+        if self.convert is not None:
+            self.value = self.convert(self.raw)
+            self.raw = self.convert = None
+        owner, self.owner = self.owner, None
+        if owner is not None and dict.get(owner, self.key) is self:
+            # the same document, cached digests stay valid
+            dict.__setitem__(owner, self.key, self.value)
+        return self.value
+
+    def __eq__(self, other):
+        if isinstance(other, Lazy):
+            other = other.materialize()
+        return self.materialize() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Lazy({!r})'.format(
+            self.value if self.convert is None else self.raw
+        )
+
+
+def _json_default(obj):
+    if isinstance(obj, Lazy):
+        return obj.materialize()
+    elif isinstance(obj, FileText):
+        return obj.read()
+    raise TypeError(
+        'Object of type {} is not JSON serializable'.format(
+            type(obj).__name__
+        )
+    )
+
+
+_dict_setitem = dict.__setitem__
+
+
+class TrackedDict(Tracked, dict):
+    """
+    ``dict`` which drops cached digests on mutation (see ``Tracked``) and
+    indexes of ``IdList`` objects containing it when its ``id`` changes.
+    """
+
+    # id -> weak reference of ``IdList`` objects which indexed this one
+    _id_lists = None
+
+    # called for every property set, so checks are inlined
+    def __setitem__(self, key, value):
+        _dict_setitem(self, key, value)
+        if self._owner is not None or self._digest is not None:
+            self._changed()
+        if self._id_lists is not None and key == 'id':
+            IdList.renamed(self)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._changed()
+        if key == 'id':
+            IdList.renamed(self)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        dict.update(self, items)
+        self._changed()
+        if 'id' in items:
+            IdList.renamed(self)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, *args):
+        result = dict.pop(self, *args)
+        self._changed()
+        if args and args[0] == 'id':
+            IdList.renamed(self)
+        return result
+
+    def popitem(self):
+        result = dict.popitem(self)
+        self._changed()
+        if result[0] == 'id':
+            IdList.renamed(self)
+        return result
+
+    def clear(self):
+        dict.clear(self)
+        self._changed()
+        IdList.renamed(self)
+
+
+class IdList(Tracked, list):
+    """
+    List of CWL objects identified by their ``id`` key (app inputs/outputs,
+    workflow steps) which keeps an ``id -> object`` index, so ``find`` is
+    O(1) instead of a linear scan.
+
+    The index is built lazily, updated on ``append``/``extend``/``+=`` and
+    dropped on any other list mutation. ``TrackedDict`` objects (all CWL
+    objects) whose ``id`` changes after they were indexed drop indexes of
+    the lists containing them (see ``IdList.renamed``). Renamed plain dicts
+    cannot notify, indexes holding them are verified on lookup.
+
+    ``IdList`` is also a tracked list (see ``Tracked``).
+    """
+
+    _index = None
+    # True if the index holds plain dicts (see ``find``)
+    _untracked = False
+    _ref = None
+
+    @staticmethod
+    def renamed(obj):
+        """Drops indexes of lists containing ``obj``, its id changed."""
+
+        lists = getattr(obj, '_id_lists', None)
+        if lists:
+            obj._id_lists = None
+            for ref in lists.values():
+                id_list = ref()
+                if id_list is not None:
+                    id_list._index = None
+
+    def _add_to_index(self, index, obj):
+        if isinstance(obj, dict):
+            if isinstance(obj, TrackedDict):
+                if self._ref is None:
+                    self._ref = weakref.ref(self)
+                if obj._id_lists is None:
+                    obj._id_lists = {}
+                obj._id_lists[id(self)] = self._ref
+            else:
+                self._untracked = True
+            # first match wins, same as a linear scan
+            index.setdefault(obj.get('id'), obj)
+
+    def _get_index(self):
+        if self._index is None:
+            self._untracked = False
+            index = {}
+            for obj in self:
+                self._add_to_index(index, obj)
+            self._index = index
+        return self._index
+
+    def _invalidate(self):
+        self._index = None
+
+    def find(self, id):
+        """
+        Returns first object with ``id`` or ``None`` if it does not exist.
+
+        :param id: object id
+        :return: found object
+        """
+        obj = self._get_index().get(id)
+        if self._untracked and (obj is None or obj.get('id') != id):
+            # a plain dict could have been renamed
+            self._index = None
+            obj = self._get_index().get(id)
+        return obj
+
+    def append(self, obj):
+        super(IdList, self).append(obj)
+        if self._index is not None:
+            self._add_to_index(self._index, obj)
+        if self._owner is not None:
+            self._changed()
+
+    def extend(self, iterable):
+        if self._index is None:
+            super(IdList, self).extend(iterable)
+            self._changed()
+        else:
+            for obj in iterable:
+                self.append(obj)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def insert(self, index, obj):
+        self._invalidate()
+        super(IdList, self).insert(index, obj)
+        self._changed()
+
+    def __setitem__(self, index, value):
+        self._invalidate()
+        super(IdList, self).__setitem__(index, value)
+        self._changed()
+
+    def __getstate__(self):
+        # index is rebuilt on demand, do not copy/pickle it
+        return None
+
+    def _invalidating(name):
+        method = getattr(list, name)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            self._invalidate()
+            result = method(self, *args, **kwargs)
+            self._changed()
+            return result
+
+        return wrapper
+
+    remove = _invalidating('remove')
+    pop = _invalidating('pop')
+    clear = _invalidating('clear')
+    sort = _invalidating('sort')
+    reverse = _invalidating('reverse')
+    __delitem__ = _invalidating('__delitem__')
+    __imul__ = _invalidating('__imul__')
+
+    del _invalidating
+
+
+def to_id_list(value):
+    """Wraps plain lists into ``IdList``, other values are returned as is."""
+
+    if isinstance(value, list) and not isinstance(value, IdList):
+        return IdList(value)
+    return value
+
+
+_canonical_json = json.JSONEncoder(
+    sort_keys=True, default=_json_default
+).encode
+
+
+def _canonical(obj, owner, checks=None):
+    """
+    Returns canonical form of container ``obj`` in which nested containers
+    caching their digests are replaced by ``{"#": <digest>}``. Tracked
+    containers are registered to ``owner`` (id of the closest container
+    caching its digest), plain ones and nested digests which may change
+    without notice are appended to ``checks`` (see ``_cached_digest``).
+    """
+
+    if isinstance(obj, Lazy):
+        obj = obj.materialize()
+    cls = type(obj)
+    if cls is dict:
+        if checks is not None:
+            checks.append((obj, dict(obj)))
+    elif cls is list:
+        if checks is not None:
+            checks.append((obj, list(obj)))
+    elif isinstance(obj, Tracked):
+        if owner is not None and obj._owner != owner:
+            obj._add_owner(owner)
+        if obj.cache_digest:
+            d = _cached_digest(obj)
+            if checks is not None and obj._checks is not None:
+                checks.append((obj, d))
+            return {'#': d}
+    return _canonical_items(obj, owner, checks)
+
+
+def _canonical_items(obj, owner, checks):
+    # copied only if some item is replaced
+    canonical = None
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if isinstance(v, (dict, list, tuple, Lazy)):
+                c = _canonical(v, owner, checks)
+                if c is not v:
+                    if canonical is None:
+                        canonical = dict(obj)
+                    canonical[k] = c
+    else:
+        for i, v in enumerate(obj):
+            if isinstance(v, (dict, list, tuple, Lazy)):
+                c = _canonical(v, owner, checks)
+                if c is not v:
+                    if canonical is None:
+                        canonical = list(obj)
+                    canonical[i] = c
+    return obj if canonical is None else canonical
+
+
+def _hexdigest(canonical):
+    return hashlib.sha512(
+        _canonical_json(canonical).encode('utf-8')
+    ).hexdigest()
+
+
+def _unchanged(checks):
+    """
+    Returns True if plain containers still hold the same items as their
+    snapshots and nested digests are the same.
+    """
+
+    is_ = operator.is_
+    for obj, state in checks:
+        cls = state.__class__
+        if cls is str:
+            if obj._digest != state or (
+                    obj._checks is not None and not _unchanged(obj._checks)):
+                return False
+        elif len(obj) != len(state):
+            return False
+        elif cls is dict:
+            for k, v in state.items():
+                if obj.get(k, _MISSING) is not v:
+                    return False
+        elif not all(map(is_, obj, state)):
+            return False
+    return True
+
+
+def _cached_digest(obj):
+    if obj._digest is not None and (
+            obj._checks is None or _unchanged(obj._checks)):
+        return obj._digest
+    _digest_owners[id(obj)] = obj
+    checks = []
+    obj._digest = _hexdigest(_canonical_items(obj, id(obj), checks))
+    obj._checks = checks or None
+    return obj._digest
+
+
+def digest(obj):
+    """
+    Returns SHA-512 hex digest of JSON data ``obj`` computed as a Merkle
+    tree: containers with ``cache_digest`` set (apps and workflow steps) are
+    hashed as their JSON with sorted keys in which nested ones are replaced
+    by ``{"#": <their digest>}``.
+
+    Digests are cached until the container or any of its descendants is
+    changed (see ``Tracked``). Digest does not depend on the process, so it
+    can be stored and compared later.
+
+    :param obj: ``dict`` or ``list``
+    :return: hex digest
+    """
+
+    if isinstance(obj, Tracked) and obj.cache_digest:
+        return _cached_digest(obj)
+    return _hexdigest(_canonical(obj, None))
+
+
+def legacy_digest(obj):
+    """
+    Returns SHA-512 hex digest of JSON with sorted keys of ``obj``, which
+    was used by ``Cwl.calc_hash`` before Merkle digests (see ``digest``).
+
+    :param obj: JSON data
+    :return: hex digest
+    """
+
+    return hashlib.sha512(
+        json.dumps(obj, sort_keys=True, default=_json_default).encode('utf-8')
+    ).hexdigest()
+
+
+INTERN_MAX_LENGTH = 64
+
+
+def intern_strings(obj, max_length=INTERN_MAX_LENGTH):
+    """
+    Replaces (in place) keys and string values not longer than
+    ``max_length`` in JSON data or CWL object ``obj`` with interned strings
+    (``sys.intern``). Loaded documents repeat the same keys, types, ids and
+    sources many times, interned they are stored once, also across
+    documents. Documents parsed from YAML are interned by ``load_file``.
+
+    :param obj: JSON data or CWL object
+    :param max_length: maximal length of interned values
+    :return: ``obj`` (interned string if ``obj`` is a string)
+    """
+
+    intern = sys.intern
+
+    def walk(o):
+        cls = type(o)
+        if cls is str:
+            return intern(o) if len(o) <= max_length else o
+        elif isinstance(o, dict):
+            rekey = False
+            for k, v in o.items():
+                if type(k) is str and intern(k) is not k:
+                    rekey = True
+                if isinstance(v, (str, dict, list, Lazy)):
+                    w = walk(v)
+                    if w is not v:
+                        # equal value, digests stay valid
+                        dict.__setitem__(o, k, w)
+            if rekey:
+                items = [
+                    (intern(k) if type(k) is str else k, v)
+                    for k, v in o.items()
+                ]
+                dict.clear(o)
+                dict.update(o, items)
+        elif isinstance(o, list):
+            for i, v in enumerate(o):
+                if isinstance(v, (str, dict, list, Lazy)):
+                    w = walk(v)
+                    if w is not v:
+                        list.__setitem__(o, i, w)
+        elif isinstance(o, Lazy) and o.convert is not None:
+            walk(o.raw)
+        return o
+
+    return walk(obj)
+
+
+def local_id(id):
+    """Returns ``id`` without document and parent prefixes."""
+
+    return id.rsplit('#', 1)[-1].rsplit('/', 1)[-1]
+
+
+def find_by_id(items, id):
+    """
+    Returns first object from ``items`` with given ``id``.
+
+    :param items: ``IdList`` or any other iterable of CWL objects
+    :param id: object id
+    :return: found object or ``None``
+    """
+    if isinstance(items, IdList):
+        return items.find(id)
+    for obj in items or []:
+        if isinstance(obj, dict) and obj.get('id') == id:
+            return obj
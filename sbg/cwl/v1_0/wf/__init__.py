@@ -3,11 +3,13 @@ __all__ = [
     'MergeMethod', 'StepInputExpression',
     'MultipleInputFeature', 'ScatterFeature',
     'SubworkflowFeature', 'ScatterMethod', 'Step',
-    'StepOutput', 'StepInput', 'ExpressionTool'
+    'StepOutput', 'StepInput', 'ExpressionTool', 'Graph', 'Scatter'
 ]
 
 from sbg.cwl.v1_0.wf.input import WorkflowInput
 from sbg.cwl.v1_0.wf.output import WorkflowOutput
+from sbg.cwl.v1_0.wf.graph import Graph
+from sbg.cwl.v1_0.wf.scatter import Scatter
 from sbg.cwl.v1_0.wf.expression_tool import ExpressionTool
 from sbg.cwl.v1_0.wf.methods import ScatterMethod, MergeMethod
 from sbg.cwl.v1_0.wf.workflow import (
@@ -0,0 +1,294 @@
+import collections
+from sbg.cwl.v1_0.util import Lazy, local_id
+from sbg.cwl.v1_0.requirement.resource import (
+    find_resource, DEFAULT_CORES, DEFAULT_RAM
+)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else value
+
+
+class _Scope(object):
+    """Steps of one (sub)workflow, node ids are prefixed by ``prefix``."""
+
+    def __init__(self, wf, prefix='', parent=None, step=None):
+        self.wf = wf
+        self.prefix = prefix
+        self.parent = parent
+        self.step = step  # step of ``parent`` which runs ``wf``
+        self.steps = collections.OrderedDict()
+        self.nested = {}
+        self.step_in = None
+        self.outputs = None
+
+
+class Graph(object):
+    """
+    Dependency graph of workflow steps built from step inputs ``source``
+    and, for nested subworkflows, workflow outputs ``outputSource``.
+
+    Steps of nested subworkflows are expanded into nodes with ids prefixed
+    by ids of their parent steps (``parent/step``), a step of a subworkflow
+    depends directly on steps which produce its inputs in the parent
+    workflow. Node ids of top level steps are their ids.
+
+    :param wf: ``Workflow``
+    :param expand: if False nested subworkflows are single nodes
+
+    Example:
+
+    .. code-block:: python
+
+       from sbg import cwl
+
+       g = cwl.load('workflow.cwl').graph()
+       g.topological_order()
+       g.levels()
+       g.critical_path(weight='cores')
+    """
+
+    def __init__(self, wf, expand=True):
+        self.expand = expand
+        # node id -> Step
+        self.steps = collections.OrderedDict()
+        # node id -> list of node ids it depends on
+        self.predecessors = {}
+        # node id -> list of node ids depending on it
+        self.successors = {}
+        self._memo = {}
+        self._add_scope(_Scope(wf))
+        for node in self.steps:
+            self.successors[node] = []
+        for node, predecessors in self.predecessors.items():
+            for p in predecessors:
+                self.successors[p].append(node)
+        self._memo = None
+
+    # region build
+    def _add_scope(self, scope):
+        for s in scope.wf.steps or []:
+            scope.steps[local_id(s.id)] = s
+        for id, s in scope.steps.items():
+            sub = self._subworkflow(s)
+            if sub is not None:
+                child = _Scope(sub, scope.prefix + id + '/', scope, s)
+                scope.nested[id] = child
+                self._add_scope(child)
+            else:
+                self.steps[scope.prefix + id] = s
+        for id, s in scope.steps.items():
+            if id in scope.nested:
+                continue
+            found = []
+            for i in s.in_ or []:
+                for source in _as_list(i.source):
+                    found.extend(self._resolve(scope, source))
+            # unique, in order of sources
+            self.predecessors[scope.prefix + id] = list(
+                collections.OrderedDict.fromkeys(found)
+            )
+
+    def _subworkflow(self, step):
+        """Returns workflow run by ``step`` if it should be expanded."""
+
+        if not self.expand:
+            return None
+        run = dict.get(step, 'run')
+        if isinstance(run, Lazy):
+            if run.convert is not None and \
+                    run.raw.get('class') != 'Workflow':
+                return None
+            run = step.run
+        if isinstance(run, dict) and run.get('class') == 'Workflow':
+            return run
+        return None
+
+    def _resolve(self, scope, source):
+        """Returns node ids which produce ``source`` of ``scope``."""
+
+        parts = source.rsplit('#', 1)[-1].split('/')
+        if len(parts) > 1 and parts[-2] in scope.steps:
+            step, port = parts[-2], parts[-1]
+            if step in scope.nested:
+                return self._resolve_output(scope.nested[step], port)
+            return [scope.prefix + step]
+        return self._resolve_input(scope, parts[-1])
+
+    def _resolve_input(self, scope, id):
+        """Returns node ids which produce input ``id`` of ``scope``."""
+
+        if scope.parent is None:  # workflow input
+            return []
+        key = (id, 'in', scope.prefix)
+        if key not in self._memo:
+            # a loop of inputs and outputs without steps in between
+            self._memo[key] = []
+            if scope.step_in is None:
+                scope.step_in = {
+                    local_id(i.id): i for i in scope.step.in_ or []
+                }
+            found = []
+            if id in scope.step_in:
+                for source in _as_list(scope.step_in[id].source):
+                    found.extend(self._resolve(scope.parent, source))
+            self._memo[key] = found
+        return self._memo[key]
+
+    def _resolve_output(self, scope, id):
+        """Returns node ids which produce output ``id`` of ``scope``."""
+
+        key = (id, 'out', scope.prefix)
+        if key not in self._memo:
+            self._memo[key] = []
+            if scope.outputs is None:
+                scope.outputs = {
+                    local_id(o.id): o for o in scope.wf.outputs or []
+                }
+            found = []
+            if id in scope.outputs:
+                for source in _as_list(scope.outputs[id].output_source):
+                    found.extend(self._resolve(scope, source))
+            self._memo[key] = found
+        return self._memo[key]
+
+    # endregion
+
+    # region analysis
+    def _kahn(self):
+        """Returns topologically ordered node ids, without nodes of cycles."""
+
+        indegree = {n: len(self.predecessors[n]) for n in self.steps}
+        queue = collections.deque(n for n, d in indegree.items() if d == 0)
+        order = []
+        while queue:
+            n = queue.popleft()
+            order.append(n)
+            for s in self.successors[n]:
+                indegree[s] -= 1
+                if indegree[s] == 0:
+                    queue.append(s)
+        return order
+
+    def find_cycle(self):
+        """
+        Returns a cycle as list of node ids where the first node is repeated
+        at the end (``[a, b, a]`` means ``a`` depends on ``b`` and ``b`` on
+        ``a``) or None if the graph is acyclic.
+        """
+
+        ordered = set(self._kahn())
+        if len(ordered) == len(self.steps):
+            return None
+        # every remaining node depends on another remaining node, walking
+        # predecessors must reach an already visited node
+        remaining = [n for n in self.steps if n not in ordered]
+        path, index = [], {}
+        n = remaining[0]
+        while n not in index:
+            index[n] = len(path)
+            path.append(n)
+            n = next(p for p in self.predecessors[n] if p not in ordered)
+        return path[index[n]:] + [n]
+
+    def topological_order(self):
+        """
+        Returns node ids ordered so that every step comes after steps it
+        depends on, ready steps are taken in order of the workflow.
+
+        :raise ValueError: if the graph has a cycle
+        """
+
+        order = self._kahn()
+        if len(order) != len(self.steps):
+            raise ValueError('Workflow has a cycle: {}'.format(
+                ' -> '.join(reversed(self.find_cycle()))
+            ))
+        return order
+
+    def levels(self):
+        """
+        Returns list of lists of node ids which can run in parallel, steps
+        of a level depend only on steps of previous levels.
+
+        :raise ValueError: if the graph has a cycle
+        """
+
+        level = {}
+        levels = []
+        for n in self.topological_order():
+            i = max((level[p] + 1 for p in self.predecessors[n]), default=0)
+            level[n] = i
+            if i == len(levels):
+                levels.append([])
+            levels[i].append(n)
+        return levels
+
+    def max_concurrency(self):
+        """Returns maximal number of steps in one of ``levels``."""
+
+        return max(map(len, self.levels()), default=0)
+
+    def weights(self, weight=None):
+        """
+        Returns ``dict`` of node weights.
+
+        :param weight: None (every step weighs 1), ``'cores'`` or ``'ram'``
+                       (``Resource`` of app of the step or the step, CWL
+                       defaults are used if not set or an expression),
+                       ``dict`` of node id to duration (missing nodes weigh
+                       0) or function of node id and ``Step`` returning
+                       duration
+        """
+
+        if weight is None:
+            return dict.fromkeys(self.steps, 1)
+        if isinstance(weight, dict):
+            return {n: weight.get(n, 0) for n in self.steps}
+        if callable(weight):
+            return {n: weight(n, s) for n, s in self.steps.items()}
+        if weight in ('cores', 'ram'):
+            key, default = (
+                ('cores', DEFAULT_CORES) if weight == 'cores'
+                else ('ram', DEFAULT_RAM)
+            )
+            return {
+                n: find_resource(key, default, s.run, s)
+                for n, s in self.steps.items()
+            }
+        raise ValueError('Unsupported weight: {}'.format(weight))
+
+    def critical_path(self, weight=None):
+        """
+        Returns tuple of critical path length and list of its node ids. It is
+        the heaviest chain of dependent steps, no schedule can finish the
+        workflow faster.
+
+        :param weight: node weights (see ``weights``)
+        :raise ValueError: if the graph has a cycle
+        """
+
+        weights = self.weights(weight)
+        length = {}
+        previous = {}
+        for n in self.topological_order():
+            best = None
+            for p in self.predecessors[n]:
+                if best is None or length[p] > length[best]:
+                    best = p
+            previous[n] = best
+            length[n] = weights[n] + (length[best] if best is not None else 0)
+        if not length:
+            return 0, []
+        n = max(length, key=length.get)
+        total = length[n]
+        path = []
+        while n is not None:
+            path.append(n)
+            n = previous[n]
+        path.reverse()
+        return total, path
+
+    # endregion
@@ -0,0 +1,184 @@
+import operator
+import functools
+import itertools
+from sbg.cwl.v1_0.util import local_id
+from sbg.cwl.v1_0.wf.methods import ScatterMethod
+
+_METHODS = (
+    ScatterMethod.DOTPRODUCT, ScatterMethod.FLAT_CROSSPRODUCT,
+    ScatterMethod.NESTED_CROSSPRODUCT
+)
+
+
+def _product(values):
+    return functools.reduce(operator.mul, values, 1)
+
+
+def _reshape(flat, dims):
+    """Returns list ``flat`` as nested lists of lengths ``dims``."""
+
+    if len(dims) <= 1:
+        return flat
+    size = _product(dims[1:])
+    return [
+        _reshape(flat[i * size:(i + 1) * size], dims[1:])
+        for i in range(dims[0])
+    ]
+
+
+class Scatter(object):
+    """
+    Jobs of a scattered step: input objects in which every scattered input
+    is replaced by one of its items. Jobs are generated lazily, their count
+    and shape are known up front, so crossproducts of millions of jobs are
+    iterated in constant memory.
+
+     - ``dotproduct``: job ``i`` takes item ``i`` of every scattered input,
+       all of them must have the same length.
+     - ``flat_crossproduct``: a job for every combination of items (the
+       last input varies fastest), outputs are flat arrays.
+     - ``nested_crossproduct``: jobs as of ``flat_crossproduct``, outputs
+       are nested arrays, one level per scattered input.
+
+    :param inputs: input object of the step, scattered inputs are lists
+    :param scatter: id or list of ids of scattered inputs
+    :param method: ``ScatterMethod``, required if more inputs are scattered
+
+    Example:
+
+    .. code-block:: python
+
+       from sbg import cwl
+
+       jobs = cwl.Scatter(
+           {'x': [1, 2], 'y': ['a', 'b', 'c'], 'z': 0}, ['x', 'y'],
+           cwl.ScatterMethod.NESTED_CROSSPRODUCT
+       )
+       len(jobs)  # 6
+       outputs = [run(job) for job in jobs]
+       jobs.gather(outputs)  # {'out': [[.., .., ..], [.., .., ..]]}
+    """
+
+    def __init__(self, inputs, scatter, method=None):
+        if isinstance(scatter, str):
+            scatter = [scatter]
+        self.keys = [local_id(s) for s in scatter or []]
+        if not self.keys:
+            raise ValueError('No scattered inputs.')
+        if len(set(self.keys)) != len(self.keys):
+            raise ValueError(
+                'Scattered inputs must be unique: {}'.format(self.keys)
+            )
+        if method is None:
+            if len(self.keys) > 1:
+                raise ValueError(
+                    'Scatter method is required to scatter {}'.format(
+                        self.keys
+                    )
+                )
+            method = ScatterMethod.DOTPRODUCT
+        if method not in _METHODS:
+            raise ValueError('Unsupported scatter method: {}'.format(method))
+        self.method = method
+        self.inputs = inputs
+        self.values = []
+        for k in self.keys:
+            value = inputs.get(k)
+            if not isinstance(value, list):
+                raise ValueError(
+                    'Scattered input {} must be an array, got: {}'.format(
+                        k, type(value).__name__
+                    )
+                )
+            self.values.append(value)
+        # lengths of scattered inputs
+        self.dims = tuple(len(v) for v in self.values)
+        if method == ScatterMethod.DOTPRODUCT:
+            if len(set(self.dims)) > 1:
+                raise ValueError(
+                    'Dotproduct scatter of inputs of different lengths: '
+                    '{}'.format(dict(zip(self.keys, self.dims)))
+                )
+            self.count = self.dims[0]
+        else:
+            self.count = _product(self.dims)
+        # lengths of gathered output arrays
+        if method == ScatterMethod.NESTED_CROSSPRODUCT:
+            self.shape = self.dims
+        else:
+            self.shape = (self.count,)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        base = {k: v for k, v in self.inputs.items() if k not in self.keys}
+        keys = self.keys
+        values = self.values
+        if self.method == ScatterMethod.DOTPRODUCT:
+            for items in zip(*values):
+                job = dict(base)
+                job.update(zip(keys, items))
+                yield job
+        else:
+            for items in itertools.product(*values):
+                job = dict(base)
+                job.update(zip(keys, items))
+                yield job
+
+    def indices(self):
+        """
+        Yields positions of jobs (in order of iteration) in the gathered
+        output arrays, tuples of item indices of scattered inputs for
+        ``nested_crossproduct``, job numbers otherwise.
+        """
+
+        if self.method == ScatterMethod.NESTED_CROSSPRODUCT:
+            return itertools.product(*(range(d) for d in self.dims))
+        return iter(range(self.count))
+
+    def job(self, index):
+        """
+        Returns input object of job number ``index`` without generating
+        previous jobs.
+
+        :param index: job number, ``0 <= index < len(self)``
+        """
+
+        if not 0 <= index < self.count:
+            raise IndexError('Job {} of {} jobs'.format(index, self.count))
+        job = {k: v for k, v in self.inputs.items() if k not in self.keys}
+        if self.method == ScatterMethod.DOTPRODUCT:
+            for k, v in zip(self.keys, self.values):
+                job[k] = v[index]
+            return job
+        for k, v, d in reversed(list(zip(self.keys, self.values, self.dims))):
+            index, i = divmod(index, d)
+            job[k] = v[i]
+        return job
+
+    def gather(self, outputs, ids=None):
+        """
+        Returns output object of the scattered step, for every output id
+        a (nested) array of its values of jobs.
+
+        :param outputs: iterable of output objects of jobs in order of
+                        iteration
+        :param ids: output ids, by default keys of the first output object
+        """
+
+        columns = None
+        count = 0
+        for o in outputs:
+            if columns is None:
+                columns = {id: [] for id in (o if ids is None else ids)}
+            for id, column in columns.items():
+                column.append(o.get(id))
+            count += 1
+        if columns is None:
+            columns = {id: [] for id in ids or []}
+        if count != self.count:
+            raise ValueError('Expected outputs of {} jobs, got {}'.format(
+                self.count, count
+            ))
+        return {id: _reshape(c, self.shape) for id, c in columns.items()}
@@ -1,11 +1,21 @@
+import hashlib
+import functools
 import itertools
 from sbg.cwl.v1_0.app import App
-from sbg.cwl.v1_0.base import Cwl, salad
+from sbg.cwl.v1_0.base import (
+    Cwl, salad, lazy, trusted as trusted_context, _mode
+)
 from sbg.cwl.v1_0.wf.input import WorkflowInput
 from sbg.cwl.v1_0.wf.output import WorkflowOutput
+from sbg.cwl.v1_0.wf.graph import Graph
+from sbg.cwl.v1_0.wf.scatter import Scatter
 from sbg.cwl.v1_0.cmd.tool import CommandLineTool
+from sbg.cwl.v1_0.cmd.input import CommandInput
+from sbg.cwl.consts import SHARED_PREFIX, INPUT_JSON, INPUT_JSON_SHARED
 from sbg.cwl.v1_0.wf.requirement import to_step_req
-from sbg.cwl.v1_0.util import is_instance_all
+from sbg.cwl.v1_0.util import (
+    is_instance_all, to_id_list, find_by_id, Lazy
+)
 from sbg.cwl.v1_0.wf.expression_tool import ExpressionTool
 from sbg.cwl.v1_0.check import to_str, to_any, to_str_slist
 from sbg.cwl.v1_0.wf.methods import ScatterMethod, MergeMethod
@@ -16,7 +26,7 @@ from sbg.cwl.v1_0.wf.requirement import (
 )
 from sbg.cwl.v1_0.requirement import (
     InlineJavascript, Docker, ShellCommand, Resource, InitialWorkDir,
-    Software, SchemaDef, EnvVar
+    Software, SchemaDef, EnvVar, Dirent
 )
 
 
@@ -105,9 +115,16 @@ class Workflow(App):
     def get_step(self, id):
         """Get step by ``id``."""
 
-        for s in self.steps:
-            if s.id == id:
-                return s
+        return find_by_id(self.steps, id)
+
+    def graph(self, expand=True):
+        """
+        Returns dependency ``Graph`` of steps.
+
+        :param expand: expand steps of nested subworkflows
+        """
+
+        return Graph(self, expand=expand)
 
     def add_requirement(self, new_r):
         """Adds ``new_r`` into list of workflow requirements."""
@@ -129,6 +146,45 @@ class Workflow(App):
         else:
             raise TypeError('Expected Requirement got: {}'.format(type(new_r)))
 
+    @staticmethod
+    def _parse_connection(src, dst):
+        """
+        Validates connection and returns its source/destination split into
+        ``[step_id, port_id]`` or ``[port_id]`` lists.
+        """
+
+        src_arr = src.split('.')
+        dst_arr = dst.split('.')
+        src_n, dst_n = len(src_arr), len(dst_arr)
+
+        if src_n < 2 and dst_n < 2:
+            raise ValueError("Connection have to contain minimum one step.")
+        if (src_n, dst_n) not in ((1, 2), (2, 1), (2, 2)):
+            raise ValueError(
+                'Unsupported value arguments: {}, {}'.format(src, dst)
+            )
+        return src_arr, dst_arr
+
+    @staticmethod
+    def _merge_sources(current, new):
+        """
+        Appends ``new`` sources to ``current`` source value skipping
+        duplicates, while preserving order.
+        """
+
+        if not current:
+            merged = []
+        elif isinstance(current, str):
+            merged = [current]
+        else:
+            merged = list(current)
+        seen = set(merged)
+        for s in new:
+            if s not in seen:
+                seen.add(s)
+                merged.append(s)
+        return merged[0] if len(merged) == 1 else merged
+
     def add_connection(self, src, dst):
         """
         Connects source and destination nodes, specified by `src` and `dst`
@@ -138,99 +194,79 @@ class Workflow(App):
         :param dst: connection destination
         """
 
-        src_arr = src.split('.')
-        src_n = len(src_arr)
-        dst_arr = dst.split('.')
-        dst_n = len(dst_arr)
+        self.add_connections([(src, dst)])
 
-        def to_list(x):
-            if not x:
-                return []
-            if isinstance(x, str):
-                return [x]
-            else:
-                return x
+    def add_connections(self, connections):
+        """
+        Connects many source and destination nodes in one pass. Result is the
+        same as calling ``add_connection`` for every ``(src, dst)`` pair in
+        the given order, connections are validated before any of them is
+        applied.
 
-        if src_n < 2 and dst_n < 2:
-            raise ValueError("Connection have to contain minimum one step.")
+        :param connections: iterable of ``(src, dst)`` pairs
+        """
 
-        if src_n == 1 and dst_n == 2:
-            step_id = dst_arr[0]
-            input_id = dst_arr[1]
-            for s in self.steps:
-                if s.id == step_id:
-                    for x in s.in_:
-                        if x.id == input_id:
-                            x.source = to_list(x.source)
-                            x.source = list(set.union(set(x.source), {src}))
-                            if len(x.source) == 1:
-                                x.source = x.source[0]
-                            return
-                    s.in_.append(StepInput(input_id, source=src))
-                    break
-        elif src_n == 2 and dst_n == 1:
-            step_id = src_arr[0]
-            output_id = src_arr[1]
-            for s in self.steps:
-                if s.id == step_id:
-                    for x in s.out:
-                        if x.id == output_id:
-                            return
-                    s.out.append(StepOutput(output_id))
-                    break
-
-            for o in self.outputs:
-                if o.id == dst_arr[0]:
-                    o.output_source = to_list(o.output_source)
-                    o.output_source = list(set.union(
-                        set(o.output_source), {"{}/{}".format(
-                            step_id, output_id
-                        )}
-                    ))
-                    if len(o.output_source) == 1:
-                        o.output_source = o.output_source[0]
-        elif src_n == 2 and dst_n == 2:
-            src_step_id = src_arr[0]
-            src_output_id = src_arr[1]
-            dst_step_id = dst_arr[0]
-            dst_input_id = dst_arr[1]
-            done_in, done_out = False, False
-
-            for s in self.steps:
-                if not done_out and s.id == src_step_id:
-                    for o in s.out:
-                        if o.id == src_output_id:
-                            done_out = True
-                            break
-                    if not done_out:
-                        s.out.append(StepOutput(src_output_id))
-                        done_out = True
-
-                elif not done_in and s.id == dst_step_id:
-                    for i in s.in_:
-                        if i.id == dst_input_id:
-                            i.source = to_list(i.source)
-                            i.source = list(set.union(
-                                set(i.source), {"{}/{}".format(
-                                    src_step_id, src_output_id
-                                )}
-                            ))
-                            if len(i.source) == 1:
-                                i.source = i.source[0]
-                            done_in = True
-                            break
-                    if not done_in:
-                        s.in_.append(StepInput(
-                            dst_input_id,
-                            source="{}/{}".format(
-                                src_step_id, src_output_id
-                            ))
-                        )
-                        done_in = True
-        else:
-            raise ValueError(
-                'Unsupported value arguments: {}, {}'.format(src, dst)
-            )
+        parsed = [self._parse_connection(src, dst) for src, dst in connections]
+
+        step_in = {}  # step id -> {input id: StepInput}
+        step_out = {}  # step id -> set of output ids
+        # ordered new sources per StepInput / WorkflowOutput
+        sources = {}
+
+        def inputs_of(s):
+            if s.id not in step_in:
+                step_in[s.id] = {}
+                for i in s.in_:
+                    step_in[s.id].setdefault(i.id, i)
+            return step_in[s.id]
+
+        def add_out(s, output_id):
+            if s.id not in step_out:
+                step_out[s.id] = {
+                    o.id if isinstance(o, StepOutput) else o for o in s.out
+                }
+            if output_id not in step_out[s.id]:
+                step_out[s.id].add(output_id)
+                s.out.append(StepOutput(output_id))
+
+        def add_in(s, input_id, source):
+            in_ = inputs_of(s)
+            if input_id in in_:
+                sources.setdefault(id(in_[input_id]), (in_[input_id], []))[
+                    1].append(source)
+            else:
+                in_[input_id] = StepInput(input_id, source=source)
+                s.in_.append(in_[input_id])
+
+        for src_arr, dst_arr in parsed:
+            if len(src_arr) == 1:  # workflow input -> step input
+                s = self.get_step(dst_arr[0])
+                if s:
+                    add_in(s, dst_arr[1], src_arr[0])
+            elif len(dst_arr) == 1:  # step output -> workflow output
+                s = self.get_step(src_arr[0])
+                if s:
+                    add_out(s, src_arr[1])
+                o = self.get_output(dst_arr[0])
+                if o:
+                    sources.setdefault(id(o), (o, []))[1].append(
+                        "{}/{}".format(*src_arr)
+                    )
+            else:  # step output -> step input
+                s = self.get_step(src_arr[0])
+                if s:
+                    add_out(s, src_arr[1])
+                s = self.get_step(dst_arr[0])
+                if s:
+                    add_in(s, dst_arr[1], "{}/{}".format(*src_arr))
+
+        for obj, new in sources.values():
+            if isinstance(obj, WorkflowOutput):
+                obj.output_source = self._merge_sources(
+                    obj.output_source, new
+                )
+            else:
+                obj.source = self._merge_sources(obj.source, new)
 
     def scatter(self, step, ports, method):
         """
@@ -306,19 +342,112 @@ class Workflow(App):
                                a list with > 1 port
         """
 
-        def wf_io(new_step, k, id=None):
+        return self.add_steps([dict(
+            step=step, id=id, in_=in_, out=out, expose=expose,
+            expose_except=expose_except, scatter=scatter,
+            scatter_method=scatter_method
+        )])[0]
+
+    def add_steps(self, steps, **kwargs):
+        """
+        Adds many steps into workflow in one pass. Result is the same as
+        calling ``add_step`` for every item in the given order.
+
+        :param steps: iterable where every item is either a step accepted by
+                      ``add_step`` or a ``dict`` of ``add_step`` arguments
+        :param kwargs: ``add_step`` arguments used for all items which do not
+                       override them (eg. ``expose=[]``)
+        :return: list of added steps
+
+        Example:
+
+        .. code-block:: python
+
+           wf.add_steps([tool1, dict(step=tool2, id='t2', expose=['out'])])
+        """
+
+        # everything is checked before the workflow is changed, so a failed
+        # call adds nothing
+        plan = []
+        ids = set()
+        for item in steps:
+            args = dict(kwargs)
+            if isinstance(item, dict) and not isinstance(item, Cwl):
+                args.update(item)
+            else:
+                args['step'] = item
+            step = args['step']
+            if not isinstance(step, (Step, CommandLineTool, Workflow,
+                                     ExpressionTool)):
+                raise ValueError(
+                    'Not supported step type: {}'.format(type(step))
+                )
+            s_id = args.get('id') or step.id
+            if self.get_step(s_id) or s_id in ids:
+                raise ValueError(
+                    'Step with id: {} already exists'.format(s_id)
+                )
+            ids.add(s_id)
+            run = step.run if isinstance(step, Step) else step
+
+            expose = args.get('expose')
+            expose_except = args.get('expose_except')
+            expose_except = set() if not expose_except else set(
+                expose_except
+            )
+            if expose is None:
+                expose = [x.id for x in itertools.chain(
+                    run.inputs or [], run.outputs or []
+                )]
+            if isinstance(expose, dict):
+                expose = {
+                    k: v for k, v in expose.items() if k not in expose_except
+                }
+            else:
+                # ordered set, keeps workflow ports in a deterministic order
+                expose = [
+                    k for k in dict.fromkeys(expose) if k not in expose_except
+                ]
+            for k in expose:
+                if not (run.get_input(k) or run.get_output(k)):
+                    raise ValueError(
+                        'Step {} has no port to expose: {}'.format(s_id, k)
+                    )
+            plan.append((args, step, s_id, expose))
+
+        if not self.steps:
+            self.steps = []
+        if not self.inputs:
+            self.inputs = []
+        if not self.outputs:
+            self.outputs = []
+
+        suffixes = {}  # port key -> last suffix taken in this call
+        connections = []
+        scattered = []
+        new_steps = []
+
+        def port_id(k, id=None):
             if not id:
                 id = k
-
-            i = 0
-            while self.get_input(id) or self.get_output(id):
+            if not (self.get_input(id) or self.get_output(id)):
+                return id
+            # ports are only added here, so all suffixes up to the last one
+            # taken for ``k`` are still taken
+            i = suffixes.get(k, 0)
+            while True:
                 i += 1
                 id = '{}_{}'.format(k, i)
+                if not (self.get_input(id) or self.get_output(id)):
+                    suffixes[k] = i
+                    return id
 
+        def wf_io(new_step, k, id=None):
+            id = port_id(k, id)
             label = id
             obj = new_step.run.get_input(k)
             if obj:  # input
-                param = WorkflowInput(
+                self.inputs.append(WorkflowInput(
                     id=id,
                     label=label,
                     doc=obj.doc,
@@ -326,16 +455,11 @@ class Workflow(App):
                     streamable=obj.streamable,
                     format=obj.format,
                     type=obj.type
-                )
-                if not self.inputs:
-                    self.inputs = []
-                self.inputs.append(param)
-                self.add_connection(id, "{}.{}".format(
-                    new_step.id, k
                 ))
+                connections.append((id, "{}.{}".format(new_step.id, k)))
             else:  # output
                 obj = new_step.run.get_output(k)
-                param = WorkflowOutput(
+                self.outputs.append(WorkflowOutput(
                     id=id,
                     label=label,
                     doc=obj.doc,
@@ -343,63 +467,109 @@ class Workflow(App):
                     streamable=obj.streamable,
                     format=obj.format,
                     type=obj.type
-                )
-                if not self.outputs:
-                    self.outputs = []
-                self.outputs.append(param)
-                self.add_connection("{}.{}".format(
-                    new_step.id, k
-                ), id)
-
-        s_id = id if id else step.id
-        if not self.steps:
-            self.steps = []
-        for s in self.steps:
-            if s.id == s_id:
-                raise ValueError(
-                    'Step with id: {} already exists'.format(s_id)
-                )
-        if isinstance(step, Step):
-            if id:
-                step.id = id
-            new_step = step
-        elif isinstance(step, (CommandLineTool, Workflow, ExpressionTool)):
-            new_step = Step(s_id, in_, out, run=step)
-        else:
-            raise ValueError(
-                'Not supported step type: {}'.format(type(step))
-            )
+                ))
+                connections.append(("{}.{}".format(new_step.id, k), id))
+
+        for args, step, s_id, expose in plan:
+            if isinstance(step, Step):
+                if args.get('id'):
+                    step.id = args['id']
+                new_step = step
+            else:
+                new_step = Step(s_id, args.get('in_'), args.get('out'),
+                                run=step)
 
-        self.steps += [new_step]
-        if isinstance(step, Workflow):
-            self.add_requirement(SubworkflowFeature())
+            self.steps.append(new_step)
+            new_steps.append(new_step)
+            if isinstance(step, Workflow):
+                self.add_requirement(SubworkflowFeature())
 
-        expose_except = {} if not expose_except else set(expose_except)
-        if expose is None:
-            i_keys = map(lambda x: x.id, new_step.run.inputs)
-            o_keys = map(lambda x: x.id, new_step.run.outputs)
-            expose = set(itertools.chain(i_keys, o_keys)).difference(
-                expose_except
-            )
-        elif isinstance(expose, dict):
-            expose = {
-                k: v for k, v in expose.items() if k not in expose_except
-            }
-        else:
-            expose = set(expose).difference(expose_except)
+            if isinstance(expose, dict):
+                for k, v in expose.items():
+                    wf_io(new_step, k, id=v)
+            else:
+                for i in expose:
+                    wf_io(new_step, i)
 
-        if isinstance(expose, dict):
-            for k, v in expose.items():
-                wf_io(new_step, k, id=v)
-        else:
-            for i in expose:
-                wf_io(new_step, i)
+            if args.get('scatter'):
+                self.add_requirement(ScatterFeature())
+                scattered.append(
+                    (new_step, args['scatter'], args.get('scatter_method'))
+                )
 
-        if scatter:
-            self.add_requirement(ScatterFeature())
+        self.add_connections(connections)
+        # scatter needs connections to find step sources and sinks
+        for new_step, scatter, scatter_method in scattered:
             self.scatter(new_step, scatter, scatter_method)
 
-        return new_step
+        return new_steps
+
+    def share_files(self, min_count=2, min_size=1024):
+        """
+        Deduplicates files embedded into tools of this workflow (``Dirent``
+        literals of ``InitialWorkDirRequirement``, eg. bundles created by
+        ``to_tool`` or ``from_bash``). Content found in at least
+        ``min_count`` steps is moved into a single workflow input of type
+        ``string`` (with the content as default) which is connected to these
+        steps, and tools create the file from ``$(inputs.<id>)``.
+
+        Only tools run directly by workflow steps are processed.
+
+        :param min_count: minimal number of steps sharing the same content
+        :param min_size: minimal content length
+        :return: list of ids of added workflow inputs
+        """
+
+        found = {}  # input id -> (content, [(step, dirent), ...])
+        for step in self.steps or []:
+            if not isinstance(step.run, CommandLineTool):
+                continue
+            for r in step.run.requirements or []:
+                if not isinstance(r, InitialWorkDir) or not isinstance(
+                        r.listing, list):
+                    continue
+                for d in r.listing:
+                    if (isinstance(d, Dirent) and
+                            isinstance(d.entry, str) and
+                            len(d.entry) >= min_size and
+                            '$(' not in d.entry and '${' not in d.entry):
+                        id = SHARED_PREFIX + hashlib.sha1(
+                            d.entry.encode('utf-8')
+                        ).hexdigest()[:16]
+                        found.setdefault(id, (d.entry, []))[1].append(
+                            (step, d)
+                        )
+
+        if not self.inputs:
+            self.inputs = []
+        added = []
+        for id, (content, usages) in found.items():
+            if len(usages) < min_count and not self.get_input(id):
+                continue
+            if not self.get_input(id):
+                self.inputs.append(WorkflowInput(
+                    id=id, label=id, type=Primitive.STRING, default=content
+                ))
+                added.append(id)
+            for step, d in usages:
+                d.entry = '$(inputs.{})'.format(id)
+                tool = step.run
+                if not tool.inputs:
+                    tool.inputs = []
+                if not tool.get_input(id):
+                    tool.inputs.append(
+                        CommandInput(id=id, type=Primitive.STRING)
+                    )
+                if not any(i.id == id for i in step.in_):
+                    step.in_.append(StepInput(id=id, source=id))
+                # shared inputs are not arguments of generated tools
+                for r in tool.requirements:
+                    if isinstance(r, InitialWorkDir):
+                        for e in r.listing:
+                            if (isinstance(e, Dirent) and
+                                    e.entry == INPUT_JSON):
+                                e.entry = INPUT_JSON_SHARED
+        return added
 
     # endregion
 
@@ -417,30 +587,47 @@ class Workflow(App):
 
     @steps.setter
     def steps(self, value):
-        self['steps'] = to_steps(value)
+        self['steps'] = to_id_list(to_steps(value))
 
     # endregion
 
 
 @salad
-def to_run(value):
-    @salad
-    def map_dict(d):
-        if d['class'] == 'CommandLineTool':
-            return CommandLineTool(**d)
-        elif d['class'] == 'Workflow':
-            return Workflow(**d)
-        elif d['class'] == 'ExpressionTool':
-            return ExpressionTool(**d)
-        else:
-            raise ValueError('Unsupported class: {}'.format(d['class']))
+def _run_from_dict(d):
+    """Converts ``run`` document into an app specified by key ``class``."""
+
+    if d['class'] == 'CommandLineTool':
+        return CommandLineTool(**d)
+    elif d['class'] == 'Workflow':
+        return Workflow(**d)
+    elif d['class'] == 'ExpressionTool':
+        return ExpressionTool(**d)
+    else:
+        raise ValueError('Unsupported class: {}'.format(d['class']))
 
+
+def _run_lazily(trusted, d):
+    with lazy():
+        if trusted:
+            with trusted_context():
+                return _run_from_dict(d)
+        return _run_from_dict(d)
+
+
+@salad
+def to_run(value):
     if value is not None:
         if isinstance(value, (str, CommandLineTool, Workflow,
                               ExpressionTool)):
             return value
         elif isinstance(value, dict):
-            return map_dict(value)
+            if _mode.lazy:
+                return Lazy(
+                    value, functools.partial(_run_lazily, _mode.trusted)
+                )
+            return _run_from_dict(value)
+        elif isinstance(value, Lazy):
+            return value
         else:
             raise TypeError('TypeError, got: {}'.format(type(value)))
 
@@ -497,6 +684,9 @@ class Step(Cwl):
     More on http://www.commonwl.org/v1.0/Workflow.html#WorkflowStep
     """
 
+    # digest is cached (see ``Cwl.calc_hash``)
+    cache_digest = True
+
     def __init__(self, id, in_, out, run,
                  requirements=None, hints=None, label=None, doc=None,
                  scatter=None, scatter_method=None):
@@ -528,6 +718,15 @@ class Step(Cwl):
             return True
         return False
 
+    def scatter_jobs(self, inputs):
+        """
+        Returns ``Scatter`` jobs of the step for its input object.
+
+        :param inputs: input object of the step, scattered inputs are lists
+        """
+
+        return Scatter(inputs, self.scatter, self.scatter_method)
+
     # endregion
 
     # region properties
@@ -553,7 +752,7 @@ class Step(Cwl):
 
     @in_.setter
     def in_(self, value):
-        self['in'] = to_in(value)
+        self['in'] = to_id_list(to_in(value))
 
     @property
     def out(self):
@@ -570,13 +769,20 @@ class Step(Cwl):
     @property
     def run(self):
         """
-        Specifies the process to run.
+        Specifies the process to run. Documents loaded with ``lazy=True``
+        are converted here on first access.
         """
-        return self.get('run')
+        run = self.get('run')
+        if isinstance(run, Lazy):
+            run = run.bind(self, 'run').materialize()
+        return run
 
     @run.setter
     def run(self, value):
-        self['run'] = to_run(value)
+        value = to_run(value)
+        if isinstance(value, Lazy):
+            value.bind(self, 'run')
+        self['run'] = value
 
     @property
     def requirements(self):